@@ -0,0 +1,86 @@
+"""
+Compares building Book models from `SELECT *` + `sqlite3.Row` name lookups into
+plain dataclasses (the original approach) against the repositories' explicit
+column lists, positional row factories and slotted models.
+
+Usage:
+    python benchmarks/bench_models.py [--rows 1000000]
+"""
+import argparse
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+
+from library.data.book_repository import BookRepository
+from library.data.database_manager import DatabaseManager
+
+
+@dataclass
+class DictBook:
+    title: str
+    author: str
+    isbn: str
+    is_available: bool = True
+    id: int = None
+
+
+def read_with_rows(conn):
+    cursor = conn.execute("SELECT * FROM books")
+    return [
+        DictBook(
+            title=row['title'],
+            author=row['author'],
+            isbn=row['isbn'],
+            is_available=bool(row['is_available']),
+            id=row['id']
+        ) for row in cursor.fetchall()
+    ]
+
+
+def measure(read):
+    """Times `read`, then runs it again under tracemalloc to size its result."""
+    started = time.perf_counter()
+    rows = len(read())
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    books = read()
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del books
+    return rows, elapsed, memory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        db = DatabaseManager(db_path=f"{directory}/bench.db", profile="bulk")
+        repo = BookRepository(db)
+        with db.writer() as conn, conn:
+            conn.executemany(
+                "INSERT INTO books (isbn, title, author, is_available) VALUES (?, ?, ?, 1)",
+                ((f"isbn-{n}", f"Title {n}", f"Author {n % 1000}") for n in range(args.rows)),
+            )
+
+        with db.reader() as conn:
+            results = {
+                "sqlite3.Row + dataclass": measure(lambda: read_with_rows(conn)),
+                "row factory + slots": measure(repo.get_all_books),
+            }
+        db.close_connection()
+
+    baseline_time, baseline_memory = results["sqlite3.Row + dataclass"][1:]
+    print(f"{'approach':<26}{'rows':>10}{'seconds':>10}{'MiB':>10}{'time':>8}{'memory':>8}")
+    for name, (rows, elapsed, memory) in results.items():
+        print(
+            f"{name:<26}{rows:>10}{elapsed:>10.2f}{memory / 2**20:>10.1f}"
+            f"{elapsed / baseline_time:>8.0%}{memory / baseline_memory:>8.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
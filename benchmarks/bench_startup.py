@@ -0,0 +1,80 @@
+"""
+Tracks the cold-start cost of the `library` command: the import time of
+`library.cli` from `python -X importtime`, checked against a budget, and
+the wall time of a few complete commands.
+
+Usage:
+    python benchmarks/bench_startup.py [--budget-ms 60] [--runs 10]
+
+Exits with status 1 when the import time is over budget.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RUN_CLI = "import sys; from library.cli import cli; cli(sys.argv[1:])"
+COMMANDS = [
+    ["--help"],
+    ["books", "get", "missing-isbn"],
+    ["books", "list", "--limit", "1"],
+    ["loans", "list", "--limit", "1"],
+]
+
+
+def import_times():
+    """
+    Returns the cumulative import time in microseconds of every module
+    imported by `import library.cli`, and the self time of each.
+    """
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import library.cli"],
+        capture_output=True, text=True, check=True,
+    ).stderr
+    cumulative, own = {}, {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        cumulative[name], own[name] = int(cumulative_us), int(self_us)
+    return cumulative, own
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--budget-ms", type=float, default=60.0)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest modules to list.")
+    args = parser.parse_args()
+
+    samples = [import_times() for _ in range(args.runs)]
+    cli_ms = statistics.median(cumulative["library.cli"] for cumulative, _ in samples) / 1000
+    cumulative, own = samples[-1]
+
+    print(f"{'module':<50}{'self ms':>10}")
+    for name in sorted(own, key=own.get, reverse=True)[:args.top]:
+        print(f"{name:<50}{own[name] / 1000:>10.2f}")
+    print(f"\n'import library.cli': {cli_ms:.1f} ms (median of {args.runs}, budget {args.budget_ms:.0f} ms)")
+    print(f"rich imported at startup: {'yes' if any(name.startswith('rich') for name in cumulative) else 'no'}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"\n{'command':<36}{'median ms':>10}")
+        for command in COMMANDS:
+            argv = [sys.executable, "-c", RUN_CLI, "--db-path", f"{directory}/bench.db", *command]
+            timings = []
+            for _ in range(args.runs):
+                started = time.perf_counter()
+                subprocess.run(argv, capture_output=True, check=True)
+                timings.append(time.perf_counter() - started)
+            print(f"{'library ' + ' '.join(command):<36}{statistics.median(timings) * 1000:>10.1f}")
+
+    if cli_ms > args.budget_ms:
+        print(f"\nOver budget by {cli_ms - args.budget_ms:.1f} ms.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
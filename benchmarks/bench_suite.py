@@ -0,0 +1,314 @@
+"""
+Times the repositories and services against a generated database of 10k,
+100k or 1M books and records the results as JSON, optionally comparing them
+with a baseline run.
+
+Usage:
+    python benchmarks/bench_suite.py [--size 100k] [--repeat 5] [--only search]
+        [--output results.json] [--baseline baseline.json] [--threshold 0.15]
+
+Generated databases are kept in --data-dir and reused by later runs; every
+run works on a fresh copy. With --baseline, exits with status 1 when a case
+is slower than the baseline by more than --threshold.
+"""
+import argparse
+import json
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from dataset import (
+    AS_OF, DEFAULT_SEED, LAST_NAMES, TITLE_ADJECTIVES, TITLE_NOUNS, isbn13, populate, resolve_size,
+    write_books_csv,
+)
+from library.data.book_repository import BookRepository
+from library.data.database_manager import DatabaseManager
+from library.data.import_checkpoint_repository import ImportCheckpointRepository
+from library.data.loan_repository import LoanRepository
+from library.data.person_repository import PersonRepository
+from library.models.models import Book
+from library.services.book_service import BookService
+from library.services.import_service import ImportService
+
+# Single-entity lookups per timed run
+LOOKUPS = 1000
+SEARCHES = 100
+PAGES = 100
+PAGE_SIZE = 100
+# Books lent and returned, or added, per timed run
+BATCH = 500
+# Rows of the CSV file imported per timed run
+IMPORT_ROWS = 20_000
+
+CASES = {}
+
+
+def case(name):
+    """Registers a benchmark. Cases take the environment and return the number of operations timed."""
+    def register(function):
+        CASES[name] = function
+        return function
+    return register
+
+
+class Environment:
+    def __init__(self, db: DatabaseManager, books: int, workdir: Path, seed: int):
+        self.db = db
+        self.workdir = workdir
+        self.book_count = books
+        self.rng = random.Random(seed)
+        self.books = BookRepository(db)
+        self.people = PersonRepository(db)
+        self.loans = LoanRepository(db)
+        self.book_service = BookService(self.books)
+        with db.reader() as conn:
+            self.person_count = conn.execute("SELECT COUNT(*) FROM people").fetchone()[0]
+            self.person_names = [row[0] for row in conn.execute(
+                "SELECT name FROM people ORDER BY random() LIMIT ?", (LOOKUPS,)
+            )]
+        # ISBNs past the generated catalog, for books added by the write cases
+        self.next_isbn = books
+        self.import_csv = workdir / "import.csv"
+        write_books_csv(str(self.import_csv), IMPORT_ROWS, seed, first=10 ** 8)
+
+    def sample_ids(self, upper: int, count: int = LOOKUPS):
+        return [self.rng.randint(1, upper) for _ in range(count)]
+
+
+@case("books.get_book_by_id")
+def get_book_by_id(env):
+    for book_id in env.sample_ids(env.book_count):
+        env.books.get_book_by_id(book_id)
+    return LOOKUPS
+
+
+@case("books.get_book_by_isbn")
+def get_book_by_isbn(env):
+    for n in env.sample_ids(env.book_count):
+        env.books.get_book_by_isbn(isbn13(n - 1))
+    return LOOKUPS
+
+
+@case("books.iter_books")
+def iter_books(env):
+    return sum(1 for _ in env.books.iter_books())
+
+
+@case("books.iter_books.deep_pages")
+def iter_books_deep_pages(env):
+    for after_id in env.sample_ids(max(1, env.book_count - PAGE_SIZE), PAGES):
+        list(env.books.iter_books(after_id=after_id, limit=PAGE_SIZE))
+    return PAGES
+
+
+@case("books.add_books")
+def add_books(env):
+    first, env.next_isbn = env.next_isbn, env.next_isbn + BATCH
+    env.books.add_books(Book(f"Added {n}", "Bench Author", isbn13(n)) for n in range(first, first + BATCH))
+    return BATCH
+
+
+@case("books.search_books")
+def search_books(env):
+    words = TITLE_ADJECTIVES + TITLE_NOUNS + LAST_NAMES
+    for _ in range(SEARCHES):
+        env.book_service.search_books(" ".join(env.rng.sample(words, 2)), limit=20)
+    return SEARCHES
+
+
+@case("people.get_person_by_name")
+def get_person_by_name(env):
+    for name in env.person_names:
+        env.people.get_person_by_name(name)
+    return len(env.person_names)
+
+
+@case("people.search_people")
+def search_people(env):
+    # Alternates first names, surnames with two letters swapped and partial phone numbers
+    for i in range(SEARCHES):
+        first, *_, last = env.rng.choice(env.person_names).split()
+        if i % 3 == 0:
+            term = first
+        elif i % 3 == 1:
+            term = last[:-2] + last[-1] + last[-2]
+        else:
+            term = f"555 {env.rng.randrange(1000):03d}"
+        env.people.search_people(term, 20)
+    return SEARCHES
+
+
+@case("people.iter_people")
+def iter_people(env):
+    return sum(1 for _ in env.people.iter_people())
+
+
+@case("loans.get_loan_views.by_person")
+def get_loan_views_by_person(env):
+    for person_id in env.sample_ids(env.person_count):
+        env.loans.get_loan_views(person_id)
+    return LOOKUPS
+
+
+@case("loans.iter_loan_views")
+def iter_loan_views(env):
+    return sum(1 for _ in env.loans.iter_loan_views())
+
+
+@case("loans.iter_loan_views_due.overdue")
+def iter_overdue_loan_views(env):
+    return sum(1 for _ in env.loans.iter_loan_views_due(None, AS_OF))
+
+
+@case("loans.lend_and_return_books")
+def lend_and_return_books(env):
+    with env.db.reader() as conn:
+        book_ids = [row[0] for row in conn.execute(
+            "SELECT id FROM books WHERE is_available = 1 ORDER BY random() LIMIT ?", (BATCH,)
+        )]
+    person_ids = env.sample_ids(env.person_count, len(book_ids))
+    env.loans.lend_books(zip(book_ids, person_ids), AS_OF, AS_OF)
+    env.loans.return_books(book_ids)
+    return 2 * len(book_ids)
+
+
+@case("import.import_books_csv")
+def import_books_csv(env):
+    # Into an empty database each time, so every run imports every row
+    path = env.workdir / "import.db"
+    db = DatabaseManager(db_path=str(path), profile="bulk")
+    try:
+        service = ImportService(BookService(BookRepository(db)), ImportCheckpointRepository(db))
+        service.import_books_csv(str(env.import_csv))
+    finally:
+        db.close_connection()
+        for leftover in env.workdir.glob("import.db*"):
+            leftover.unlink()
+    return IMPORT_ROWS
+
+
+def dataset(data_dir: Path, books: int, seed: int) -> Path:
+    """
+    Returns the generated database for `books` and `seed`, creating it on
+    the first run.
+    """
+    path = data_dir / f"library-{books}-{seed}.db"
+    if not path.exists():
+        data_dir.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(path.name + ".partial")
+        print(f"Generating {books:,} books into {path}...", file=sys.stderr)
+        db = DatabaseManager(db_path=str(partial), profile="bulk")
+        try:
+            populate(db, books, seed)
+        finally:
+            db.close_connection()
+        partial.rename(path)
+    return path
+
+
+def run(env, names, repeat: int, warmup: int):
+    results = {}
+    for name in names:
+        for _ in range(warmup):
+            CASES[name](env)
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            ops = CASES[name](env)
+            timings.append(time.perf_counter() - started)
+        median = statistics.median(timings)
+        results[name] = {
+            "ops": ops,
+            "best_s": min(timings),
+            "median_s": median,
+            "per_op_us": median / ops * 1e6 if ops else None,
+        }
+        print(f"{name:<36}{ops:>10}{min(timings):>10.4f}{median:>10.4f}{results[name]['per_op_us'] or 0:>12.1f}")
+    return results
+
+
+def compare(results, baseline, threshold: float) -> int:
+    """
+    Prints every case's median against the baseline's and returns the
+    number of regressions beyond `threshold`.
+    """
+    print(f"\n{'case':<36}{'baseline s':>12}{'current s':>12}{'change':>10}")
+    regressions = 0
+    for name, result in results.items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:<36}{'-':>12}{result['median_s']:>12.4f}{'new':>10}")
+            continue
+        change = result["median_s"] / before["median_s"] - 1
+        flag = ""
+        if change > threshold:
+            regressions += 1
+            flag = "  REGRESSION"
+        print(f"{name:<36}{before['median_s']:>12.4f}{result['median_s']:>12.4f}{change:>+10.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", default="10k", help="10k, 100k, 1m or a number of books.")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case; the median is reported.")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed runs per case before timing.")
+    parser.add_argument("--only", action="append", default=[], help="Only run cases containing this text.")
+    parser.add_argument("--data-dir", default=str(Path(tempfile.gettempdir()) / "library-bench"),
+                        help="Where generated databases are kept.")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--baseline", help="Compare with the results of an earlier --output.")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Slowdown counted as a regression.")
+    args = parser.parse_args()
+
+    books = resolve_size(args.size)
+    names = [name for name in CASES if not args.only or any(text in name for text in args.only)]
+    if not names:
+        parser.error("No case matches --only.")
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+        if baseline["meta"]["books"] != books:
+            print(f"Warning: the baseline was run with {baseline['meta']['books']:,} books.", file=sys.stderr)
+
+    source = dataset(Path(args.data_dir), books, args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        workdir = Path(directory)
+        shutil.copyfile(source, workdir / "library.db")
+        db = DatabaseManager(db_path=str(workdir / "library.db"))
+        try:
+            print(f"{'case':<36}{'ops':>10}{'best s':>10}{'median s':>10}{'us/op':>12}")
+            results = run(Environment(db, books, workdir, args.seed), names, args.repeat, args.warmup)
+        finally:
+            db.close_connection()
+
+    report = {
+        "meta": {
+            "books": books,
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    if baseline is not None and compare(results, baseline, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Generates deterministic synthetic library databases for the benchmarks.
+
+The same size and seed always produce the same books, people and loans, so
+results from different runs and commits are comparable. For a catalog of N
+books there are N / 10 people and N / 20 authors, and a fifth of the books
+are on loan. Borrowers follow a long-tailed distribution: a few people hold
+many loans, most hold one or two.
+
+Usage:
+    python benchmarks/dataset.py --size 100k --output library-100k.db
+"""
+import argparse
+import csv
+import random
+from datetime import date, timedelta
+from typing import Iterator, Tuple
+
+from library.data.database_manager import DatabaseManager
+from library.data.loan_repository import to_epoch_day
+from library.data.person_repository import phone_digits
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+DEFAULT_SEED = 20240101
+# Loans are dated relative to this day, so overdue queries are repeatable
+AS_OF = date(2025, 6, 1)
+LOAN_DAYS = 14
+
+FIRST_NAMES = (
+    "Ada", "Alan", "Amara", "Ana", "Ben", "Carla", "Chen", "Dara", "David", "Elena", "Emil", "Fatima",
+    "Grace", "Hana", "Ivan", "Jonas", "Kai", "Lena", "Luis", "Maya", "Mateo", "Nina", "Omar", "Priya",
+    "Quinn", "Rosa", "Sami", "Sofia", "Tomas", "Uma", "Victor", "Wen", "Yara", "Zoe",
+)
+LAST_NAMES = (
+    "Almeida", "Bauer", "Costa", "Dubois", "Evans", "Fischer", "Garcia", "Hughes", "Ito", "Jensen",
+    "Kowalski", "Lopez", "Moreau", "Nakamura", "Okafor", "Petrov", "Quinn", "Rossi", "Silva", "Tanaka",
+    "Ueda", "Varga", "Weber", "Xu", "Yilmaz", "Zhang",
+)
+TITLE_ADJECTIVES = (
+    "Silent", "Broken", "Golden", "Hidden", "Last", "Lost", "Midnight", "Northern", "Red", "Secret",
+    "Shattered", "Distant", "Burning", "Quiet", "Endless", "Winter", "Wild", "Forgotten", "Iron", "Glass",
+)
+TITLE_NOUNS = (
+    "Garden", "River", "Empire", "Letters", "Orchard", "Harbor", "Kingdom", "Archive", "Library", "Voyage",
+    "Mountain", "City", "Station", "Machine", "Lighthouse", "Forest", "Mirror", "Island", "Bridge", "Storm",
+)
+TITLE_SUFFIXES = ("", "", "", " of Ash", " of the Sea", " at Dawn", " and Other Stories", ": A Novel", " Returns")
+
+
+def resolve_size(size: str) -> int:
+    """
+    Accepts a named size such as '100k' or a plain number of books.
+    """
+    return SIZES[size.lower()] if size.lower() in SIZES else int(size)
+
+
+def isbn13(n: int) -> str:
+    """
+    Returns a valid ISBN-13 for the number `n`, unique for n < 10**9.
+    """
+    digits = f"978{n:09d}"
+    total = sum(int(digit) * (1 if i % 2 == 0 else 3) for i, digit in enumerate(digits))
+    return digits + str((10 - total % 10) % 10)
+
+
+def generate_books(count: int, seed: int = DEFAULT_SEED) -> Iterator[Tuple[str, str, str]]:
+    """
+    Yields (isbn, title, author) rows.
+    """
+    rng = random.Random(seed)
+    authors = [
+        f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(max(1, count // 20))
+    ]
+    # Sampling authors from a skewed distribution gives a few prolific ones
+    weights = [1 / (rank + 1) for rank in range(len(authors))]
+    for n, author in enumerate(rng.choices(authors, weights, k=count)):
+        title = f"The {rng.choice(TITLE_ADJECTIVES)} {rng.choice(TITLE_NOUNS)}{rng.choice(TITLE_SUFFIXES)}"
+        yield isbn13(n), title, author
+
+
+def generate_people(count: int, seed: int = DEFAULT_SEED) -> Iterator[Tuple[str, str]]:
+    """
+    Yields (name, phone_number) rows with unique names.
+    """
+    rng = random.Random(seed + 1)
+    seen = set()
+    for _ in range(count):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        while name in seen:
+            name = f"{rng.choice(FIRST_NAMES)} {chr(rng.randrange(65, 91))}. {rng.choice(LAST_NAMES)}-{rng.randrange(10_000)}"
+        seen.add(name)
+        yield name, f"+1 555 {rng.randrange(1000):03d} {rng.randrange(10_000):04d}"
+
+
+def generate_loans(books: int, people: int, seed: int = DEFAULT_SEED) -> Iterator[Tuple[int, int, int, int]]:
+    """
+    Yields (book_id, borrower_id, loan_date, due_date) rows for a fifth of
+    the books, with dates as epoch days. About a third are overdue on AS_OF.
+    """
+    rng = random.Random(seed + 2)
+    for book_id in sorted(rng.sample(range(1, books + 1), books // 5)):
+        # Pareto gives a long tail of busy borrowers
+        borrower_id = min(people, int(rng.paretovariate(1.2)))
+        if borrower_id == 1:
+            borrower_id = rng.randrange(1, people + 1)
+        loan_date = AS_OF - timedelta(days=rng.randrange(0, 21))
+        yield book_id, borrower_id, to_epoch_day(loan_date), to_epoch_day(loan_date + timedelta(days=LOAN_DAYS))
+
+
+def populate(db: DatabaseManager, books: int, seed: int = DEFAULT_SEED):
+    """
+    Fills an empty database with `books` books and the matching people and
+    loans, in one transaction.
+    """
+    people = max(1, books // 10)
+    with db.writer() as conn, conn:
+        # Generated ISBNs are already in canonical ISBN-13 form
+        conn.executemany(
+            "INSERT INTO books (isbn, isbn13, title, author, is_available) VALUES (?, ?, ?, ?, 1)",
+            ((isbn, isbn, title, author) for isbn, title, author in generate_books(books, seed)),
+        )
+        conn.executemany(
+            "INSERT INTO people (name, phone_number, phone_digits) VALUES (?, ?, ?)",
+            ((name, phone, phone_digits(phone)) for name, phone in generate_people(people, seed)),
+        )
+        conn.executemany(
+            "INSERT INTO loans (book_id, borrower_id, loan_date, due_date) VALUES (?, ?, ?, ?)",
+            generate_loans(books, people, seed),
+        )
+        conn.execute("UPDATE books SET is_available = 0 WHERE id IN (SELECT book_id FROM loans)")
+
+
+def write_books_csv(path: str, count: int, seed: int = DEFAULT_SEED, first: int = 0):
+    """
+    Writes a CSV file of `count` books for `library books import-csv`, with
+    ISBNs numbered from `first` so it can be made not to collide with a
+    generated catalog.
+    """
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(("title", "author", "isbn"))
+        for n, (_, title, author) in enumerate(generate_books(count, seed)):
+            writer.writerow((title, author, isbn13(first + n)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", default="10k", help=f"One of {', '.join(SIZES)} or a number of books.")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--output", required=True, help="Database file to create.")
+    args = parser.parse_args()
+
+    db = DatabaseManager(db_path=args.output, profile="bulk")
+    try:
+        with db.reader() as conn:
+            if conn.execute("SELECT 1 FROM books LIMIT 1").fetchone():
+                parser.error(f"'{args.output}' already holds books.")
+        populate(db, resolve_size(args.size), args.seed)
+    finally:
+        db.close_connection()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,50 +1,161 @@
+import importlib
 import click
-from .data.database_manager import DatabaseManager
-from .data.book_repository import BookRepository
-from .data.person_repository import PersonRepository
-from .data.loan_repository import LoanRepository
-from .services.book_service import BookService
-from .services.person_service import PersonService
-from .services.loan_service import LoanService
-
-# Import the command groups
-from .commands.book_commands import books
-from .commands.person_commands import people
-from .commands.loan_commands import loans
-
-@click.group()
+from .data.database_manager import DatabaseManager, DEFAULT_POOL_SIZE, DEFAULT_PROFILE, PROFILES
+
+class LazyGroup(click.Group):
+    """
+    A click group whose subcommands are imported the first time they are
+    used, so a command does not pay for importing all the others.
+
+    `lazy_commands` maps command names to 'module:attribute' paths.
+    """
+
+    def __init__(self, *args, lazy_commands=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = dict(lazy_commands or {})
+
+    def list_commands(self, ctx):
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
+
+    def parse_args(self, ctx, args):
+        # Kept to name the command in profiles; click consumes them all
+        ctx.meta['library.args'] = list(args)
+        return super().parse_args(ctx, args)
+
+    def get_command(self, ctx, name):
+        if name not in self.commands and name in self.lazy_commands:
+            module_name, attribute = self.lazy_commands[name].split(':')
+            self.add_command(getattr(importlib.import_module(module_name), attribute), name)
+        return super().get_command(ctx, name)
+
+class LazyObjects(dict):
+    """
+    The objects shared by commands through `ctx.obj`. Each one is built by
+    its factory the first time a command looks it up, so a command only
+    opens the database and builds the services it actually uses.
+    """
+
+    def __init__(self, factories):
+        super().__init__()
+        self._factories = factories
+
+    def __missing__(self, key):
+        if key not in self._factories:
+            raise KeyError(key)
+        value = self[key] = self._factories[key](self)
+        return value
+
+def _factories(db_path: str, db_profile: str, db_pragmas: dict, db_pool_size: int, cache_size: int, tracer=None) -> dict:
+    from .data.cache import EntityCache
+    from .data.book_repository import BookRepository
+    from .data.person_repository import PersonRepository
+    from .data.loan_repository import LoanRepository
+    from .data.import_checkpoint_repository import ImportCheckpointRepository
+    from .data.stats_repository import StatsRepository
+    from .services.book_service import BookService
+    from .services.person_service import PersonService
+    from .services.loan_service import LoanService
+    from .services.import_service import ImportService
+    from .services.stats_service import StatsService
+    from .services.export_service import ExportService
+
+    return {
+        'db_manager': lambda obj: DatabaseManager(
+            db_path=db_path, profile=db_profile, pragmas=db_pragmas, pool_size=db_pool_size, tracer=tracer
+        ),
+        'book_cache': lambda obj: EntityCache(obj['db_manager'], cache_size) if cache_size else None,
+        'person_cache': lambda obj: EntityCache(obj['db_manager'], cache_size) if cache_size else None,
+        'book_repository': lambda obj: BookRepository(obj['db_manager'], obj['book_cache']),
+        'person_repository': lambda obj: PersonRepository(obj['db_manager'], obj['person_cache']),
+        'loan_repository': lambda obj: LoanRepository(obj['db_manager']),
+        'checkpoint_repository': lambda obj: ImportCheckpointRepository(obj['db_manager']),
+        'stats_repository': lambda obj: StatsRepository(obj['db_manager']),
+        'book_service': lambda obj: BookService(obj['book_repository']),
+        'person_service': lambda obj: PersonService(obj['person_repository']),
+        'loan_service': lambda obj: LoanService(obj['loan_repository'], obj['book_repository'], obj['person_repository']),
+        'import_service': lambda obj: ImportService(obj['book_service'], obj['checkpoint_repository']),
+        'stats_service': lambda obj: StatsService(obj['stats_repository']),
+        'export_service': lambda obj: ExportService(
+            obj['book_repository'], obj['person_repository'], obj['loan_repository']
+        ),
+    }
+
+def _parse_pragmas(ctx, param, values):
+    pragmas = {}
+    for value in values:
+        name, separator, setting = value.partition('=')
+        if not separator or not name.strip() or not setting.strip():
+            raise click.BadParameter(f"Expected NAME=VALUE, got '{value}'.")
+        pragmas[name.strip().lower()] = setting.strip()
+    return pragmas
+
+def _echo_sql(statement: str):
+    click.echo(" ".join(statement.split()), err=True)
+
+def _command_line(ctx) -> str:
+    """
+    Returns the subcommand and arguments the group was invoked with.
+    """
+    args = ctx.meta.get('library.args', [])
+    if ctx.invoked_subcommand in args:
+        args = args[args.index(ctx.invoked_subcommand):]
+    return " ".join(args)
+
+@click.group(cls=LazyGroup, lazy_commands={
+    'books': 'library.commands.book_commands:books',
+    'people': 'library.commands.person_commands:people',
+    'loans': 'library.commands.loan_commands:loans',
+    'db': 'library.commands.db_commands:db',
+    'export': 'library.commands.export_commands:export',
+    'serve': 'library.commands.serve_commands:serve',
+    'shell': 'library.commands.shell_commands:shell',
+    'stats': 'library.commands.stats_commands:stats',
+})
 @click.option('--db-path', default=None, help='Path to the database file.')
+@click.option('--db-profile', type=click.Choice(list(PROFILES)), default=DEFAULT_PROFILE, show_default=True,
+              help='SQLite performance profile.')
+@click.option('--db-pragma', 'db_pragmas', multiple=True, callback=_parse_pragmas, metavar='NAME=VALUE',
+              help='Override a PRAGMA of the profile. Can be repeated.')
+@click.option('--db-pool-size', type=click.IntRange(min=1), default=DEFAULT_POOL_SIZE, show_default=True,
+              help='Maximum number of reader connections.')
+@click.option('--cache-size', type=click.IntRange(min=0), default=0, show_default=True,
+              help='Books and people kept in memory per lookup cache; 0 disables it. Useful with serve and shell.')
+@click.option('--profile', is_flag=True,
+              help='Print the SQL statements the command ran, with counts and timings, when it finishes.')
+@click.option('--profile-output', type=click.Path(dir_okay=False), default=None,
+              help='Append a JSON record of the statements the command ran to this file.')
+@click.option('--trace-sql', is_flag=True, help='Print every SQL statement to stderr as it runs.')
 @click.pass_context
-def cli(ctx, db_path: str):
+def cli(ctx, db_path: str, db_profile: str, db_pragmas: dict, db_pool_size: int, cache_size: int,
+        profile: bool, profile_output: str, trace_sql: bool):
     """
     A command-line application to manage your personal library.
     """
-    ctx.ensure_object(dict)
-    
-    # Initialize the DatabaseManager (it's a singleton)
-    db_manager = DatabaseManager(db_path=db_path)
-    
-    # Initialize all repositories
-    book_repo = BookRepository(db_manager)
-    loan_repo = LoanRepository(db_manager)
-    person_repo = PersonRepository(db_manager)
-    
-    # Initialize all services with their repositories
-    book_service = BookService(book_repo)
-    loan_service = LoanService(loan_repo, book_repo, person_repo)
-    person_service = PersonService(person_repo)
-    
-    # Store shared objects in the context for subcommands to access
-    ctx.obj['db_manager'] = db_manager
-    ctx.obj['book_service'] = book_service
-    ctx.obj['person_service'] = person_service
-    ctx.obj['loan_service'] = loan_service
-    # Store other services here
-    
-    # Register the close method to be called when the CLI command finishes
-    ctx.call_on_close(db_manager.close_connection)
-
-# Add the command groups to the main CLI group
-cli.add_command(books)
-cli.add_command(people)
-cli.add_command(loans)
\ No newline at end of file
+    try:
+        DatabaseManager.validate_settings(db_profile, db_pragmas)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="'--db-pragma'")
+
+    # Instrumentation is only set up, and only costs anything, when asked for
+    tracer = profiler = None
+    if profile or profile_output or trace_sql:
+        from .data.tracing import QueryTracer
+        tracer = QueryTracer(echo=_echo_sql if trace_sql else None)
+    if profile or profile_output:
+        from .commands.profiling import Profiler
+        profiler = Profiler(tracer, show=profile, output_file=profile_output)
+
+    # The database, repositories and services are built on first use
+    ctx.obj = LazyObjects(_factories(db_path, db_profile, db_pragmas, db_pool_size, cache_size, tracer))
+    ctx.obj['profiler'] = profiler
+    command_line = _command_line(ctx)
+
+    def close():
+        # Close the database when the command finishes, if it was opened at all
+        if 'db_manager' not in ctx.obj:
+            return
+        ctx.obj['db_manager'].close_connection()
+        if profiler is not None:
+            profiler.report(command_line)
+
+    ctx.call_on_close(close)
@@ -1,11 +1,23 @@
 import click
-import csv
-from rich.console import Console
+import os
+import time
+from library.commands.console import LazyConsole
+from library.commands.output import format_option, write_rows
 
 from ..services.book_service import BookService
+from ..services.import_service import ImportService
 
 # Initialize the rich console for nice output formatting
-console = Console()
+console = LazyConsole()
+
+# Skipped rows beyond this are only counted, so huge imports don't flood the terminal
+MAX_REPORTED_REJECTS = 20
+
+# Columns of the --format outputs of list and search
+BOOK_COLUMNS = ('id', 'title', 'author', 'isbn', 'is_available')
+
+def _book_rows(books):
+    return ((book.id, book.title, book.author, book.isbn, book.is_available) for book in books)
 
 @click.group(invoke_without_command=True)
 @click.pass_context
@@ -35,33 +47,52 @@ def add(ctx, title: str, author: str, isbn: str):
 
 
 @books.command(name='list')
+@click.option('--limit', type=click.IntRange(min=1), default=None, help='Maximum number of books to show.')
+@click.option('--after', 'after_id', type=int, default=None, help='Only show books with an ID greater than this.')
+@format_option
 @click.pass_context
-def list_books(ctx):
+def list_books(ctx, limit: int, after_id: int, fmt: str):
     """
     Lists all books in the library.
     """
     book_service: BookService = ctx.obj['book_service']
-    all_books = book_service.get_all_books()
-
-    if not all_books:
-        console.print("[yellow]No books found. Add some first![/yellow]")
+    books = book_service.iter_books(after_id=after_id, limit=limit)
+    if fmt != 'text':
+        write_rows(fmt, BOOK_COLUMNS, _book_rows(books), "📚 Library Books", "[yellow]No books found. Add some first![/yellow]")
         return
 
-    console.print("\n[bold]📚 Library Books[/bold]")
-    for book in all_books:
+    shown = 0
+    for book in books:
+        if shown == 0:
+            console.print("\n[bold]📚 Library Books[/bold]")
+        shown += 1
         status = "[green]Available[/green]" if book.is_available else "[red]On Loan[/red]"
         console.print(f"  [cyan]ID:[/] {book.id} | [cyan]Title:[/] {book.title} | [cyan]Author:[/] {book.author} | [cyan]ISBN:[/] {book.isbn} | [cyan]Status:[/] {status}")
 
+    if shown == 0:
+        console.print("[yellow]No books found. Add some first![/yellow]")
+    elif shown == limit:
+        console.print(f"[dim]Next page: --after {book.id}[/dim]")
+
 
 @books.command()
 @click.argument('query')
+@click.option('--limit', type=click.IntRange(min=1), default=None, help='Maximum number of results to show.')
+@format_option
 @click.pass_context
-def search(ctx, query: str):
+def search(ctx, query: str, limit: int, fmt: str):
     """
-    Searches for books by title or author.
+    Searches for books by title, author or ISBN.
+
+    Every word must match the start of a word in the book, and the best
+    matches are listed first.
     """
     book_service: BookService = ctx.obj['book_service']
-    results = book_service.search_books(query)
+    results = book_service.search_books(query, limit=limit)
+    if fmt != 'text':
+        write_rows(fmt, BOOK_COLUMNS, _book_rows(results), f"🔍 Search Results for '{query}'",
+                   f"[yellow]No books found matching '{query}'.[/yellow]")
+        return
 
     if not results:
         console.print(f"[yellow]No books found matching '{query}'.[/yellow]")
@@ -94,37 +125,86 @@ def get(ctx, isbn: str):
         console.print(f"[yellow]No book found with ISBN '{isbn}'.[/yellow]")
 
 @books.command()
-@click.argument('csv_file', type=click.Path(exists=True))
+@click.argument('csv_file', type=click.Path(exists=True, dir_okay=False))
+@click.option('--batch-size', default=1000, show_default=True, type=click.IntRange(min=1),
+              help='Number of rows committed per batch.')
+@click.option('--resume', is_flag=True, help='Continue an interrupted import from its last checkpoint.')
 @click.pass_context
-def import_csv(ctx, csv_file: str):
+def import_csv(ctx, csv_file: str, batch_size: int, resume: bool):
     """
     Imports books from a CSV file.
     CSV file must have headers: title, author, isbn
     """
-    book_service = ctx.obj["book_service"]
-    imported_count=0
-    with open(csv_file, mode='r', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
-        
-        console.print(f"[bold]Importing books from '{csv_file}'...[/bold]")
-        
-        for row in reader:
-            try:
-                title = row['title']
-                author = row['author']
-                isbn = row['isbn']
-                
-                book_service.add_new_book(title, author, isbn)
-                imported_count += 1
-                console.print(f"[green]✔[/green] Added '{title}' by {author} with ISBN {isbn}")
-            
-            except KeyError:
-                console.print("[red]Error: Invalid CSV format. Missing one of the required headers (title, author, isbn).[/red]", err=True)
-                return
-            except ValueError as e:
-                console.print(f"[yellow]✖[/yellow] Skipped '{title}': [red]{e}[/red]", err=True)
-            except Exception as e:
-                console.print(f"[red]An unexpected error occurred: {e}[/red]", err=True)
-    
-    console.print(f"\n[bold green]Import complete! Successfully imported {imported_count} book(s).[/bold green]")
+    import_service: ImportService = ctx.obj["import_service"]
+    shown_rejects = 0
+
+    def report_reject(reject):
+        nonlocal shown_rejects
+        if shown_rejects < MAX_REPORTED_REJECTS:
+            progress.console.print(f"[yellow]✖[/yellow] Skipped row {reject.line} ('{reject.title}'): [red]{reject.reason}[/red]")
+        shown_rejects += 1
+
+    console.print(f"[bold]Importing books from '{csv_file}'...[/bold]")
+    checkpoint = import_service.get_checkpoint(csv_file) if resume else None
+    rows_before = checkpoint.row_count if checkpoint else 0
+    if checkpoint:
+        console.print(f"Resuming after row {rows_before}.")
+
+    from rich.progress import BarColumn, DownloadColumn, Progress, TextColumn, TimeRemainingColumn
+
+    progress = Progress(
+        BarColumn(),
+        DownloadColumn(),
+        TextColumn("{task.fields[rows]} rows"),
+        TimeRemainingColumn(),
+        console=console.get_console(),
+        refresh_per_second=4,
+    )
+    started = time.perf_counter()
+    # Only for the import: in the shell the database manager outlives this command
+    with progress, ctx.obj["db_manager"].using_profile('bulk'):
+        task = progress.add_task("import", total=os.path.getsize(csv_file), rows=0)
+        try:
+            result = import_service.import_books_csv(
+                csv_file,
+                batch_size=batch_size,
+                resume=resume,
+                on_progress=lambda checkpoint: progress.update(task, completed=checkpoint.byte_offset, rows=checkpoint.row_count),
+                on_reject=report_reject,
+            )
+        except ValueError as e:
+            console.print(f"[red]Error: {e}[/red]")
+            return
+    elapsed = time.perf_counter() - started
+
+    if shown_rejects > MAX_REPORTED_REJECTS:
+        console.print(f"[yellow]... and {shown_rejects - MAX_REPORTED_REJECTS} more skipped row(s).[/yellow]")
+    rate = (result.row_count - rows_before) / elapsed if elapsed > 0 else 0
+    console.print(f"\n[bold green]Import complete! Successfully imported {result.imported} book(s).[/bold green]")
+    console.print(f"  Rows read: {result.row_count} | Skipped: {result.rejected} | {elapsed:.1f}s ({rate:,.0f} rows/sec)")
 
+@books.command()
+@click.option('--dry-run', is_flag=True, help='Only report what would be merged.')
+@click.pass_context
+def dedupe(ctx, dry_run: bool):
+    """
+    Merges books stored under the same ISBN.
+
+    Books added before ISBNs were validated and made unique may hold one
+    ISBN several times, e.g. as '0-441-01359-7' and '9780441013593'. One
+    book of each ISBN is kept, preferring one on loan, and the others are
+    removed and listed.
+    """
+    book_service: BookService = ctx.obj['book_service']
+    result = book_service.dedupe_books(dry_run=dry_run)
+
+    if not result.duplicate_isbns:
+        console.print("[green]No duplicate books found.[/green]")
+        return
+    verb = "Would remove" if dry_run else "Removed"
+    console.print(f"Found {result.duplicate_isbns:,} ISBN(s) held by more than one book.")
+    console.print(f"[bold green]{verb} {len(result.removed_books):,} duplicate book(s):[/bold green]")
+    for book in result.removed_books:
+        console.print(f"  [cyan]ID:[/] {book.id} | [cyan]Title:[/] {book.title} | [cyan]Author:[/] {book.author} | [cyan]ISBN:[/] {book.isbn}")
+    for isbn in result.conflicts:
+        console.print(f"[yellow]ISBN {isbn} has several copies on loan; return them and run dedupe again.[/yellow]")
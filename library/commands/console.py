@@ -0,0 +1,27 @@
+class LazyConsole:
+    """
+    Stands in for a rich Console, importing rich only when something is
+    first printed. Commands that print nothing never pay for the import.
+
+    `print(..., err=True)` writes to standard error through a second console.
+    """
+
+    def __init__(self):
+        self._stdout = None
+        self._stderr = None
+
+    def get_console(self, err: bool = False):
+        """
+        Returns the underlying rich Console, for APIs that need a real one.
+        """
+        if self._stdout is None:
+            from rich.console import Console
+            self._stdout = Console()
+            self._stderr = Console(stderr=True)
+        return self._stderr if err else self._stdout
+
+    def print(self, *objects, err: bool = False, **kwargs):
+        self.get_console(err).print(*objects, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.get_console(), name)
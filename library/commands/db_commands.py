@@ -0,0 +1,39 @@
+import click
+import sqlite3
+from library.commands.console import LazyConsole
+
+from library.data.database_manager import DatabaseManager, PROFILES
+
+console = LazyConsole()
+
+@click.group()
+def db():
+    """
+    Inspect the library database.
+    """
+
+@db.command()
+@click.pass_context
+def info(ctx):
+    """
+    Shows the database file, the active performance profile and its settings.
+    """
+    db_manager: DatabaseManager = ctx.obj['db_manager']
+    overrides = db_manager.pragma_overrides
+
+    console.print("\n[bold]🗄️  Database[/bold]")
+    console.print(f"  [cyan]Path:[/] {db_manager.db_path}")
+    if db_manager.db_path.exists():
+        console.print(f"  [cyan]Size:[/] {db_manager.db_path.stat().st_size / 1024:,.0f} KiB")
+    console.print(f"  [cyan]SQLite:[/] {sqlite3.sqlite_version}")
+    console.print(f"  [cyan]Schema version:[/] {db_manager.schema_version}")
+    console.print(f"  [cyan]Profile:[/] {db_manager.profile}")
+    console.print(f"  [cyan]Connection pool:[/] 1 writer, up to {db_manager.pool_size} readers")
+
+    console.print("\n[bold]PRAGMA settings[/bold]")
+    for name in PROFILES[db_manager.profile]:
+        source = " [yellow](override)[/yellow]" if name in overrides else ""
+        console.print(f"  [cyan]{name}:[/] {db_manager.get_pragma(name)}{source}")
+    for name in overrides:
+        if name not in PROFILES[db_manager.profile]:
+            console.print(f"  [cyan]{name}:[/] {db_manager.get_pragma(name)} [yellow](override)[/yellow]")
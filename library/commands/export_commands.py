@@ -0,0 +1,26 @@
+import click
+from library.commands.console import LazyConsole
+from library.services.export_service import EXPORT_FORMATS, EXPORT_TABLES, ExportService
+
+console = LazyConsole()
+
+@click.command(name='export')
+@click.option('--output-dir', '-o', type=click.Path(file_okay=False), default='.', show_default=True,
+              help='Directory to write the files to.')
+@click.option('--format', 'fmt', type=click.Choice(EXPORT_FORMATS), default='csv', show_default=True,
+              help='File format: CSV with a header row, or one JSON object per line.')
+@click.option('--gzip', 'compress', is_flag=True, help='Compress the files with gzip.')
+@click.option('--table', 'tables', type=click.Choice(EXPORT_TABLES), multiple=True,
+              help='Table to export. Can be repeated; all tables by default.')
+@click.pass_context
+def export(ctx, output_dir: str, fmt: str, compress: bool, tables):
+    """
+    Exports books, people and loans to files, from one consistent snapshot.
+    """
+    export_service: ExportService = ctx.obj['export_service']
+
+    def report(result):
+        console.print(f"  [green]✔[/green] {result.rows:,} {result.table} → {result.path}")
+
+    console.print(f"[bold]Exporting to '{output_dir}'...[/bold]")
+    export_service.export(output_dir, tables, fmt, compress, on_table=report)
@@ -1,10 +1,22 @@
 import click
-from rich.console import Console
+import csv
+import re
+from datetime import date
+from library.commands.console import LazyConsole
+from library.commands.output import format_option, write_rows
 from library.services.loan_service import LoanService
-from library.services.book_service import BookService
 from library.services.person_service import PersonService
 
-console = Console()
+console = LazyConsole()
+
+# Columns of the --format output of the loan listings
+LOAN_COLUMNS = ('id', 'book_id', 'book_title', 'person_id', 'borrower_name', 'loan_date', 'due_date')
+
+def _loan_rows(loans):
+    return (
+        (loan.id, loan.book_id, loan.book_title, loan.person_id, loan.borrower_name, loan.loan_date, loan.due_date)
+        for loan in loans
+    )
 
 @click.group(invoke_without_command=True)
 @click.pass_context
@@ -53,35 +65,130 @@ def return_book(ctx, book_id: int):
     except ValueError as e:
         console.print(f"[red]Error: {e}[/red]", err=True)
     
+def _read_items(items, csv_file, columns):
+    """
+    Collects the items of a batch command as tuples of ints: from the
+    arguments (a lone '-' reads one item per line from stdin), and from the
+    named columns of a CSV file. Values within an item may be separated by
+    ':', ',' or whitespace.
+    """
+    texts = []
+    for item in items:
+        if item == '-':
+            texts.extend(line for line in click.get_text_stream('stdin') if line.strip())
+        else:
+            texts.append(item)
+
+    parsed = []
+    for text in texts:
+        values = [value for value in re.split(r'[:,\s]+', text.strip()) if value]
+        if len(values) != len(columns) or not all(value.isascii() and value.isdigit() for value in values):
+            raise click.BadParameter(f"Expected {':'.join(columns).upper()}, got '{text.strip()}'.")
+        parsed.append(tuple(int(value) for value in values))
+
+    if csv_file:
+        with open(csv_file, mode='r', encoding='utf-8', newline='') as file:
+            reader = csv.DictReader(file)
+            if not reader.fieldnames or not set(columns) <= set(reader.fieldnames):
+                raise click.BadParameter(f"CSV file must have the headers: {', '.join(columns)}.")
+            for row in reader:
+                try:
+                    parsed.append(tuple(int(row[column]) for column in columns))
+                except ValueError:
+                    raise click.BadParameter(f"Invalid row in CSV file: {row}.")
+    return parsed
+
+
+@loans.command()
+@click.argument('pairs', nargs=-1)
+@click.option('--csv', 'csv_file', type=click.Path(exists=True, dir_okay=False),
+              help='CSV file with the headers book_id, person_id.')
+@click.option('--days', default=14, show_default=True, type=click.IntRange(min=1), help='Loan period in days.')
+@click.pass_context
+def borrow_many(ctx, pairs, csv_file: str, days: int):
+    """
+    Lends many books at once, in a single transaction.
+
+    PAIRS are BOOK_ID:PERSON_ID values. Pass '-' to read one pair per line
+    from stdin, or use --csv.
+    """
+    loan_service: LoanService = ctx.obj['loan_service']
+    requests = _read_items(pairs, csv_file, ('book_id', 'person_id'))
+    if not requests:
+        raise click.UsageError("No BOOK_ID:PERSON_ID pairs given.")
+
+    results = loan_service.lend_books(requests, loan_period_days=days)
+    for result in results:
+        if result.ok:
+            console.print(f"  [green]✔[/green] Book [bold]{result.book_id}[/bold] lent to person [bold]{result.person_id}[/bold] (Loan ID: {result.loan.id}, due {result.loan.due_date.strftime('%Y-%m-%d')})")
+        else:
+            console.print(f"  [red]✖[/red] Book [bold]{result.book_id}[/bold]: [red]{result.error}[/red]")
+    succeeded = sum(result.ok for result in results)
+    console.print(f"\n[bold]Lent {succeeded} of {len(results)} book(s).[/bold]")
+
+
+@loans.command()
+@click.argument('book_ids', nargs=-1)
+@click.option('--csv', 'csv_file', type=click.Path(exists=True, dir_okay=False),
+              help='CSV file with the header book_id.')
+@click.pass_context
+def return_many(ctx, book_ids, csv_file: str):
+    """
+    Returns many books at once, in a single transaction.
+
+    Pass '-' to read one book ID per line from stdin, or use --csv.
+    """
+    loan_service: LoanService = ctx.obj['loan_service']
+    items = _read_items(book_ids, csv_file, ('book_id',))
+    if not items:
+        raise click.UsageError("No book IDs given.")
+
+    results = loan_service.return_books(book_id for book_id, in items)
+    for result in results:
+        if result.ok:
+            console.print(f"  [green]✔[/green] Book [bold]{result.book_id}[/bold] returned")
+        else:
+            console.print(f"  [red]✖[/red] Book [bold]{result.book_id}[/bold]: [red]{result.error}[/red]")
+    succeeded = sum(result.ok for result in results)
+    console.print(f"\n[bold]Returned {succeeded} of {len(results)} book(s).[/bold]")
+
+
 @loans.command(name='list')
+@click.option('--limit', type=click.IntRange(min=1), default=None, help='Maximum number of loans to show.')
+@click.option('--after', 'after_id', type=int, default=None, help='Only show loans with an ID greater than this.')
+@format_option
 @click.pass_context
-def list_loans(ctx):
+def list_loans(ctx, limit: int, after_id: int, fmt: str):
     """
     Lists all current book loans.
     """
     loan_service: LoanService = ctx.obj['loan_service']
-    loans = loan_service.loan_repository.get_all_loans()
-    book_service = ctx.obj['book_service']
-    person_service = ctx.obj['person_service']
-
-    if not loans:
-        console.print("[yellow]No books are currently on loan.[/yellow]")
+    loans = loan_service.iter_loan_views(after_id=after_id, limit=limit)
+    if fmt != 'text':
+        write_rows(fmt, LOAN_COLUMNS, _loan_rows(loans), "Borrowing records 📜",
+                   "[yellow]No books are currently on loan.[/yellow]")
         return
 
-    console.print("\n[bold]Borrowing records[/bold] 📜")
+    shown = 0
     for loan in loans:
-        book = book_service.get_book_by_id(loan.book_id)
-        person = person_service.get_person_by_id(loan.person_id)
-        
-        book_title = book.title if book else "Unknown Book"
-        person_name = person.name if person else "Unknown Person"
-        
+        if shown == 0:
+            console.print("\n[bold]Borrowing records[/bold] 📜")
+        shown += 1
+        book_title = loan.book_title or "Unknown Book"
+        person_name = loan.borrower_name or "Unknown Person"
+
         console.print(f"  [cyan]Loan ID:[/] {loan.id} | [cyan]Book:[/] {book_title} | [cyan]Borrower:[/] {person_name} | [cyan]Due Date:[/] {loan.due_date.strftime('%Y-%m-%d')}")
 
+    if shown == 0:
+        console.print("[yellow]No books are currently on loan.[/yellow]")
+    elif shown == limit:
+        console.print(f"[dim]Next page: --after {loan.id}[/dim]")
+
 @loans.command()
 @click.argument('person_id', type=int)
+@format_option
 @click.pass_context
-def list_by_person(ctx, person_id: int):
+def list_by_person(ctx, person_id: int, fmt: str):
     """
     Lists all loans for a specific person.
     
@@ -89,22 +196,99 @@ def list_by_person(ctx, person_id: int):
         person_id: The ID of the person.
     """
     loan_service: LoanService = ctx.obj['loan_service']
-    book_service = ctx.obj['book_service']
-    person_service = ctx.obj['person_service']
+    person_service: PersonService = ctx.obj['person_service']
 
-    person = person_service.get_person_by_id(person_id)
-    if not person:
-        console.print(f"[red]Error: Person with ID '{person_id}' not found.[/red]", err=True)
+    loans = loan_service.get_loan_views(person_id)
+    if loans:
+        person_name = loans[0].borrower_name
+    else:
+        # Only an empty result needs a second query, to tell the two cases apart
+        person = person_service.get_person_by_id(person_id)
+        if not person:
+            console.print(f"[red]Error: Person with ID '{person_id}' not found.[/red]", err=True)
+            return
+        person_name = person.name
+    no_loans = f"[yellow]{person_name} has no books currently on loan.[/yellow]"
+    if fmt != 'text':
+        write_rows(fmt, LOAN_COLUMNS, _loan_rows(loans), f"Borrowing records for {person_name} 📜", no_loans)
         return
-
-    loans = loan_service.loan_repository.get_loans_by_person_id(person_id)
     if not loans:
-        console.print(f"[yellow]{person.name} has no books currently on loan.[/yellow]")
+        console.print(no_loans)
         return
-    
-    console.print(f"\n[bold]Borrowing records for {person.name}[/bold] 📜")
+
+    console.print(f"\n[bold]Borrowing records for {person_name}[/bold] 📜")
+    for loan in loans:
+        book_title = loan.book_title or "Unknown Book"
+
+        console.print(f"  [cyan]Loan ID:[/] {loan.id} | [cyan]Book:[/] {book_title} | [cyan]Due Date:[/] {loan.due_date.strftime('%Y-%m-%d')}")
+
+
+def _print_by_borrower(loans, as_of, describe_due) -> int:
+    """
+    Prints loan views that arrive grouped by borrower, one heading per
+    borrower, as they are streamed. Returns the number of loans printed.
+    """
+    shown = 0
+    borrower_id = None
     for loan in loans:
-        book = book_service.get_book_by_id(loan.book_id)
-        book_title = book.title if book else "Unknown Book"
-        
-        console.print(f"  [cyan]Loan ID:[/] {loan.id} | [cyan]Book:[/] {book_title} | [cyan]Due Date:[/] {loan.due_date.strftime('%Y-%m-%d')}")
\ No newline at end of file
+        if shown == 0 or loan.person_id != borrower_id:
+            borrower_id = loan.person_id
+            console.print(f"\n[bold]{loan.borrower_name or 'Unknown Person'}[/bold] (ID: {loan.person_id})")
+        shown += 1
+        book_title = loan.book_title or "Unknown Book"
+        console.print(f"  [cyan]Loan ID:[/] {loan.id} | [cyan]Book:[/] {book_title} | [cyan]Due Date:[/] {loan.due_date.strftime('%Y-%m-%d')} | {describe_due((loan.due_date - as_of).days)}")
+    return shown
+
+@loans.command()
+@click.option('--as-of', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Report loans overdue on this date instead of today (YYYY-MM-DD).')
+@format_option
+@click.pass_context
+def overdue(ctx, as_of, fmt: str):
+    """
+    Lists the loans past their due date, grouped by borrower.
+    """
+    loan_service: LoanService = ctx.obj['loan_service']
+    as_of = as_of.date() if as_of else date.today()
+    loans = loan_service.iter_overdue_loan_views(as_of)
+    title = f"⏰ Overdue loans as of {as_of.strftime('%Y-%m-%d')}"
+    if fmt != 'text':
+        write_rows(fmt, LOAN_COLUMNS, _loan_rows(loans), title, "[green]No overdue loans.[/green]")
+        return
+
+    console.print(f"[bold]{title}[/bold]")
+    shown = _print_by_borrower(
+        loans, as_of,
+        lambda days: f"[red]{-days} day(s) overdue[/red]",
+    )
+    if shown == 0:
+        console.print("[green]No overdue loans.[/green]")
+    else:
+        console.print(f"\n[bold]{shown} overdue loan(s).[/bold]")
+
+@loans.command()
+@click.option('--days', type=click.IntRange(min=0), default=7, show_default=True,
+              help='How many days ahead to look.')
+@format_option
+@click.pass_context
+def due_soon(ctx, days: int, fmt: str):
+    """
+    Lists the loans due within the next few days, grouped by borrower.
+    """
+    loan_service: LoanService = ctx.obj['loan_service']
+    today = date.today()
+    loans = loan_service.iter_loan_views_due_soon(days, today)
+    title = f"📅 Loans due in the next {days} day(s)"
+    if fmt != 'text':
+        write_rows(fmt, LOAN_COLUMNS, _loan_rows(loans), title, "[green]No loans are due soon.[/green]")
+        return
+
+    console.print(f"[bold]{title}[/bold]")
+    shown = _print_by_borrower(
+        loans, today,
+        lambda days_left: "[yellow]due today[/yellow]" if days_left == 0 else f"due in {days_left} day(s)",
+    )
+    if shown == 0:
+        console.print("[green]No loans are due soon.[/green]")
+    else:
+        console.print(f"\n[bold]{shown} loan(s) due soon.[/bold]")
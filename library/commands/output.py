@@ -0,0 +1,121 @@
+import csv
+import json
+import os
+import sys
+from datetime import date
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Sequence
+
+import click
+from library.commands.console import LazyConsole
+
+console = LazyConsole()
+
+# Formats of the listing commands. 'text' is the styled per-row output;
+# 'table' renders rich tables; the rest are written straight to stdout.
+OUTPUT_FORMATS = ('text', 'table', 'tsv', 'csv', 'jsonl')
+MACHINE_FORMATS = ('tsv', 'csv', 'jsonl')
+# Rows formatted per write to stdout in the machine formats
+WRITE_CHUNK_ROWS = 500
+# Rows per rich table in the 'table' format, which renders a table at once
+TABLE_CHUNK_ROWS = 1000
+
+# Tabs and line breaks inside TSV values are escaped so every row stays one line
+_TSV_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+def format_option(command):
+    """
+    Adds the shared `--format` option to a listing command.
+    """
+    return click.option(
+        '--format', 'fmt', type=click.Choice(OUTPUT_FORMATS), default='text', show_default=True,
+        help='Output format. tsv, csv and jsonl skip styling and are meant for piping.',
+    )(command)
+
+def _chunks(rows: Iterable[tuple], size: int) -> Iterator[List[tuple]]:
+    rows = iter(rows)
+    return iter(lambda: list(islice(rows, size)), [])
+
+def _text(value) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+def _json_value(value):
+    return value.isoformat() if isinstance(value, date) else value
+
+def write_rows(
+    fmt: str,
+    columns: Sequence[str],
+    rows: Iterable[tuple],
+    title: Optional[str] = None,
+    empty_message: Optional[str] = None,
+) -> int:
+    """
+    Writes the rows of a listing in a format other than 'text' and returns
+    how many there were.
+
+    The machine formats are formatted WRITE_CHUNK_ROWS at a time and written
+    to stdout without rich, so output keeps up with the query. 'table' shows
+    `title` and renders rich tables of TABLE_CHUNK_ROWS rows, or prints
+    `empty_message` when there are no rows.
+    """
+    if fmt == 'table':
+        return _write_tables(columns, rows, title, empty_message)
+
+    out = sys.stdout
+    count = 0
+    try:
+        if fmt == 'csv':
+            writer = csv.writer(out, lineterminator='\n')
+            writer.writerow(columns)
+            for chunk in _chunks(rows, WRITE_CHUNK_ROWS):
+                writer.writerows([_text(value) for value in row] for row in chunk)
+                count += len(chunk)
+        elif fmt == 'tsv':
+            out.write('\t'.join(columns) + '\n')
+            for chunk in _chunks(rows, WRITE_CHUNK_ROWS):
+                out.write(''.join(
+                    '\t'.join(_text(value).translate(_TSV_ESCAPES) for value in row) + '\n' for row in chunk
+                ))
+                count += len(chunk)
+        elif fmt == 'jsonl':
+            encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+            for chunk in _chunks(rows, WRITE_CHUNK_ROWS):
+                out.write(''.join(
+                    encode({column: _json_value(value) for column, value in zip(columns, row)}) + '\n'
+                    for row in chunk
+                ))
+                count += len(chunk)
+        else:
+            raise ValueError(f"Unknown output format '{fmt}'.")
+        out.flush()
+    except BrokenPipeError:
+        # The reader went away, as with `| head`. Point stdout at devnull so
+        # the interpreter's final flush does not fail again.
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        os.close(devnull)
+    return count
+
+def _write_tables(columns: Sequence[str], rows: Iterable[tuple], title: Optional[str], empty_message: Optional[str]) -> int:
+    from rich.table import Table
+    from rich.text import Text
+
+    count = 0
+    for chunk in _chunks(rows, TABLE_CHUNK_ROWS):
+        table = Table(title=title if count == 0 else None, show_header=count == 0, header_style='bold cyan')
+        for column in columns:
+            table.add_column(column)
+        for row in chunk:
+            # Text cells are not parsed as markup, so titles with [brackets] show as they are
+            table.add_row(*(Text(_text(value)) for value in row))
+        console.print(table)
+        count += len(chunk)
+    if count == 0 and empty_message:
+        console.print(empty_message)
+    return count
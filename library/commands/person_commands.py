@@ -1,8 +1,15 @@
 import click
-from rich.console import Console
-from library.services.person_service import PersonService
+from library.commands.console import LazyConsole
+from library.commands.output import format_option, write_rows
+from library.services.person_service import DEFAULT_SEARCH_LIMIT, PersonService
 
-console = Console()
+console = LazyConsole()
+
+# Columns of the --format outputs of list and search
+PERSON_COLUMNS = ('id', 'name', 'phone_number')
+
+def _person_rows(people):
+    return ((person.id, person.name, person.phone_number) for person in people)
 
 @click.group(invoke_without_command=True)
 @click.pass_context
@@ -29,22 +36,33 @@ def add(ctx, name: str, phone_number: str):
         console.print(f"[red]Error: {e}[/red]", err=True)
 
 @people.command(name='list')
+@click.option('--limit', type=click.IntRange(min=1), default=None, help='Maximum number of people to show.')
+@click.option('--after', 'after_id', type=int, default=None, help='Only show people with an ID greater than this.')
+@format_option
 @click.pass_context
-def list_people(ctx):
+def list_people(ctx, limit: int, after_id: int, fmt: str):
     """
     Lists all people in the library.
     """
     person_service: PersonService = ctx.obj['person_service']
-    all_people = person_service.get_all_people()
-
-    if not all_people:
-        console.print("[yellow]No people registered. Add some first![/yellow]")
+    people = person_service.iter_people(after_id=after_id, limit=limit)
+    if fmt != 'text':
+        write_rows(fmt, PERSON_COLUMNS, _person_rows(people), "👥 Registered People",
+                   "[yellow]No people registered. Add some first![/yellow]")
         return
 
-    console.print("\n[bold]👥 Registered People[/bold]")
-    for person in all_people:
+    shown = 0
+    for person in people:
+        if shown == 0:
+            console.print("\n[bold]👥 Registered People[/bold]")
+        shown += 1
         console.print(f"  [cyan]ID:[/] {person.id} | [cyan]Name:[/] {person.name} | [cyan]Phone:[/] {person.phone_number}")
 
+    if shown == 0:
+        console.print("[yellow]No people registered. Add some first![/yellow]")
+    elif shown == limit:
+        console.print(f"[dim]Next page: --after {person.id}[/dim]")
+
 
 @people.command()
 @click.argument('name')
@@ -88,13 +106,23 @@ def edit(ctx, old_name: str, new_name: str, new_phone: str):
 
 @people.command()
 @click.argument('query')
+@click.option('--limit', type=click.IntRange(min=1), default=DEFAULT_SEARCH_LIMIT, show_default=True,
+              help='Maximum number of results to show.')
+@format_option
 @click.pass_context
-def search(ctx, query: str):
+def search(ctx, query: str, limit: int, fmt: str):
     """
     Searches for people by name or phone number.
+
+    Names match on any part of them and tolerate small typos; phone numbers
+    match on their digits, whatever the formatting.
     """
     person_service: PersonService = ctx.obj['person_service']
-    results = person_service.search_people(query)
+    results = person_service.search_people(query, limit=limit)
+    if fmt != 'text':
+        write_rows(fmt, PERSON_COLUMNS, _person_rows(results), f"🔍 Search Results for '{query}'",
+                   f"[yellow]No people found matching '{query}'.[/yellow]")
+        return
 
     if not results:
         console.print(f"[yellow]No people found matching '{query}'.[/yellow]")
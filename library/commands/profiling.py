@@ -0,0 +1,71 @@
+import json
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from library.commands.console import LazyConsole
+from library.data.tracing import QueryTracer
+
+console = LazyConsole()
+
+# Statements listed in the summary; the JSON records hold all of them
+SUMMARY_STATEMENTS = 15
+# Width left to the figures of each summary row
+FIGURES_WIDTH = 50
+
+class Profiler:
+    """
+    Reports what a QueryTracer collected while a command ran: a summary
+    table on stderr with `show`, and a JSON record appended to
+    `output_file` (one per line) if given.
+    """
+
+    def __init__(self, tracer: QueryTracer, show: bool = True, output_file: Optional[str] = None):
+        self.tracer = tracer
+        self.show = show
+        self.output_file = output_file
+
+    def report(self, command: str):
+        """
+        Reports the statements run since the last report, then starts over.
+        """
+        statements = self.tracer.statements()
+        elapsed = time.perf_counter() - self.tracer.started
+        self.tracer.reset()
+        if self.show:
+            self._print(command, statements, elapsed)
+        if self.output_file:
+            record = {
+                'command': command,
+                'finished': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+                'elapsed_ms': round(elapsed * 1000, 3),
+                'statements': [entry.as_dict() for entry in statements],
+            }
+            with open(self.output_file, 'a', encoding='utf-8') as file:
+                file.write(json.dumps(record) + '\n')
+
+    @staticmethod
+    def _print(command: str, statements, elapsed: float):
+        from rich.table import Table
+        from rich.text import Text
+
+        executions = sum(entry.count for entry in statements)
+        database_s = sum(entry.total_s for entry in statements)
+        table = Table(
+            title=f"Profile of '{command}'",
+            caption=f"{executions} executions of {len(statements)} statements, "
+                    f"{database_s * 1000:.1f} ms in SQLite of {elapsed * 1000:.1f} ms",
+            header_style='bold cyan',
+        )
+        width = max(20, console.get_console(err=True).width - FIGURES_WIDTH)
+        table.add_column('statement', overflow='ellipsis', no_wrap=True, max_width=width)
+        for column in ('count', 'rows', 'total ms', 'mean ms', 'max ms'):
+            table.add_column(column, justify='right', no_wrap=True)
+        for entry in statements[:SUMMARY_STATEMENTS]:
+            table.add_row(
+                Text(entry.statement), str(entry.count), str(entry.rows), f"{entry.total_s * 1000:.2f}",
+                f"{entry.mean_s * 1000:.3f}", f"{entry.max_s * 1000:.2f}",
+            )
+        if len(statements) > SUMMARY_STATEMENTS:
+            table.add_row(Text(f"... {len(statements) - SUMMARY_STATEMENTS} more"), '', '', '', '', '')
+        console.print(table, err=True)
@@ -0,0 +1,63 @@
+import click
+from library.commands.console import LazyConsole
+
+console = LazyConsole()
+
+@click.command()
+@click.option('--host', default='127.0.0.1', show_default=True, help='Address to listen on.')
+@click.option('--port', type=int, default=8080, show_default=True, help='Port to listen on.')
+@click.option('--workers', type=click.IntRange(min=1), default=8, show_default=True,
+              help='Number of worker threads answering requests.')
+@click.option('--verbose', is_flag=True, help='Log every request.')
+@click.pass_context
+def serve(ctx, host: str, port: int, workers: int, verbose: bool):
+    """
+    Serves the library over a local HTTP/JSON API until interrupted.
+
+    The database connections stay open for the life of the server, so each
+    request only pays for its own queries. GET /metrics reports the request
+    latency percentiles of every route, and the counters of the lookup
+    caches when --cache-size is set; both are also printed on shutdown.
+    """
+    from library.server import LibraryAPI, LibraryServer
+
+    api = LibraryAPI(ctx.obj['book_service'], ctx.obj['person_service'], ctx.obj['loan_service'])
+    caches = {
+        name: ctx.obj[f'{name}_cache'] for name in ('book', 'person') if ctx.obj[f'{name}_cache'] is not None
+    }
+    try:
+        server = LibraryServer((host, port), api, workers=workers, verbose=verbose, caches=caches)
+    except OSError as e:
+        console.print(f"[red]Error: Cannot listen on {host}:{port}: {e}[/red]")
+        ctx.exit(1)
+
+    console.print(f"[green]Serving the library on [bold]http://{host}:{server.server_port}[/bold] "
+                  f"with {workers} workers. Press Ctrl+C to stop.[/green]")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+    from rich.table import Table
+
+    for name, cache in caches.items():
+        stats = cache.stats
+        console.print(f"[cyan]{name.capitalize()} cache:[/] {stats.hits} hits, {stats.misses} misses "
+                      f"({stats.hit_rate:.0%}), {stats.evictions} evictions, {stats.invalidations} invalidations")
+
+    summary = server.stats.summary()
+    if not summary:
+        return
+
+    table = Table(title="Request latency (ms)")
+    table.add_column("Route", style="cyan")
+    for column in ("Requests", "p50", "p90", "p99", "Max"):
+        table.add_column(column, justify="right")
+    for route, stats in summary.items():
+        table.add_row(
+            route, str(stats['count']),
+            *(f"{stats[key]:.3f}" for key in ('p50_ms', 'p90_ms', 'p99_ms', 'max_ms'))
+        )
+    console.print(table)
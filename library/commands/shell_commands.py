@@ -0,0 +1,19 @@
+import click
+from pathlib import Path
+
+from library.shell import LibraryShell
+
+HISTORY_FILE = Path.home() / '.library' / 'shell_history'
+
+@click.command()
+@click.option('--timing', is_flag=True, help='Print how long each command took.')
+@click.pass_context
+def shell(ctx, timing: bool):
+    """
+    Starts an interactive shell that runs library commands in-process.
+
+    The database and services are set up once for the whole session, with
+    command history and Tab completion of book titles and person names.
+    """
+    HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
+    LibraryShell(ctx.find_root().command, ctx.obj, history_file=HISTORY_FILE, timing=timing).cmdloop()
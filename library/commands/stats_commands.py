@@ -0,0 +1,36 @@
+import click
+from library.commands.console import LazyConsole
+from library.services.stats_service import StatsService
+
+console = LazyConsole()
+
+@click.command()
+@click.option('--top', type=click.IntRange(min=1), default=10, show_default=True,
+              help='Number of authors and borrowers to show.')
+@click.pass_context
+def stats(ctx, top: int):
+    """
+    Shows catalog and circulation statistics.
+    """
+    stats_service: StatsService = ctx.obj['stats_service']
+
+    summary = stats_service.get_summary()
+    console.print("\n[bold]📊 Library statistics[/bold]")
+    console.print(f"  [cyan]Books:[/] {summary.total_books:,}")
+    console.print(f"  [cyan]On loan:[/] {summary.books_on_loan:,}")
+    console.print(f"  [cyan]Available:[/] {summary.available_books:,} ({summary.availability_ratio:.1%})")
+
+    authors = stats_service.get_books_per_author(top)
+    if authors:
+        console.print(f"\n[bold]Books per author[/bold] (top {top})")
+        for entry in authors:
+            console.print(f"  [cyan]{entry.author}:[/] {entry.books:,}")
+
+    borrowers = stats_service.get_busiest_borrowers(top)
+    if borrowers:
+        console.print(f"\n[bold]Busiest borrowers[/bold] (top {top})")
+        for entry in borrowers:
+            name = entry.name or "Unknown Person"
+            console.print(f"  [cyan]{name}[/] (ID: {entry.person_id}): {entry.active_loans:,} on loan")
+    else:
+        console.print("\n[yellow]No books are currently on loan.[/yellow]")
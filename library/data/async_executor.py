@@ -0,0 +1,82 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Iterator, Optional, TypeVar
+
+T = TypeVar('T')
+
+DEFAULT_MAX_PENDING = 256
+
+class AsyncExecutor:
+    """
+    Runs blocking SQLite work off the event loop on a dedicated thread pool.
+
+    At most `max_pending` calls are queued or running at once; further
+    callers wait on the event loop until a slot frees up, so a burst of
+    requests cannot pile up unbounded work behind the database. Each worker
+    thread checks out its own pooled connection, so reads run concurrently.
+    Size `max_workers` to the connection pool: extra threads would only wait
+    for a reader.
+    """
+
+    def __init__(self, max_workers: int = 4, max_pending: int = DEFAULT_MAX_PENDING):
+        if max_workers < 1:
+            raise ValueError("An executor needs at least one worker.")
+        if max_pending < max_workers:
+            raise ValueError("max_pending must be at least max_workers.")
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='library-db')
+        self._max_pending = max_pending
+        # One semaphore per event loop: asyncio primitives are bound to the
+        # loop they are first used on. Semaphores of closed loops are dropped
+        # when the next loop gets one.
+        self._slots = {}
+
+    @property
+    def max_pending(self) -> int:
+        return self._max_pending
+
+    def _semaphore(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        semaphore = self._slots.get(loop)
+        if semaphore is None:
+            # A semaphore holds on to its loop, so weak keys would not free either
+            for closed in [other for other in self._slots if other.is_closed()]:
+                del self._slots[closed]
+            semaphore = self._slots[loop] = asyncio.Semaphore(self._max_pending)
+        return semaphore
+
+    async def run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """
+        Calls `func(*args, **kwargs)` on a worker thread and returns its
+        result. Exceptions are raised in the awaiting coroutine unchanged.
+        """
+        loop = asyncio.get_running_loop()
+        async with self._semaphore(loop):
+            return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def iter_pages(
+        self,
+        fetch: Callable[[Optional[int], int], Iterator[T]],
+        after_id: Optional[int] = None,
+        limit: Optional[int] = None,
+        page_size: int = 500,
+    ) -> AsyncIterator[T]:
+        """
+        Streams a keyset-paginated listing without holding a connection
+        between pages: each page is read on a worker thread with
+        `fetch(after_id, page_size)` and the next page starts after the last
+        `id` seen.
+        """
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = page_size if remaining is None else min(page_size, remaining)
+            page = await self.run(lambda: list(fetch(after_id, size)))
+            for item in page:
+                yield item
+            if len(page) < size:
+                return
+            after_id = page[-1].id
+            if remaining is not None:
+                remaining -= len(page)
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,170 @@
+from datetime import date
+from typing import AsyncIterator, Iterable, List, Optional, Tuple
+
+from library.models.models import Book, CirculationResult, DedupeResult, ImportCheckpoint, Loan, LoanView, Person
+from library.data.async_executor import AsyncExecutor
+from library.data.book_repository import BookRepository
+from library.data.import_checkpoint_repository import ImportCheckpointRepository
+from library.data.loan_repository import LoanRepository
+from library.data.person_repository import PersonRepository
+
+class AsyncBookRepository:
+    """
+    Awaitable counterpart of BookRepository. Every call runs the synchronous
+    repository on the executor, with the same arguments, results and errors.
+    """
+
+    def __init__(self, repository: BookRepository, executor: AsyncExecutor):
+        self.repository = repository
+        self.executor = executor
+
+    async def add_book(self, book: Book) -> Book:
+        return await self.executor.run(self.repository.add_book, book)
+
+    async def add_books(self, books: Iterable[Book], batch_size: int = 1000) -> List[Tuple[int, Book]]:
+        return await self.executor.run(self.repository.add_books, list(books), batch_size)
+
+    async def get_book_by_id(self, book_id: int) -> Book:
+        return await self.executor.run(self.repository.get_book_by_id, book_id)
+
+    async def get_book_by_isbn(self, isbn: str) -> Book:
+        return await self.executor.run(self.repository.get_book_by_isbn, isbn)
+
+    async def search_books(self, search_term: str, limit: Optional[int] = None) -> List[Book]:
+        return await self.executor.run(self.repository.search_books, search_term, limit)
+
+    async def update_book_availability(self, book_id: int, is_available: bool):
+        await self.executor.run(self.repository.update_book_availability, book_id, is_available)
+
+    async def get_all_books(self) -> List[Book]:
+        return await self.executor.run(self.repository.get_all_books)
+
+    def iter_books(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> AsyncIterator[Book]:
+        """
+        Streams books in ID order, one page per executor call.
+        """
+        return self.executor.iter_pages(self.repository.iter_books, after_id, limit)
+
+    async def merge_duplicate_books(self, dry_run: bool = False) -> DedupeResult:
+        return await self.executor.run(self.repository.merge_duplicate_books, dry_run)
+
+
+class AsyncPersonRepository:
+    """
+    Awaitable counterpart of PersonRepository.
+    """
+
+    def __init__(self, repository: PersonRepository, executor: AsyncExecutor):
+        self.repository = repository
+        self.executor = executor
+
+    async def add_person(self, person: Person) -> Person:
+        return await self.executor.run(self.repository.add_person, person)
+
+    async def get_person_by_id(self, person_id: int) -> Person:
+        return await self.executor.run(self.repository.get_person_by_id, person_id)
+
+    async def get_person_by_name(self, name: str) -> Person:
+        return await self.executor.run(self.repository.get_person_by_name, name)
+
+    async def update_person(self, person_id: int, new_name: str = None, new_phone_number: str = None):
+        await self.executor.run(self.repository.update_person, person_id, new_name, new_phone_number)
+
+    async def get_all_people(self) -> List[Person]:
+        return await self.executor.run(self.repository.get_all_people)
+
+    def iter_people(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> AsyncIterator[Person]:
+        return self.executor.iter_pages(self.repository.iter_people, after_id, limit)
+
+    async def search_people(self, search_term: str, limit: int) -> List[Person]:
+        return await self.executor.run(self.repository.search_people, search_term, limit)
+
+
+class AsyncLoanRepository:
+    """
+    Awaitable counterpart of LoanRepository. Lending and returning keep
+    their single-transaction guarantees, since each call runs whole on one
+    worker thread.
+    """
+
+    def __init__(self, repository: LoanRepository, executor: AsyncExecutor):
+        self.repository = repository
+        self.executor = executor
+
+    async def add_loan(self, loan: Loan) -> Loan:
+        return await self.executor.run(self.repository.add_loan, loan)
+
+    async def get_loan_by_id(self, loan_id: int) -> Loan:
+        return await self.executor.run(self.repository.get_loan_by_id, loan_id)
+
+    async def get_loan_by_book_id(self, book_id: int) -> Loan:
+        return await self.executor.run(self.repository.get_loan_by_book_id, book_id)
+
+    async def get_loans_by_person_id(self, person_id: int) -> List[Loan]:
+        return await self.executor.run(self.repository.get_loans_by_person_id, person_id)
+
+    async def get_all_loans(self) -> List[Loan]:
+        return await self.executor.run(self.repository.get_all_loans)
+
+    def iter_loans(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> AsyncIterator[Loan]:
+        return self.executor.iter_pages(self.repository.iter_loans, after_id, limit)
+
+    async def get_loan_views(self, person_id: Optional[int] = None) -> List[LoanView]:
+        return await self.executor.run(self.repository.get_loan_views, person_id)
+
+    def iter_loan_views(
+        self, person_id: Optional[int] = None, after_id: Optional[int] = None, limit: Optional[int] = None
+    ) -> AsyncIterator[LoanView]:
+        return self.executor.iter_pages(
+            lambda after, size: self.repository.iter_loan_views(person_id, after, size), after_id, limit
+        )
+
+    async def get_overdue_loans(self, as_of: date) -> List[Loan]:
+        return await self.executor.run(self.repository.get_overdue_loans, as_of)
+
+    async def get_due_between(self, start: Optional[date], end: Optional[date]) -> List[Loan]:
+        return await self.executor.run(self.repository.get_due_between, start, end)
+
+    async def iter_loan_views_due(self, start: Optional[date], end: Optional[date]) -> AsyncIterator[LoanView]:
+        """
+        Yields the loan views due in a range. They are ordered by borrower,
+        not ID, so they are read in one executor call rather than by page.
+        """
+        for view in await self.executor.run(lambda: list(self.repository.iter_loan_views_due(start, end))):
+            yield view
+
+    async def lend_book(self, book_id: int, person_id: int, loan_date: date, due_date: date) -> Loan:
+        return await self.executor.run(self.repository.lend_book, book_id, person_id, loan_date, due_date)
+
+    async def return_book(self, book_id: int):
+        await self.executor.run(self.repository.return_book, book_id)
+
+    async def lend_books(
+        self, requests: Iterable[Tuple[int, int]], loan_date: date, due_date: date
+    ) -> List[CirculationResult]:
+        return await self.executor.run(self.repository.lend_books, list(requests), loan_date, due_date)
+
+    async def return_books(self, book_ids: Iterable[int]) -> List[CirculationResult]:
+        return await self.executor.run(self.repository.return_books, list(book_ids))
+
+    async def remove_loan_by_book_id(self, book_id: int):
+        await self.executor.run(self.repository.remove_loan_by_book_id, book_id)
+
+
+class AsyncImportCheckpointRepository:
+    """
+    Awaitable counterpart of ImportCheckpointRepository.
+    """
+
+    def __init__(self, repository: ImportCheckpointRepository, executor: AsyncExecutor):
+        self.repository = repository
+        self.executor = executor
+
+    async def get_checkpoint(self, source: str) -> Optional[ImportCheckpoint]:
+        return await self.executor.run(self.repository.get_checkpoint, source)
+
+    async def save_checkpoint(self, checkpoint: ImportCheckpoint):
+        await self.executor.run(self.repository.save_checkpoint, checkpoint)
+
+    async def remove_checkpoint(self, source: str):
+        await self.executor.run(self.repository.remove_checkpoint, source)
@@ -1,11 +1,186 @@
 import sqlite3
+from contextlib import contextmanager
+from typing import Callable, ContextManager, Iterator, Optional, Sequence, Tuple
 from .database_manager import DatabaseManager
+from .cache import EntityCache
+
+# Rows pulled from SQLite per fetchmany() call when streaming results
+FETCH_SIZE = 500
+# Values bound per "IN (...)" list, well below SQLITE_MAX_VARIABLE_NUMBER on older builds
+MAX_IN_VALUES = 500
+
+def _plain_row(cursor: sqlite3.Cursor, row: tuple) -> tuple:
+    return row
 
 class BaseRepository:
-    def __init__(self, db_manager: DatabaseManager):
+    # The columns read into models, in the order `_row_factory` expects them
+    _columns: Tuple[str, ...] = ()
+    # The column names written by exports, and the SELECT producing them
+    export_columns: Tuple[str, ...] = ()
+    _export_select: str = ""
+
+    def __init__(self, db_manager: DatabaseManager, cache: Optional[EntityCache] = None):
+        # The schema is created and upgraded by DatabaseManager (see
+        # migrations.py), so building a repository touches no connection.
         self._db_manager = db_manager
-        self.conn = self._db_manager.connection
-        self._create_tables()
+        self._cache = cache
+
+    @property
+    def cache(self) -> Optional[EntityCache]:
+        return self._cache
+
+    def _cached(self, key: Tuple, load: Callable):
+        """
+        Returns the model for a lookup `key` from the cache, if the
+        repository has one, or from `load`.
+        """
+        if self._cache is None:
+            return load()
+        return self._cache.get(key, load)
+
+    def _invalidate_cache(self):
+        if self._cache is not None:
+            self._cache.clear()
+
+    def snapshot(self) -> ContextManager[sqlite3.Connection]:
+        """
+        Runs the block in one read transaction; see DatabaseManager.snapshot.
+        """
+        return self._db_manager.snapshot()
+
+    def transaction(self) -> ContextManager[sqlite3.Connection]:
+        """
+        Runs the block in one write transaction; see DatabaseManager.transaction.
+        """
+        return self._db_manager.transaction()
+
+    def iter_export_rows(self) -> Iterator[tuple]:
+        """
+        Streams every row of the repository's table in ID order as a plain
+        tuple of `export_columns`, skipping the cost of building models.
+        """
+        if not self._export_select:
+            raise NotImplementedError(f"{type(self).__name__} does not support exports.")
+        return self._iter_rows(f"{self._export_select} ORDER BY id", (), _plain_row)
+
+    def _read(self) -> ContextManager[sqlite3.Connection]:
+        """
+        Checks out a reader connection for the duration of the block.
+        """
+        return self._db_manager.reader()
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        """
+        Checks out the writer connection and runs the block in a transaction
+        that is committed at the end, or rolled back on error. Inside
+        `transaction()` the block joins that transaction instead.
+        """
+        with self._db_manager.writer() as conn:
+            try:
+                if conn.in_transaction:
+                    yield conn
+                else:
+                    with conn:
+                        yield conn
+            finally:
+                self._invalidate_cache()
+
+    @contextmanager
+    def _immediate_transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Runs the block in a `BEGIN IMMEDIATE` transaction, committed once at
+        the end or rolled back on error. The write lock is taken up front, so
+        a concurrent writer waits instead of interleaving with the block.
+        Inside `transaction()` the block joins that transaction instead.
+        """
+        try:
+            with self._db_manager.transaction() as conn:
+                yield conn
+        finally:
+            self._invalidate_cache()
+
+    def _select_in(self, conn: sqlite3.Connection, query: str, values: Sequence) -> Iterator[sqlite3.Row]:
+        """
+        Runs `query` once per chunk of `values`, replacing its `{}` with the
+        chunk's placeholders, and yields the rows of every chunk.
+        """
+        values = list(values)
+        for start in range(0, len(values), MAX_IN_VALUES):
+            chunk = values[start:start + MAX_IN_VALUES]
+            placeholders = ", ".join("?" * len(chunk))
+            yield from conn.execute(query.format(placeholders), chunk)
+
+    @staticmethod
+    def _row_factory(cursor: sqlite3.Cursor, row: tuple):
+        """
+        Builds a model from a row of `_columns` values. Rows are plain tuples,
+        so models are built positionally instead of by column name.
+        """
+        raise NotImplementedError("Subclasses must implement the _row_factory method.")
+
+    @classmethod
+    def _select_list(cls, table: Optional[str] = None) -> str:
+        """
+        Returns `_columns` as a SELECT list, qualified with `table` if given.
+        """
+        prefix = f"{table}." if table else ""
+        return ", ".join(prefix + column for column in cls._columns)
+
+    def _query(
+        self, conn: sqlite3.Connection, query: str, params: Sequence = (), row_factory: Optional[Callable] = None
+    ) -> sqlite3.Cursor:
+        """
+        Runs a query on `conn` whose rows are turned into models by
+        `row_factory`, which defaults to the repository's own `_row_factory`.
+        """
+        cursor = conn.cursor()
+        cursor.row_factory = row_factory or self._row_factory
+        return cursor.execute(query, params)
+
+    def _iter_rows(self, query: str, params: Sequence = (), row_factory: Optional[Callable] = None) -> Iterator:
+        """
+        Runs a query and yields its models, fetching FETCH_SIZE rows at a time
+        so memory use does not grow with the size of the result.
+        """
+        with self._read() as conn:
+            cursor = self._query(conn, query, params, row_factory)
+            try:
+                while True:
+                    rows = cursor.fetchmany(FETCH_SIZE)
+                    if not rows:
+                        break
+                    yield from rows
+            finally:
+                cursor.close()
+
+    def _iter_page(
+        self,
+        select: str,
+        id_column: str,
+        after_id: Optional[int] = None,
+        limit: Optional[int] = None,
+        conditions: Sequence[str] = (),
+        params: Sequence = (),
+        row_factory: Optional[Callable] = None,
+    ) -> Iterator:
+        """
+        Streams the rows of `select` in `id_column` order using keyset
+        pagination: only rows with an ID greater than `after_id` are returned,
+        at most `limit` of them. Seeking by ID uses the primary key index, so
+        every page costs the same no matter how deep it is.
+        """
+        conditions = list(conditions)
+        params = list(params)
+        if after_id is not None:
+            conditions.append(f"{id_column} > ?")
+            params.append(after_id)
 
-    def _create_tables(self):
-        raise NotImplementedError("Subclasses must implement the _create_tables method.")
\ No newline at end of file
+        query = select
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += f" ORDER BY {id_column}"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return self._iter_rows(query, params, row_factory)
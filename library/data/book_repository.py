@@ -1,38 +1,60 @@
+import re
 import sqlite3
-from typing import List
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Tuple
 
-from library.models.models import Book
+from library.models.isbn import to_isbn13
+from library.models.models import Book, DedupeResult
 from library.data.base_repository import BaseRepository
+from library.data.cache import EntityCache
+from library.data.database_manager import DatabaseManager
 
 class BookRepository(BaseRepository):
     """
     Handles all data access for Book objects using SQLite.
     """
 
-    def _create_tables(self):
+    _columns = ("title", "author", "isbn", "is_available", "id")
+    export_columns = ("id", "isbn", "title", "author", "is_available")
+    _export_select = "SELECT id, isbn, title, author, is_available FROM books"
+
+    @staticmethod
+    def _row_factory(cursor, row) -> Book:
+        return Book(row[0], row[1], row[2], bool(row[3]), row[4])
+
+    def __init__(self, db_manager: DatabaseManager, cache: Optional[EntityCache] = None):
+        super().__init__(db_manager, cache)
+        # Whether the books_fts index exists; looked up on the first search
+        self._fts_enabled: Optional[bool] = None
+
+    def _has_fts_index(self) -> bool:
+        with self._read() as conn:
+            return conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'books_fts'"
+            ).fetchone() is not None
+
+    @staticmethod
+    def _isbn_key(isbn: str) -> Tuple[str, str]:
         """
-        Creates the 'books' table with an auto-incrementing primary key.
+        Returns the column and value a book's ISBN is unique by: its ISBN-13
+        if the ISBN is valid, else the ISBN as stored.
         """
-        with self.conn:
-            self.conn.execute("""
-                CREATE TABLE IF NOT EXISTS books (
-                    id INTEGER PRIMARY KEY,
-                    isbn TEXT NOT NULL,
-                    title TEXT NOT NULL,
-                    author TEXT NOT NULL,
-                    is_available INTEGER NOT NULL
-                )
-            """)
+        isbn13 = to_isbn13(isbn)
+        return ('isbn13', isbn13) if isbn13 is not None else ('isbn', isbn)
 
     def add_book(self, book: Book) -> Book:
         """
         Adds a new book to the database and returns the book with its new ID.
         """
+        isbn13 = to_isbn13(book.isbn)
         try:
-            with self.conn:
-                cursor = self.conn.execute(
-                    "INSERT INTO books (isbn, title, author, is_available) VALUES (?, ?, ?, ?)",
-                    (book.isbn, book.title, book.author, int(book.is_available))
+            with self._write() as conn:
+                # Only the ISBN-13 key is unique, so an ISBN without one is looked up as stored
+                if isbn13 is None and conn.execute("SELECT 1 FROM books WHERE isbn = ?", (book.isbn,)).fetchone():
+                    raise ValueError(f"Book with ISBN '{book.isbn}' already exists.")
+                cursor = conn.execute(
+                    "INSERT INTO books (isbn, isbn13, title, author, is_available) VALUES (?, ?, ?, ?, ?)",
+                    (book.isbn, isbn13, book.title, book.author, int(book.is_available))
                 )
                 new_id = cursor.lastrowid
                 
@@ -46,66 +68,128 @@ class BookRepository(BaseRepository):
         except sqlite3.IntegrityError:
             raise ValueError(f"Book with ISBN '{book.isbn}' already exists.")
 
+    def add_books(self, books: Iterable[Book], batch_size: int = 1000) -> List[Tuple[int, Book]]:
+        """
+        Adds many books inside a single transaction, inserting them in
+        `executemany` batches of `batch_size` rows.
+
+        Books whose ISBN already exists, in any notation, either in the
+        database or earlier in `books`, are skipped. Returns a list of
+        `(index, book)` pairs for the skipped books, where `index` is the
+        book's position in `books`.
+        """
+        if batch_size < 1:
+            raise ValueError("Batch size must be at least 1.")
+
+        rejected = []
+        seen_keys = set()
+        books = iter(books)
+        index = 0
+        with self._write() as conn:
+            while True:
+                batch = list(islice(books, batch_size))
+                if not batch:
+                    break
+                keys = [self._isbn_key(book.isbn) for book in batch]
+                existing = self._existing_keys(conn, set(keys))
+                rows = []
+                for book, key in zip(batch, keys):
+                    if key in existing or key in seen_keys:
+                        rejected.append((index, book))
+                    else:
+                        seen_keys.add(key)
+                        isbn13 = key[1] if key[0] == 'isbn13' else None
+                        rows.append((book.isbn, isbn13, book.title, book.author, int(book.is_available)))
+                    index += 1
+                conn.executemany(
+                    "INSERT INTO books (isbn, isbn13, title, author, is_available) VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+        return rejected
+
+    def _existing_keys(self, conn, keys: set) -> set:
+        """
+        Returns the subset of the `_isbn_key` pairs in `keys` already stored
+        in the database.
+        """
+        existing = set()
+        for column in ('isbn13', 'isbn'):
+            values = {value for key_column, value in keys if key_column == column}
+            if values:
+                rows = self._select_in(conn, f"SELECT {column} FROM books WHERE {column} IN ({{}})", values)
+                existing.update((column, row[column]) for row in rows)
+        return existing
+
     def get_book_by_id(self, book_id: int) -> Book:
         """
         Fetches a book by its auto-generated ID.
         """
-        with self.conn:
-            cursor = self.conn.execute("SELECT * FROM books WHERE id = ?", (book_id,))
-            row = cursor.fetchone()
-            if row:
-                return Book(
-                    title=row['title'],
-                    author=row['author'],
-                    isbn=row['isbn'],
-                    is_available=bool(row['is_available']),
-                    id=row['id']
-                )
-            return None
+        return self._cached(('id', book_id), lambda: self._fetch_book('id', book_id))
 
     def get_book_by_isbn(self, isbn: str) -> Book:
         """
-        Fetches a book by its ISBN.
+        Fetches a book by its ISBN, in ISBN-10 or ISBN-13 form and with or
+        without hyphens. An ISBN that is not valid is looked up as stored.
         """
-        with self.conn:
-            cursor = self.conn.execute("SELECT * FROM books WHERE isbn = ?", (isbn,))
-            row = cursor.fetchone()
-            if row:
-                return Book(
-                    title=row['title'],
-                    author=row['author'],
-                    isbn=row['isbn'],
-                    is_available=bool(row['is_available']),
-                    id=row['id']
-                )
-            return None
+        key = self._isbn_key(isbn)
+        return self._cached(key, lambda: self._fetch_book(*key))
+
+    def _fetch_book(self, column: str, value) -> Optional[Book]:
+        with self._read() as conn:
+            cursor = self._query(conn, f"SELECT {self._select_list()} FROM books WHERE {column} = ?", (value,))
+            return cursor.fetchone()
     
-    def search_books(self, search_term: str) -> List[Book]:
+    def search_books(self, search_term: str, limit: Optional[int] = None) -> List[Book]:
         """
-        Searches for books by title or author.
+        Searches for books by title, author or ISBN.
+
+        With FTS5, every word in `search_term` must prefix-match a word of the
+        book and results are ranked by relevance (bm25). Without FTS5, falls
+        back to a substring match on title or author.
+        """
+        if self._fts_enabled is None:
+            self._fts_enabled = self._has_fts_index()
+        if not self._fts_enabled:
+            return self._search_books_like(search_term, limit)
+
+        match = self._fts_match_expression(search_term)
+        if not match:
+            return []
+
+        query = f"""
+            SELECT {self._select_list('books')} FROM books_fts
+            JOIN books ON books.id = books_fts.rowid
+            WHERE books_fts MATCH ?
+            ORDER BY bm25(books_fts)
+            LIMIT ?
+        """
+        with self._read() as conn:
+            cursor = self._query(conn, query, (match, -1 if limit is None else limit))
+            return cursor.fetchall()
+
+    @staticmethod
+    def _fts_match_expression(search_term: str) -> str:
+        """
+        Turns free text into an FTS5 query: each word becomes a quoted prefix
+        term, and FTS5 ANDs adjacent terms together.
         """
-        query = "SELECT * FROM books WHERE LOWER(title) LIKE ? OR LOWER(author) LIKE ?"
+        words = re.findall(r'\w+', search_term)
+        return " ".join(f'"{word}"*' for word in words)
+
+    def _search_books_like(self, search_term: str, limit: Optional[int]) -> List[Book]:
+        query = f"SELECT {self._select_list()} FROM books WHERE LOWER(title) LIKE ? OR LOWER(author) LIKE ? LIMIT ?"
         term = f'%{search_term.lower()}%'
-        
-        with self.conn:
-            cursor = self.conn.execute(query, (term, term))
-            rows = cursor.fetchall()
-            return [
-                Book(
-                    title=row['title'],
-                    author=row['author'],
-                    isbn=row['isbn'],
-                    is_available=bool(row['is_available']),
-                    id=row['id']
-                ) for row in rows
-            ]
+
+        with self._read() as conn:
+            cursor = self._query(conn, query, (term, term, -1 if limit is None else limit))
+            return cursor.fetchall()
 
     def update_book_availability(self, book_id: int, is_available: bool):
         """
         Updates the availability status of a book by its ID.
         """
-        with self.conn:
-            self.conn.execute(
+        with self._write() as conn:
+            conn.execute(
                 "UPDATE books SET is_available = ? WHERE id = ?",
                 (int(is_available), book_id)
             )
@@ -114,15 +198,72 @@ class BookRepository(BaseRepository):
         """
         Fetches all books from the database.
         """
-        with self.conn:
-            cursor = self.conn.execute("SELECT * FROM books")
-            rows = cursor.fetchall()
-            return [
-                Book(
-                    title=row['title'],
-                    author=row['author'],
-                    isbn=row['isbn'],
-                    is_available=bool(row['is_available']),
-                    id=row['id']
-                ) for row in rows
-            ]
\ No newline at end of file
+        return list(self.iter_books())
+
+    def iter_books(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> Iterator[Book]:
+        """
+        Streams books in ID order, starting after `after_id` and stopping
+        after `limit` books.
+        """
+        return self._iter_page(f"SELECT {self._select_list()} FROM books", "id", after_id, limit)
+
+    def merge_duplicate_books(self, dry_run: bool = False) -> DedupeResult:
+        """
+        Merges the books stored under one ISBN, in one notation or several,
+        such as an ISBN-10 and its ISBN-13, keeping one book per ISBN: one
+        on loan if there is one, else the one already keyed by the ISBN,
+        else the oldest. The others are deleted, except those on loan, which
+        are reported as conflicts. Books whose ISBN is not valid are merged
+        by their ISBN as stored.
+
+        Only books without an `isbn13` key are looked at, so the pass reads
+        the rest of the catalog through the `isbn13` index alone. With
+        `dry_run`, reports what would be merged and changes nothing.
+        """
+        with self._immediate_transaction() as conn:
+            conn.create_function('canonical_isbn', 1, to_isbn13, deterministic=True)
+            conn.execute("""
+                CREATE TEMP TABLE unkeyed_books AS
+                SELECT id, isbn, canonical_isbn(isbn) AS isbn13 FROM books WHERE isbn13 IS NULL
+            """)
+            # Every book of an ISBN that has an unkeyed book, ranked to pick the one kept.
+            # An ISBN that is not valid never equals an ISBN-13, so the two can share `isbn_key`.
+            conn.execute("""
+                CREATE TEMP TABLE isbn_duplicates AS
+                SELECT id, isbn_key, isbn13, on_loan,
+                       FIRST_VALUE(id) OVER (PARTITION BY isbn_key ORDER BY on_loan DESC, keyed DESC, id) AS keeper_id
+                FROM (
+                    SELECT id, isbn_key, isbn13, keyed, id IN (SELECT book_id FROM loans) AS on_loan
+                    FROM (
+                        SELECT id, COALESCE(isbn13, isbn) AS isbn_key, isbn13, 0 AS keyed FROM temp.unkeyed_books
+                        UNION ALL
+                        SELECT id, isbn13, isbn13, 1 FROM books WHERE isbn13 IN (SELECT isbn13 FROM temp.unkeyed_books)
+                    )
+                )
+            """)
+            result = DedupeResult()
+            try:
+                result.duplicate_isbns = conn.execute("""
+                    SELECT COUNT(DISTINCT isbn_key) FROM temp.isbn_duplicates WHERE id <> keeper_id
+                """).fetchone()[0]
+                result.conflicts = [row[0] for row in conn.execute("""
+                    SELECT DISTINCT isbn_key FROM temp.isbn_duplicates
+                    WHERE id <> keeper_id AND on_loan ORDER BY isbn_key
+                """)]
+                removed = "SELECT id FROM temp.isbn_duplicates WHERE id <> keeper_id AND NOT on_loan"
+                result.removed_books = self._query(
+                    conn, f"SELECT {self._select_list()} FROM books WHERE id IN ({removed}) ORDER BY id"
+                ).fetchall()
+                if dry_run:
+                    return result
+                conn.execute(f"DELETE FROM books WHERE id IN ({removed})")
+                # Kept books that were unkeyed take the key, freed above if another book held it
+                conn.execute("""
+                    UPDATE books SET isbn13 = (SELECT isbn13 FROM temp.isbn_duplicates WHERE id = books.id)
+                    WHERE isbn13 IS NULL
+                      AND id IN (SELECT keeper_id FROM temp.isbn_duplicates WHERE isbn13 IS NOT NULL)
+                """)
+                return result
+            finally:
+                conn.execute("DROP TABLE temp.isbn_duplicates")
+                conn.execute("DROP TABLE temp.unkeyed_books")
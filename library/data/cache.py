@@ -0,0 +1,107 @@
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, Hashable, Optional, TypeVar
+
+from .database_manager import DatabaseManager
+
+T = TypeVar('T')
+
+DEFAULT_CACHE_SIZE = 1024
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    # Times the whole cache was dropped because the database changed
+    invalidations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {**asdict(self), 'hit_rate': self.hit_rate}
+
+
+class EntityCache:
+    """
+    A bounded, thread-safe LRU cache of models read by a repository, keyed by
+    lookups such as ('id', 42) or ('isbn', '9780441013593').
+
+    Before every lookup the database's `PRAGMA data_version` is compared with
+    the one the entries were read at. It changes whenever any other
+    connection commits: the pool's writer, or another process. So a change
+    made anywhere empties the cache, and nothing stale is ever returned.
+    Repositories also clear it after their own writes, so reads inside a
+    write transaction see its changes.
+
+    Cached models are shared between callers and must be treated as
+    read-only.
+    """
+
+    def __init__(self, db_manager: DatabaseManager, max_size: int = DEFAULT_CACHE_SIZE):
+        if max_size < 1:
+            raise ValueError("Cache size must be at least 1.")
+        self._db_manager = db_manager
+        self._max_size = max_size
+        self._entries: "OrderedDict[Hashable, object]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._data_version: Optional[int] = None
+        self._stats = CacheStats()
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    @property
+    def stats(self) -> CacheStats:
+        """
+        A snapshot of the hit, miss, eviction and invalidation counters.
+        """
+        with self._lock:
+            return CacheStats(**asdict(self._stats))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, load: Callable[[], Optional[T]]) -> Optional[T]:
+        """
+        Returns the cached model for `key`, or calls `load` to read it and
+        caches the result. None results are not cached.
+        """
+        version = self._db_manager.data_version()
+        with self._lock:
+            if version != self._data_version:
+                if self._entries:
+                    self._entries.clear()
+                    self._stats.invalidations += 1
+                self._data_version = version
+            elif key in self._entries:
+                self._entries.move_to_end(key)
+                self._stats.hits += 1
+                return self._entries[key]
+            self._stats.misses += 1
+
+        value = load()
+        if value is None:
+            return None
+        with self._lock:
+            # Only keep it if nothing was committed since it was read
+            if self._data_version == version:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                if len(self._entries) > self._max_size:
+                    self._entries.popitem(last=False)
+                    self._stats.evictions += 1
+        return value
+
+    def clear(self):
+        """
+        Drops every entry, after a write made through this process.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._data_version = None
@@ -0,0 +1,164 @@
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional
+
+class ConnectionPool:
+    """
+    A thread-safe pool of SQLite connections to one database file: a single
+    writer connection, guarded by a lock, and up to `size` reader connections.
+
+    Checkouts are per thread and reentrant. A thread that already holds a
+    connection gets the same one back from nested checkouts, and reads made
+    while a thread holds the writer go through the writer, so they see that
+    thread's uncommitted changes.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        size: int = 4,
+        configure: Optional[Callable[[sqlite3.Connection], None]] = None,
+        timeout: float = 30.0,
+        factory: Callable[..., sqlite3.Connection] = sqlite3.Connection,
+    ):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1.")
+        self._db_path = db_path
+        self._size = size
+        self._configure = configure
+        self._timeout = timeout
+        # What sqlite3.connect builds, e.g. QueryTracer.connection_factory
+        self._factory = factory
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: List[sqlite3.Connection] = []
+        # Bumped by reconfigure(); connections older than this are set up
+        # again the next time they are checked out.
+        self._generation = 0
+        self._generations = {}
+        self._closed = False
+
+        self._writer = self._connect()
+        self._writer_lock = threading.Lock()
+        self._idle_readers: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._reader_count = 0
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def _connect(self) -> sqlite3.Connection:
+        try:
+            conn = sqlite3.connect(self._db_path, check_same_thread=False, factory=self._factory)
+        except sqlite3.Error as e:
+            raise RuntimeError(f"Database connection error: {e}")
+        conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._connections.append(conn)
+        self._refresh(conn)
+        return conn
+
+    def _refresh(self, conn: sqlite3.Connection):
+        """
+        Applies `configure` to a connection that has not seen the latest
+        configuration yet.
+        """
+        generation = self._generation
+        if self._generations.get(id(conn)) != generation:
+            if self._configure:
+                self._configure(conn)
+            self._generations[id(conn)] = generation
+
+    def reconfigure(self):
+        """
+        Re-applies `configure` to every connection: to the writer now, and to
+        each reader the next time it is checked out.
+        """
+        self._generation += 1
+        with self.writer() as conn:
+            self._refresh(conn)
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """
+        Checks out the writer connection. Only one thread holds it at a time.
+        """
+        local = self._local
+        if getattr(local, 'writer_depth', 0):
+            local.writer_depth += 1
+        else:
+            if not self._writer_lock.acquire(timeout=self._timeout):
+                raise RuntimeError("Timed out waiting for the database writer connection.")
+            local.writer_depth = 1
+            self._refresh(self._writer)
+        try:
+            yield self._writer
+        finally:
+            # Released by whichever checkout ends last, which need not be the
+            # first one when checkouts held by generators overlap
+            local.writer_depth -= 1
+            if local.writer_depth == 0:
+                self._writer_lock.release()
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """
+        Checks out a reader connection, opening a new one if none is idle and
+        the pool is not full, or waiting for one otherwise.
+        """
+        local = self._local
+        if getattr(local, 'writer_depth', 0):
+            with self.writer() as conn:
+                yield conn
+            return
+        if getattr(local, 'reader_depth', 0):
+            local.reader_depth += 1
+            conn = local.reader
+        else:
+            conn = self._checkout_reader()
+            local.reader, local.reader_depth = conn, 1
+        try:
+            yield conn
+        finally:
+            # Returned by whichever checkout ends last, as for the writer
+            local.reader_depth -= 1
+            if local.reader_depth == 0:
+                local.reader = None
+                if conn.in_transaction:
+                    conn.rollback()
+                self._idle_readers.put(conn)
+
+    def _checkout_reader(self) -> sqlite3.Connection:
+        if self._closed:
+            raise RuntimeError("The connection pool is closed.")
+        try:
+            conn = self._idle_readers.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self._reader_count < self._size
+                if can_open:
+                    self._reader_count += 1
+            if can_open:
+                conn = self._connect()
+                # Writes must go through the writer, so readers refuse them
+                conn.execute("PRAGMA query_only = ON")
+                return conn
+            try:
+                conn = self._idle_readers.get(timeout=self._timeout)
+            except queue.Empty:
+                raise RuntimeError("Timed out waiting for a database reader connection.")
+        self._refresh(conn)
+        return conn
+
+    def close(self):
+        """
+        Closes every connection of the pool.
+        """
+        self._closed = True
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
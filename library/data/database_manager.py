@@ -1,42 +1,264 @@
+import re
 import sqlite3
+import threading
+from contextlib import contextmanager
 from pathlib import Path
+from typing import TYPE_CHECKING, ContextManager, Dict, Iterator, Optional
+
+from . import migrations
+from .connection_pool import ConnectionPool
+
+if TYPE_CHECKING:
+    # Only imported by commands run with --profile or --trace-sql
+    from .tracing import QueryTracer
+
+# Named sets of PRAGMAs applied to every connection.
+#   durable:  every commit is fsynced; safest, slowest for many small writes.
+#   balanced: WAL without an fsync per commit; a power loss can drop the last
+#             commits but never corrupts the database. The default.
+#   bulk:     no fsyncs and large caches, for imports that can be re-run.
+PROFILES = {
+    'durable': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'cache_size': -8000,
+        'temp_store': 'DEFAULT',
+        'mmap_size': 0,
+        'busy_timeout': 5000,
+    },
+    'balanced': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -32000,
+        'temp_store': 'MEMORY',
+        'mmap_size': 256 * 1024 * 1024,
+        'busy_timeout': 5000,
+    },
+    'bulk': {
+        'journal_mode': 'WAL',
+        'synchronous': 'OFF',
+        'cache_size': -256000,
+        'temp_store': 'MEMORY',
+        'mmap_size': 1024 * 1024 * 1024,
+        'busy_timeout': 10000,
+    },
+}
+DEFAULT_PROFILE = 'balanced'
+DEFAULT_POOL_SIZE = 4
+
+# PRAGMAs that may be set through overrides such as `--db-pragma`
+ALLOWED_PRAGMAS = {
+    'journal_mode', 'synchronous', 'cache_size', 'temp_store', 'mmap_size', 'busy_timeout',
+    'wal_autocheckpoint', 'locking_mode', 'foreign_keys', 'cache_spill',
+}
+_PRAGMA_VALUE = re.compile(r'^-?[A-Za-z0-9_]+$')
 
 class DatabaseManager:
-    _instance = None
-    _connection = None
-    _db_path = None
-
-    def __new__(cls, db_path: str = None):
-        if cls._instance is None:
-            cls._instance = super(DatabaseManager, cls).__new__(cls)
-            if db_path is None:
-                app_data_dir = Path.home() / '.library'
-                cls._db_path = app_data_dir / 'library.db'
-            else:
-                cls._db_path = Path(db_path)
-            
-            cls._ensure_db_directory_exists()
-            cls._connection = cls._get_db_connection()
-            cls._connection.row_factory = sqlite3.Row
-        return cls._instance
-
-    @classmethod
+    """
+    Owns the connection pool of one library database and the performance
+    profile applied to its connections. Opening a database brings its schema
+    up to date (see migrations.py); when it already is, that costs a single
+    PRAGMA read.
+
+    With a `tracer`, every pooled connection reports the statements it runs
+    to it (see tracing.py); without one, connections are plain and pay
+    nothing for it.
+    """
+
+    def __init__(
+        self,
+        db_path: str = None,
+        profile: str = DEFAULT_PROFILE,
+        pragmas: Optional[Dict[str, str]] = None,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        tracer: Optional['QueryTracer'] = None,
+    ):
+        self.validate_settings(profile, pragmas)
+        if db_path is None:
+            app_data_dir = Path.home() / '.library'
+            self._db_path = app_data_dir / 'library.db'
+        else:
+            self._db_path = Path(db_path)
+        self._profile = profile
+        self._pragma_overrides = dict(pragmas or {})
+
+        # Opened on first use by data_version()
+        self._watcher: Optional[sqlite3.Connection] = None
+        self._watcher_lock = threading.Lock()
+
+        self._ensure_db_directory_exists()
+        self._tracer = tracer
+        self._pool = ConnectionPool(
+            self._db_path,
+            size=pool_size,
+            configure=self._apply_settings,
+            factory=tracer.connection_factory if tracer else sqlite3.Connection,
+        )
+        try:
+            with self._pool.writer() as conn:
+                migrations.migrate(conn)
+        except BaseException:
+            self._pool.close()
+            raise
+
+    @staticmethod
+    def validate_settings(profile: str, pragmas: Optional[Dict[str, str]]):
+        """
+        Raises:
+            ValueError: If the profile is unknown or an override is not allowed.
+        """
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown database profile '{profile}'. Choose from: {', '.join(PROFILES)}.")
+        for name, value in (pragmas or {}).items():
+            if name not in ALLOWED_PRAGMAS:
+                raise ValueError(f"PRAGMA '{name}' cannot be overridden. Allowed: {', '.join(sorted(ALLOWED_PRAGMAS))}.")
+            if not _PRAGMA_VALUE.match(str(value)):
+                raise ValueError(f"Invalid value '{value}' for PRAGMA '{name}'.")
+
     def _ensure_db_directory_exists(self):
         self._db_path.parent.mkdir(parents=True, exist_ok=True)
 
-    @classmethod
-    def _get_db_connection(self):
-        try:
-            return sqlite3.connect(self._db_path)
-        except sqlite3.Error as e:
-            raise RuntimeError(f"Database connection error: {e}")
+    def _apply_settings(self, conn: sqlite3.Connection):
+        settings = {**PROFILES[self._profile], **self._pragma_overrides}
+        for name, value in settings.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+
+    def writer(self) -> ContextManager[sqlite3.Connection]:
+        """
+        Checks out the single writer connection for the current thread.
+        """
+        return self._pool.writer()
+
+    def reader(self) -> ContextManager[sqlite3.Connection]:
+        """
+        Checks out a reader connection for the current thread.
+        """
+        return self._pool.reader()
+
+    @contextmanager
+    def snapshot(self) -> Iterator[sqlite3.Connection]:
+        """
+        Checks out a reader and holds one read transaction open on it for the
+        block. Reader checkouts are reentrant, so every read the thread makes
+        in the block, through any repository, sees the database as it was on
+        entering it. In WAL mode writers are not blocked meanwhile.
+        """
+        with self._pool.reader() as conn:
+            if conn.in_transaction:
+                # Already inside a snapshot or a write
+                yield conn
+                return
+            conn.execute("BEGIN")
+            try:
+                # A deferred transaction only pins its snapshot at the first read
+                conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()
+                yield conn
+            finally:
+                conn.rollback()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Holds the writer and one `BEGIN IMMEDIATE` transaction for the block,
+        committed at the end or rolled back on error. Writer checkouts are
+        reentrant, so every write the thread makes in the block, through any
+        repository, joins this transaction instead of committing on its own.
+        """
+        with self._pool.writer() as conn:
+            if conn.in_transaction:
+                # Already inside a transaction, which commits for both
+                yield conn
+                return
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            else:
+                conn.commit()
+
+    @property
+    def db_path(self) -> Path:
+        return self._db_path
+
+    @property
+    def pool_size(self) -> int:
+        return self._pool.size
+
+    @property
+    def tracer(self) -> Optional['QueryTracer']:
+        return self._tracer
+
+    @property
+    def profile(self) -> str:
+        return self._profile
 
     @property
-    def connection(self):
-        return self._connection
+    def schema_version(self) -> int:
+        with self.reader() as conn:
+            return migrations.get_version(conn)
+
+    @property
+    def pragma_overrides(self) -> Dict[str, str]:
+        return dict(self._pragma_overrides)
+
+    def apply_profile(self, profile: str, pragmas: Optional[Dict[str, str]] = None):
+        """
+        Switches every pooled connection to a named profile from PROFILES,
+        followed by the PRAGMA overrides. Overrides given earlier are kept
+        unless `pragmas` replaces them, so they always win over the profile.
+
+        Raises:
+            ValueError: If the profile is unknown or an override is not allowed.
+        """
+        self.validate_settings(profile, pragmas)
+        if pragmas is not None:
+            self._pragma_overrides = dict(pragmas)
+        self._profile = profile
+        self._pool.reconfigure()
+
+    @contextmanager
+    def using_profile(self, profile: str) -> Iterator[None]:
+        """
+        Applies `profile` for the block, then goes back to the profile and
+        PRAGMA overrides in effect before it, even if the block fails.
+        """
+        previous_profile, previous_pragmas = self._profile, dict(self._pragma_overrides)
+        self.apply_profile(profile)
+        try:
+            yield
+        finally:
+            self.apply_profile(previous_profile, previous_pragmas)
+
+    def get_pragma(self, name: str):
+        """
+        Returns the current value of a PRAGMA on the writer connection.
+        """
+        if not name.isidentifier():
+            raise ValueError(f"Invalid PRAGMA name '{name}'.")
+        with self.writer() as conn:
+            row = conn.execute(f"PRAGMA {name}").fetchone()
+            return row[0] if row else None
+
+    def data_version(self) -> int:
+        """
+        Returns `PRAGMA data_version` of a dedicated connection that never
+        writes. The value changes whenever any other connection commits,
+        whether one of the pool's or another process's, so caches can tell
+        that what they read may be out of date.
+        """
+        with self._watcher_lock:
+            if self._watcher is None:
+                try:
+                    self._watcher = sqlite3.connect(self._db_path, check_same_thread=False)
+                except sqlite3.Error as e:
+                    raise RuntimeError(f"Database connection error: {e}")
+            return self._watcher.execute("PRAGMA data_version").fetchone()[0]
 
     def close_connection(self):
-        if self._connection:
-            self._connection.close()
-            self._connection = None
-            self._instance = None
\ No newline at end of file
+        with self._watcher_lock:
+            if self._watcher is not None:
+                self._watcher.close()
+                self._watcher = None
+        self._pool.close()
@@ -0,0 +1,46 @@
+from typing import Optional
+
+from library.models.models import ImportCheckpoint
+from library.data.base_repository import BaseRepository
+
+class ImportCheckpointRepository(BaseRepository):
+    """
+    Stores the progress of streaming imports so they can be resumed.
+    """
+
+    def get_checkpoint(self, source: str) -> Optional[ImportCheckpoint]:
+        """
+        Fetches the last saved checkpoint for an import source.
+        """
+        with self._read() as conn:
+            row = conn.execute(
+                "SELECT byte_offset, row_count, imported, rejected FROM import_checkpoints WHERE source = ?",
+                (source,)
+            ).fetchone()
+        if row is None:
+            return None
+        byte_offset, row_count, imported, rejected = row
+        return ImportCheckpoint(
+            source=source,
+            byte_offset=byte_offset,
+            row_count=row_count,
+            imported=imported,
+            rejected=rejected
+        )
+
+    def save_checkpoint(self, checkpoint: ImportCheckpoint):
+        """
+        Inserts or replaces the checkpoint for `checkpoint.source`.
+        """
+        with self._write() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO import_checkpoints (source, byte_offset, row_count, imported, rejected, updated_at)
+                VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                """,
+                (checkpoint.source, checkpoint.byte_offset, checkpoint.row_count, checkpoint.imported, checkpoint.rejected)
+            )
+
+    def remove_checkpoint(self, source: str):
+        with self._write() as conn:
+            conn.execute("DELETE FROM import_checkpoints WHERE source = ?", (source,))
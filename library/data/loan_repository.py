@@ -1,34 +1,72 @@
 import sqlite3
-from typing import List
+from typing import Iterable, Iterator, List, Optional, Tuple
 
-from library.models.models import Loan
+from library.models.models import CirculationResult, Loan, LoanView
 from library.data.base_repository import BaseRepository
-from datetime import datetime
+from datetime import date, timedelta
+
+# Loan dates are stored as whole days since 1970-01-01.
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+def to_epoch_day(value: date) -> int:
+    """
+    Converts a date (or datetime) to the day number stored in the database.
+    """
+    return value.toordinal() - EPOCH_ORDINAL
+
+def from_epoch_day(day: int) -> date:
+    return date.fromordinal(day + EPOCH_ORDINAL)
 
 class LoanRepository(BaseRepository):
-    def _create_tables(self):
-        with self.conn:
-            self.conn.execute("""
-                CREATE TABLE IF NOT EXISTS loans (
-                    id INTEGER PRIMARY KEY,
-                    book_id INTEGER UNIQUE NOT NULL,
-                    borrower_id INTEGER NOT NULL,
-                    loan_date TEXT NOT NULL,
-                    due_date TEXT NOT NULL,
-                    FOREIGN KEY (book_id) REFERENCES books(id),
-                    FOREIGN KEY (borrower_id) REFERENCES people(id)
-                )
-            """)
+    _columns = ("book_id", "borrower_id", "loan_date", "due_date", "id")
+    export_columns = ("id", "book_id", "person_id", "loan_date", "due_date")
+    # Dates are exported as YYYY-MM-DD, converted by SQLite from epoch days
+    _export_select = """
+        SELECT id, book_id, borrower_id,
+               date(loan_date * 86400, 'unixepoch'), date(due_date * 86400, 'unixepoch')
+        FROM loans
+    """
+
+    # Loans joined with their book title and borrower name, read by `_loan_view_factory`
+    _VIEW_SELECT = """
+        SELECT loans.id, loans.book_id, books.title, loans.borrower_id, people.name,
+               loans.loan_date, loans.due_date
+        FROM loans
+        LEFT JOIN books ON books.id = loans.book_id
+        LEFT JOIN people ON people.id = loans.borrower_id
+    """
+
+    @staticmethod
+    def _row_factory(cursor, row, fromordinal=date.fromordinal) -> Loan:
+        return Loan(
+            row[0],
+            row[1],
+            fromordinal(row[2] + EPOCH_ORDINAL),
+            fromordinal(row[3] + EPOCH_ORDINAL),
+            row[4]
+        )
+
+    @staticmethod
+    def _loan_view_factory(cursor, row, fromordinal=date.fromordinal) -> LoanView:
+        return LoanView(
+            row[0],
+            row[1],
+            row[2],
+            row[3],
+            row[4],
+            fromordinal(row[5] + EPOCH_ORDINAL),
+            fromordinal(row[6] + EPOCH_ORDINAL)
+        )
 
     def add_loan(self, loan: Loan) -> Loan:
         """
         Adds a new loan record to the database and returns the loan with its new ID.
         """
         try:
-            with self.conn:
-                cursor = self.conn.execute(
+            with self._write() as conn:
+                cursor = conn.execute(
                     "INSERT INTO loans (book_id, borrower_id, loan_date, due_date) VALUES (?, ?, ?, ?)",
-                    (loan.book_id, loan.person_id, loan.loan_date.strftime("%Y-%m-%d"), loan.due_date.strftime("%Y-%m-%d"))
+                    (loan.book_id, loan.person_id, to_epoch_day(loan.loan_date), to_epoch_day(loan.due_date))
                 )
                 new_id = cursor.lastrowid
 
@@ -44,69 +82,232 @@ class LoanRepository(BaseRepository):
                 raise ValueError("Borrower ID or Book ID does not exist.")
             raise ValueError(f"Loan record for Book ID '{loan.book_id}' already exists.")
 
-            
     def get_loan_by_id(self, loan_id: int) -> Loan:
         """
         Fetches a loan record by its unique ID.
         """
-        with self.conn:
-            cursor = self.conn.execute("SELECT * FROM loans WHERE id = ?", (loan_id,))
-            row = cursor.fetchone()
-            if row:
-                return Loan(
-                    book_id=row['book_id'],
-                    person_id=row['borrower_id'],
-                    loan_date=datetime.strptime(row['loan_date'], "%Y-%m-%d"),
-                    due_date=datetime.strptime(row['due_date'], "%Y-%m-%d"),
-                    id=row['id']
-                )
-            return None
+        with self._read() as conn:
+            cursor = self._query(conn, f"SELECT {self._select_list()} FROM loans WHERE id = ?", (loan_id,))
+            return cursor.fetchone()
 
     def get_loan_by_book_id(self, book_id: int) -> Loan:
         """
         Fetches a loan record by the book's ID.
         """
-        with self.conn:
-            cursor = self.conn.execute("SELECT * FROM loans WHERE book_id = ?", (book_id,))
-            row = cursor.fetchone()
-            if row:
-                return Loan(
-                    book_id=row['book_id'],
-                    person_id=row['borrower_id'],
-                    loan_date=datetime.strptime(row['loan_date'], "%Y-%m-%d"),
-                    due_date=datetime.strptime(row['due_date'], "%Y-%m-%d"),
-                    id=row['id']
-                )
-            return None
+        with self._read() as conn:
+            cursor = self._query(conn, f"SELECT {self._select_list()} FROM loans WHERE book_id = ?", (book_id,))
+            return cursor.fetchone()
 
     def get_loans_by_person_id(self, person_id: int) -> List[Loan]:
-        with self.conn:
-            cursor = self.conn.execute("SELECT * FROM loans WHERE borrower_id = ?", (person_id,))
-            rows = cursor.fetchall()
-            return [
-                Loan(
-                    book_id=row['book_id'],
-                    person_id=row['borrower_id'],
-                    loan_date=datetime.strptime(row['loan_date'], "%Y-%m-%d"),
-                    due_date=datetime.strptime(row['due_date'], "%Y-%m-%d"),
-                    id=row['id']
-                ) for row in rows
-            ]
+        with self._read() as conn:
+            cursor = self._query(conn, f"SELECT {self._select_list()} FROM loans WHERE borrower_id = ?", (person_id,))
+            return cursor.fetchall()
 
     def get_all_loans(self) -> List[Loan]:
-        with self.conn:
-            cursor = self.conn.execute("SELECT * FROM loans")
-            rows = cursor.fetchall()
-            return [
-                Loan(
-                    book_id=row['book_id'],
-                    person_id=row['borrower_id'],
-                    loan_date=datetime.strptime(row['loan_date'], "%Y-%m-%d"),
-                    due_date=datetime.strptime(row['due_date'], "%Y-%m-%d"),
-                    id=row['id']
-                ) for row in rows
-            ]
+        return list(self.iter_loans())
+
+    def iter_loans(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> Iterator[Loan]:
+        """
+        Streams loans in ID order, starting after `after_id` and stopping
+        after `limit` loans.
+        """
+        return self._iter_page(f"SELECT {self._select_list()} FROM loans", "id", after_id, limit)
+
+    def get_loan_views(self, person_id: Optional[int] = None) -> List[LoanView]:
+        """
+        Fetches loans together with their book title and borrower name in a
+        single query, optionally only those of one borrower.
+        """
+        return list(self.iter_loan_views(person_id))
+
+    def iter_loan_views(
+        self, person_id: Optional[int] = None, after_id: Optional[int] = None, limit: Optional[int] = None
+    ) -> Iterator[LoanView]:
+        """
+        Streams loan views in loan ID order, with the same keyset pagination
+        as `iter_loans`.
+        """
+        conditions, params = [], []
+        if person_id is not None:
+            conditions.append("loans.borrower_id = ?")
+            params.append(person_id)
+
+        return self._iter_page(
+            self._VIEW_SELECT, "loans.id", after_id, limit, conditions, params, row_factory=self._loan_view_factory
+        )
+
+    @staticmethod
+    def _due_range(first: Optional[date], last: Optional[date]) -> Tuple[str, List[int]]:
+        """
+        Returns the WHERE clause and parameters selecting loans due from
+        `first` to `last`, both inclusive and both optional. Comparing the
+        bare column keeps the range a seek on the loans_due_date index.
+        """
+        conditions, params = [], []
+        if first is not None:
+            conditions.append("loans.due_date >= ?")
+            params.append(to_epoch_day(first))
+        if last is not None:
+            conditions.append("loans.due_date <= ?")
+            params.append(to_epoch_day(last))
+        return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+    def get_overdue_loans(self, as_of: date) -> List[Loan]:
+        """
+        Fetches the loans due before `as_of`, earliest due first. A loan due
+        on `as_of` itself is not overdue yet.
+        """
+        return self.get_due_between(None, as_of - timedelta(days=1))
+
+    def get_due_between(self, start: Optional[date], end: Optional[date]) -> List[Loan]:
+        """
+        Fetches the loans due from `start` to `end`, both inclusive, earliest
+        due first. Either bound may be None to leave that side open.
+        """
+        where, params = self._due_range(start, end)
+        query = f"SELECT {self._select_list('loans')} FROM loans{where} ORDER BY loans.due_date, loans.id"
+        with self._read() as conn:
+            return self._query(conn, query, params).fetchall()
+
+    def iter_loan_views_due(self, start: Optional[date], end: Optional[date]) -> Iterator[LoanView]:
+        """
+        Streams the loan views due from `start` to `end`, both inclusive,
+        grouped by borrower and earliest due first within each borrower.
+
+        Only the matching loans are read, through the due date index, and
+        only they are sorted, so the cost follows the size of the result
+        rather than of the loans table.
+        """
+        where, params = self._due_range(start, end)
+        query = f"{self._VIEW_SELECT}{where} ORDER BY loans.borrower_id, loans.due_date, loans.id"
+        return self._iter_rows(query, params, row_factory=self._loan_view_factory)
+
+    def lend_book(self, book_id: int, person_id: int, loan_date: date, due_date: date) -> Loan:
+        """
+        Marks a book as on loan and records the loan in one transaction.
+
+        The book is only claimed if it is still available, so two concurrent
+        borrowers can never both get it, and a failure part-way leaves
+        nothing changed.
+
+        Raises:
+            ValueError: If the book is not found, not available, or the person is not found.
+        """
+        with self._immediate_transaction() as conn:
+            cursor = conn.execute("UPDATE books SET is_available = 0 WHERE id = ? AND is_available = 1", (book_id,))
+            if cursor.rowcount == 0:
+                if conn.execute("SELECT 1 FROM books WHERE id = ?", (book_id,)).fetchone() is None:
+                    raise ValueError(f"Book with ID '{book_id}' not found.")
+                raise ValueError(f"Book with ID '{book_id}' is currently not available.")
+
+            if conn.execute("SELECT 1 FROM people WHERE id = ?", (person_id,)).fetchone() is None:
+                raise ValueError(f"Person with ID '{person_id}' not found.")
+
+            cursor = conn.execute(
+                "INSERT INTO loans (book_id, borrower_id, loan_date, due_date) VALUES (?, ?, ?, ?)",
+                (book_id, person_id, to_epoch_day(loan_date), to_epoch_day(due_date))
+            )
+            return Loan(book_id, person_id, loan_date, due_date, cursor.lastrowid)
+
+    def return_book(self, book_id: int):
+        """
+        Marks a book as available and deletes its loan in one transaction.
+
+        Raises:
+            ValueError: If the book is not found or is already available.
+        """
+        with self._immediate_transaction() as conn:
+            cursor = conn.execute("UPDATE books SET is_available = 1 WHERE id = ? AND is_available = 0", (book_id,))
+            if cursor.rowcount == 0:
+                if conn.execute("SELECT 1 FROM books WHERE id = ?", (book_id,)).fetchone() is None:
+                    raise ValueError(f"Book with ID '{book_id}' not found.")
+                raise ValueError(f"Book with ID '{book_id}' is already available.")
+
+            conn.execute("DELETE FROM loans WHERE book_id = ?", (book_id,))
+
+    def lend_books(
+        self, requests: Iterable[Tuple[int, int]], loan_date: date, due_date: date
+    ) -> List[CirculationResult]:
+        """
+        Lends many books in one transaction.
+
+        Every book and person is validated with one set-based query per
+        table, then all valid loans are applied together. Invalid items are
+        reported in their result and do not stop the others.
+
+        Args:
+            requests: (book_id, person_id) pairs.
+
+        Returns:
+            One CirculationResult per request, in the same order.
+        """
+        requests = list(requests)
+        results = [CirculationResult(book_id, person_id) for book_id, person_id in requests]
+
+        with self._immediate_transaction() as conn:
+            availability = {
+                row['id']: bool(row['is_available'])
+                for row in self._select_in(conn, "SELECT id, is_available FROM books WHERE id IN ({})", {book_id for book_id, _ in requests})
+            }
+            people = {
+                row['id']
+                for row in self._select_in(conn, "SELECT id FROM people WHERE id IN ({})", {person_id for _, person_id in requests})
+            }
+
+            for result in results:
+                if result.book_id not in availability:
+                    result.error = f"Book with ID '{result.book_id}' not found."
+                elif not availability[result.book_id]:
+                    result.error = f"Book with ID '{result.book_id}' is currently not available."
+                elif result.person_id not in people:
+                    result.error = f"Person with ID '{result.person_id}' not found."
+                else:
+                    # Later requests for the same book in this batch find it taken
+                    availability[result.book_id] = False
+
+            lent = [result for result in results if result.ok]
+            conn.executemany(
+                "UPDATE books SET is_available = 0 WHERE id = ?",
+                [(result.book_id,) for result in lent]
+            )
+            loan_day, due_day = to_epoch_day(loan_date), to_epoch_day(due_date)
+            for result in lent:
+                cursor = conn.execute(
+                    "INSERT INTO loans (book_id, borrower_id, loan_date, due_date) VALUES (?, ?, ?, ?)",
+                    (result.book_id, result.person_id, loan_day, due_day)
+                )
+                result.loan = Loan(result.book_id, result.person_id, loan_date, due_date, cursor.lastrowid)
+        return results
+
+    def return_books(self, book_ids: Iterable[int]) -> List[CirculationResult]:
+        """
+        Returns many books in one transaction, validated with a single
+        set-based query.
+
+        Returns:
+            One CirculationResult per book ID, in the same order.
+        """
+        results = [CirculationResult(book_id) for book_id in book_ids]
+
+        with self._immediate_transaction() as conn:
+            availability = {
+                row['id']: bool(row['is_available'])
+                for row in self._select_in(conn, "SELECT id, is_available FROM books WHERE id IN ({})", {result.book_id for result in results})
+            }
+
+            for result in results:
+                if result.book_id not in availability:
+                    result.error = f"Book with ID '{result.book_id}' not found."
+                elif availability[result.book_id]:
+                    result.error = f"Book with ID '{result.book_id}' is already available."
+                else:
+                    availability[result.book_id] = True
+
+            returned = [(result.book_id,) for result in results if result.ok]
+            conn.executemany("UPDATE books SET is_available = 1 WHERE id = ?", returned)
+            conn.executemany("DELETE FROM loans WHERE book_id = ?", returned)
+        return results
 
     def remove_loan_by_book_id(self, book_id: int):
-        with self.conn:
-            self.conn.execute("DELETE FROM loans WHERE book_id = ?", (book_id,))
\ No newline at end of file
+        with self._write() as conn:
+            conn.execute("DELETE FROM loans WHERE book_id = ?", (book_id,))
\ No newline at end of file
@@ -0,0 +1,382 @@
+"""
+Schema migrations of the library database.
+
+The schema version is kept in `PRAGMA user_version`. Opening a database that
+is up to date costs a single PRAGMA read; only when the stored version is
+older than SCHEMA_VERSION are the pending migrations applied, all in one
+`BEGIN IMMEDIATE` transaction, and the version bumped with them.
+
+Each migration is a function of a connection, appended to MIGRATIONS; the
+version it brings the database to is its position in the list. Migrations
+run inside the migrating transaction, so they must not commit.
+"""
+import re
+import sqlite3
+from typing import Callable, List, Optional
+
+from library.models.isbn import to_isbn13
+
+# SQLite's julianday() of 1970-01-01, used to convert legacy text dates
+EPOCH_JULIAN_DAY = 2440587.5
+
+LOANS_TABLE_DEFINITION = """
+    id INTEGER PRIMARY KEY,
+    book_id INTEGER UNIQUE NOT NULL,
+    borrower_id INTEGER NOT NULL,
+    loan_date INTEGER NOT NULL,
+    due_date INTEGER NOT NULL,
+    FOREIGN KEY (book_id) REFERENCES books(id),
+    FOREIGN KEY (borrower_id) REFERENCES people(id)
+"""
+
+def _has_table(conn: sqlite3.Connection, name: str) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).fetchone() is not None
+
+def _has_index(conn: sqlite3.Connection, name: str) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (name,)
+    ).fetchone() is not None
+
+def _create_base_schema(conn: sqlite3.Connection):
+    """
+    Version 1: the books, people, loans and import_checkpoints tables with
+    their indexes and the full-text index of books.
+
+    Databases created before schema versions existed already hold some of
+    these tables, possibly in older shapes, so every step checks what is
+    there and upgrades it in place.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS books (
+            id INTEGER PRIMARY KEY,
+            isbn TEXT NOT NULL,
+            title TEXT NOT NULL,
+            author TEXT NOT NULL,
+            is_available INTEGER NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS people (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            phone_number TEXT
+        )
+    """)
+    conn.execute(f"CREATE TABLE IF NOT EXISTS loans ({LOANS_TABLE_DEFINITION})")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS import_checkpoints (
+            source TEXT PRIMARY KEY,
+            byte_offset INTEGER NOT NULL,
+            row_count INTEGER NOT NULL,
+            imported INTEGER NOT NULL,
+            rejected INTEGER NOT NULL,
+            updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    if _has_text_dates(conn):
+        _convert_text_dates(conn)
+    conn.execute("CREATE INDEX IF NOT EXISTS loans_borrower_id ON loans (borrower_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS loans_due_date ON loans (due_date)")
+
+    # Not unique: older databases may hold several copies of one ISBN, which
+    # `library books dedupe` merges once none of the extra copies is on loan
+    conn.execute("CREATE INDEX IF NOT EXISTS books_isbn ON books (isbn)")
+    if not _has_index(conn, 'people_name_unique'):
+        _merge_duplicate_people(conn)
+        conn.execute("CREATE UNIQUE INDEX people_name_unique ON people (name)")
+
+    if not _has_table(conn, 'books_fts'):
+        _create_books_fts(conn)
+
+def _has_text_dates(conn: sqlite3.Connection) -> bool:
+    """
+    Tells whether the loans table predates integer dates and still stores
+    them as 'YYYY-MM-DD' text.
+    """
+    columns = {row[1]: row[2] for row in conn.execute("PRAGMA table_info(loans)")}
+    return columns.get('due_date', '').upper() == 'TEXT'
+
+def _convert_text_dates(conn: sqlite3.Connection):
+    """
+    Rebuilds the loans table with integer day columns. A TEXT column would
+    turn integers back into text, so updating in place is not enough.
+    """
+    conn.execute("ALTER TABLE loans RENAME TO loans_text_dates")
+    conn.execute(f"CREATE TABLE loans ({LOANS_TABLE_DEFINITION})")
+    conn.execute(f"""
+        INSERT INTO loans (id, book_id, borrower_id, loan_date, due_date)
+        SELECT id, book_id, borrower_id,
+               CAST(julianday(loan_date) - {EPOCH_JULIAN_DAY} AS INTEGER),
+               CAST(julianday(due_date) - {EPOCH_JULIAN_DAY} AS INTEGER)
+        FROM loans_text_dates
+    """)
+    conn.execute("DROP TABLE loans_text_dates")
+
+def _merge_duplicate_people(conn: sqlite3.Connection):
+    """
+    Keeps the oldest person of each name, moves the loans of the others to
+    them and deletes the others.
+    """
+    conn.execute("CREATE TEMP TABLE people_duplicates (id INTEGER PRIMARY KEY, keeper_id INTEGER NOT NULL)")
+    conn.execute("""
+        INSERT INTO people_duplicates (id, keeper_id)
+        SELECT id, keeper_id FROM (
+            SELECT id, MIN(id) OVER (PARTITION BY name) AS keeper_id FROM people
+        )
+        WHERE id <> keeper_id
+    """)
+    conn.execute("""
+        UPDATE loans SET borrower_id = (
+            SELECT keeper_id FROM people_duplicates WHERE id = loans.borrower_id
+        )
+        WHERE borrower_id IN (SELECT id FROM people_duplicates)
+    """)
+    conn.execute("DELETE FROM people WHERE id IN (SELECT id FROM people_duplicates)")
+    conn.execute("DROP TABLE temp.people_duplicates")
+
+def _create_books_fts(conn: sqlite3.Connection):
+    """
+    Creates the 'books_fts' FTS5 index over title, author and ISBN, kept in
+    sync with 'books' by triggers, and indexes the existing catalog. Skipped
+    if SQLite lacks FTS5; BookRepository then searches with LIKE.
+    """
+    try:
+        conn.execute("""
+            CREATE VIRTUAL TABLE books_fts USING fts5(
+                title, author, isbn, content='books', content_rowid='id'
+            )
+        """)
+    except sqlite3.OperationalError:
+        # This SQLite build was compiled without FTS5.
+        return
+    conn.execute("""
+        CREATE TRIGGER books_fts_insert AFTER INSERT ON books BEGIN
+            INSERT INTO books_fts (rowid, title, author, isbn)
+            VALUES (new.id, new.title, new.author, new.isbn);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER books_fts_delete AFTER DELETE ON books BEGIN
+            INSERT INTO books_fts (books_fts, rowid, title, author, isbn)
+            VALUES ('delete', old.id, old.title, old.author, old.isbn);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER books_fts_update AFTER UPDATE OF title, author, isbn ON books BEGIN
+            INSERT INTO books_fts (books_fts, rowid, title, author, isbn)
+            VALUES ('delete', old.id, old.title, old.author, old.isbn);
+            INSERT INTO books_fts (rowid, title, author, isbn)
+            VALUES (new.id, new.title, new.author, new.isbn);
+        END
+    """)
+    conn.execute("INSERT INTO books_fts (books_fts) VALUES ('rebuild')")
+
+def _create_summary_counters(conn: sqlite3.Connection):
+    """
+    Version 2: counters for the statistics that must stay cheap however
+    large the catalog grows, kept up to date by triggers on books and loans
+    and backfilled from the existing rows.
+
+    library_counters holds 'books' and 'books_on_loan'; borrower_loan_counts
+    holds the active loans of every person who has at least one.
+    """
+    conn.execute("CREATE TABLE library_counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL) WITHOUT ROWID")
+    conn.execute("""
+        CREATE TABLE borrower_loan_counts (
+            person_id INTEGER PRIMARY KEY,
+            active_loans INTEGER NOT NULL
+        )
+    """)
+    # Lets the busiest borrowers be read from the top of an index
+    conn.execute("CREATE INDEX borrower_loan_counts_active ON borrower_loan_counts (active_loans DESC)")
+    # Lets books be counted per author without sorting the catalog
+    conn.execute("CREATE INDEX IF NOT EXISTS books_author ON books (author)")
+
+    conn.execute("""
+        INSERT INTO library_counters (name, value)
+        SELECT 'books', COUNT(*) FROM books
+        UNION ALL
+        SELECT 'books_on_loan', COUNT(*) FROM books WHERE is_available = 0
+    """)
+    conn.execute("""
+        INSERT INTO borrower_loan_counts (person_id, active_loans)
+        SELECT borrower_id, COUNT(*) FROM loans GROUP BY borrower_id
+    """)
+
+    conn.execute("""
+        CREATE TRIGGER books_counters_insert AFTER INSERT ON books BEGIN
+            UPDATE library_counters SET value = value + 1 WHERE name = 'books';
+            UPDATE library_counters SET value = value + 1 WHERE name = 'books_on_loan' AND new.is_available = 0;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER books_counters_delete AFTER DELETE ON books BEGIN
+            UPDATE library_counters SET value = value - 1 WHERE name = 'books';
+            UPDATE library_counters SET value = value - 1 WHERE name = 'books_on_loan' AND old.is_available = 0;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER books_counters_update AFTER UPDATE OF is_available ON books
+        WHEN (old.is_available = 0) <> (new.is_available = 0) BEGIN
+            UPDATE library_counters SET value = value + (new.is_available = 0) - (old.is_available = 0)
+            WHERE name = 'books_on_loan';
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER loans_counters_insert AFTER INSERT ON loans BEGIN
+            INSERT OR IGNORE INTO borrower_loan_counts (person_id, active_loans) VALUES (new.borrower_id, 0);
+            UPDATE borrower_loan_counts SET active_loans = active_loans + 1 WHERE person_id = new.borrower_id;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER loans_counters_delete AFTER DELETE ON loans BEGIN
+            UPDATE borrower_loan_counts SET active_loans = active_loans - 1 WHERE person_id = old.borrower_id;
+            DELETE FROM borrower_loan_counts WHERE person_id = old.borrower_id AND active_loans <= 0;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER loans_counters_update AFTER UPDATE OF borrower_id ON loans
+        WHEN old.borrower_id <> new.borrower_id BEGIN
+            UPDATE borrower_loan_counts SET active_loans = active_loans - 1 WHERE person_id = old.borrower_id;
+            DELETE FROM borrower_loan_counts WHERE person_id = old.borrower_id AND active_loans <= 0;
+            INSERT OR IGNORE INTO borrower_loan_counts (person_id, active_loans) VALUES (new.borrower_id, 0);
+            UPDATE borrower_loan_counts SET active_loans = active_loans + 1 WHERE person_id = new.borrower_id;
+        END
+    """)
+
+def _digits_only(phone_number: Optional[str]) -> Optional[str]:
+    # The same normalization as PersonRepository.phone_digits
+    digits = re.sub(r'\D', '', phone_number or '')
+    return digits or None
+
+def _create_people_search(conn: sqlite3.Connection):
+    """
+    Version 3: the people search indexes. A `phone_digits` column holds the
+    phone number reduced to its digits, with an index for exact and prefix
+    lookups; PersonRepository keeps it up to date on writes. The
+    'people_fts' FTS5 index over name and phone digits uses the trigram
+    tokenizer, for substring and typo-tolerant matching. It is skipped if
+    SQLite lacks FTS5 or the trigram tokenizer (3.34+); PersonRepository
+    then searches with LIKE.
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(people)")}
+    if 'phone_digits' not in columns:
+        conn.execute("ALTER TABLE people ADD COLUMN phone_digits TEXT")
+    # Registered on this connection only, for the backfill; no trigger uses it
+    conn.create_function('digits_only', 1, _digits_only, deterministic=True)
+    conn.execute("UPDATE people SET phone_digits = digits_only(phone_number)")
+    conn.execute("CREATE INDEX IF NOT EXISTS people_phone_digits ON people (phone_digits)")
+
+    try:
+        conn.execute("""
+            CREATE VIRTUAL TABLE people_fts USING fts5(
+                name, phone_digits, content='people', content_rowid='id', tokenize='trigram'
+            )
+        """)
+    except sqlite3.OperationalError:
+        # No FTS5, or no trigram tokenizer in this SQLite build
+        return
+    conn.execute("""
+        CREATE TRIGGER people_fts_insert AFTER INSERT ON people BEGIN
+            INSERT INTO people_fts (rowid, name, phone_digits) VALUES (new.id, new.name, new.phone_digits);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER people_fts_delete AFTER DELETE ON people BEGIN
+            INSERT INTO people_fts (people_fts, rowid, name, phone_digits)
+            VALUES ('delete', old.id, old.name, old.phone_digits);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER people_fts_update AFTER UPDATE OF name, phone_digits ON people BEGIN
+            INSERT INTO people_fts (people_fts, rowid, name, phone_digits)
+            VALUES ('delete', old.id, old.name, old.phone_digits);
+            INSERT INTO people_fts (rowid, name, phone_digits) VALUES (new.id, new.name, new.phone_digits);
+        END
+    """)
+    conn.execute("INSERT INTO people_fts (people_fts) VALUES ('rebuild')")
+
+def _create_isbn13_key(conn: sqlite3.Connection):
+    """
+    Version 4: the `isbn13` column, each book's ISBN in canonical ISBN-13
+    form, with a unique index that ISBN lookups and imports go through.
+
+    Books stored before it may hold the same ISBN in several notations.
+    Only one book of each ISBN gets the key, preferring one on loan, then
+    the oldest; the others keep a NULL key until `library books dedupe`
+    merges them. Books whose ISBN is not valid keep a NULL key too.
+    """
+    conn.execute("ALTER TABLE books ADD COLUMN isbn13 TEXT")
+    conn.create_function('canonical_isbn', 1, to_isbn13, deterministic=True)
+    # Each ISBN is canonicalized once, then one sort ranks the books of each
+    conn.execute("CREATE TEMP TABLE book_isbn13 (id INTEGER PRIMARY KEY, isbn13 TEXT NOT NULL, copy INTEGER NOT NULL)")
+    conn.execute("""
+        INSERT INTO temp.book_isbn13 (id, isbn13, copy)
+        SELECT id, isbn13, ROW_NUMBER() OVER (PARTITION BY isbn13 ORDER BY on_loan DESC, id)
+        FROM (
+            SELECT id, canonical_isbn(isbn) AS isbn13, id IN (SELECT book_id FROM loans) AS on_loan FROM books
+        )
+        WHERE isbn13 IS NOT NULL
+    """)
+    conn.execute("""
+        UPDATE books SET isbn13 = (SELECT isbn13 FROM temp.book_isbn13 WHERE id = books.id)
+        WHERE id IN (SELECT id FROM temp.book_isbn13 WHERE copy = 1)
+    """)
+    conn.execute("DROP TABLE temp.book_isbn13")
+    conn.execute("CREATE UNIQUE INDEX books_isbn13_unique ON books (isbn13)")
+
+def _drop_isbn_unique_index(conn: sqlite3.Connection):
+    """
+    Version 5: replaces the unique index on the ISBN as stored, which
+    earlier upgrades enforced by deleting copies, with a plain one. Books
+    are unique by `isbn13`; duplicates left without it are merged by
+    `library books dedupe`.
+    """
+    conn.execute("DROP INDEX IF EXISTS books_isbn_unique")
+    conn.execute("CREATE INDEX IF NOT EXISTS books_isbn ON books (isbn)")
+
+MIGRATIONS: List[Callable[[sqlite3.Connection], None]] = [
+    _create_base_schema,
+    _create_summary_counters,
+    _create_people_search,
+    _create_isbn13_key,
+    _drop_isbn_unique_index,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def get_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """
+    Brings the database on `conn` up to SCHEMA_VERSION and returns the
+    version it was at before.
+
+    Raises:
+        RuntimeError: If the database was written by a newer version of the
+                      library, or a migration cannot be applied.
+    """
+    version = get_version(conn)
+    if version == SCHEMA_VERSION:
+        return version
+    if version > SCHEMA_VERSION:
+        raise RuntimeError(
+            f"The database has schema version {version}, but this version of the library "
+            f"only knows up to {SCHEMA_VERSION}. Please upgrade the library."
+        )
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Another process may have migrated while we waited for the lock
+        version = get_version(conn)
+        for migration in MIGRATIONS[version:]:
+            migration(conn)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+    return version
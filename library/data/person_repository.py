@@ -1,29 +1,59 @@
+import re
 import sqlite3
-from typing import List
+from difflib import SequenceMatcher
+from typing import Iterator, List, Optional
 
 from library.models.models import Person
 from library.data.base_repository import BaseRepository
+from library.data.cache import EntityCache
+from library.data.database_manager import DatabaseManager
+
+# Shortest text the trigram index can match
+TRIGRAM_LENGTH = 3
+# Candidates rescored for typo-tolerant matches, best trigram overlap first
+FUZZY_CANDIDATES = 200
+# How close a name must be to the search term to count as a typo of it
+FUZZY_MIN_SIMILARITY = 0.6
+# Search terms made only of these and digits are taken for phone numbers
+_PHONE_TERM = re.compile(r'^[\d\s()+\-./]+$')
+
+def phone_digits(phone_number: Optional[str]) -> Optional[str]:
+    """
+    Reduces a phone number to its digits, the form it is indexed and
+    searched by, or None if it has none.
+    """
+    digits = re.sub(r'\D', '', phone_number or '')
+    return digits or None
 
 class PersonRepository(BaseRepository):
-    def _create_tables(self):
-        with self.conn:
-            self.conn.execute("""
-                CREATE TABLE IF NOT EXISTS people (
-                    id INTEGER PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    phone_number TEXT
-                )
-            """)
+    _columns = ("name", "phone_number", "id")
+    export_columns = ("id", "name", "phone_number")
+    _export_select = "SELECT id, name, phone_number FROM people"
+
+    def __init__(self, db_manager: DatabaseManager, cache: Optional[EntityCache] = None):
+        super().__init__(db_manager, cache)
+        # Whether the people_fts index exists; looked up on the first search
+        self._fts_enabled: Optional[bool] = None
+
+    def _has_fts_index(self) -> bool:
+        with self._read() as conn:
+            return conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'people_fts'"
+            ).fetchone() is not None
+
+    @staticmethod
+    def _row_factory(cursor, row) -> Person:
+        return Person(row[0], row[1], row[2])
 
     def add_person(self, person: Person) -> Person:
         """
         Adds a new person to the database and returns the person with their new ID.
         """
         try:
-            with self.conn:
-                cursor = self.conn.execute(
-                    "INSERT INTO people (name, phone_number) VALUES (?, ?)",
-                    (person.name, person.phone_number)
+            with self._write() as conn:
+                cursor = conn.execute(
+                    "INSERT INTO people (name, phone_number, phone_digits) VALUES (?, ?, ?)",
+                    (person.name, person.phone_number, phone_digits(person.phone_number))
                 )
                 new_id = cursor.lastrowid
                 
@@ -37,20 +67,15 @@ class PersonRepository(BaseRepository):
 
 
     def get_person_by_id(self, person_id: int) -> Person:
-        with self.conn:
-            cursor = self.conn.execute("SELECT * FROM people WHERE id = ?", (person_id,))
-            row = cursor.fetchone()
-            if row:
-                return Person(name=row['name'], phone_number=row['phone_number'], id=row['id'])
-            return None
+        return self._cached(('id', person_id), lambda: self._fetch_person('id', person_id))
 
     def get_person_by_name(self, name: str) -> Person:
-        with self.conn:
-            cursor = self.conn.execute("SELECT * FROM people WHERE name = ?", (name,))
-            row = cursor.fetchone()
-            if row:
-                return Person(name=row['name'], phone_number=row['phone_number'], id=row['id'])
-            return None
+        return self._cached(('name', name), lambda: self._fetch_person('name', name))
+
+    def _fetch_person(self, column: str, value) -> Optional[Person]:
+        with self._read() as conn:
+            cursor = self._query(conn, f"SELECT {self._select_list()} FROM people WHERE {column} = ?", (value,))
+            return cursor.fetchone()
 
     def update_person(self, person_id: int, new_name: str = None, new_phone_number: str = None):
         """
@@ -62,8 +87,8 @@ class PersonRepository(BaseRepository):
             updates.append("name = ?")
             params.append(new_name)
         if new_phone_number is not None:
-            updates.append("phone_number = ?")
-            params.append(new_phone_number)
+            updates.append("phone_number = ?, phone_digits = ?")
+            params.extend((new_phone_number, phone_digits(new_phone_number)))
         
         if not updates:
             return
@@ -72,8 +97,8 @@ class PersonRepository(BaseRepository):
         params.append(person_id)
         
         try:
-            with self.conn:
-                cursor = self.conn.execute(query, tuple(params))
+            with self._write() as conn:
+                cursor = conn.execute(query, tuple(params))
                 # Check the number of affected rows
                 if cursor.rowcount == 0:
                     raise ValueError(f"Person with ID '{person_id}' not found.")
@@ -82,7 +107,135 @@ class PersonRepository(BaseRepository):
 
 
     def get_all_people(self) -> List[Person]:
-        with self.conn:
-            cursor = self.conn.execute("SELECT * FROM people")
-            rows = cursor.fetchall()
-            return [Person(name=row['name'], phone_number=row['phone_number'], id=row['id']) for row in rows]
\ No newline at end of file
+        return list(self.iter_people())
+
+    def iter_people(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> Iterator[Person]:
+        """
+        Streams people in ID order, starting after `after_id` and stopping
+        after `limit` people.
+        """
+        return self._iter_page(f"SELECT {self._select_list()} FROM people", "id", after_id, limit)
+
+    def search_people(self, search_term: str, limit: int) -> List[Person]:
+        """
+        Searches for people by name or phone number, best matches first.
+
+        A term made of digits and phone punctuation is matched against phone
+        numbers reduced to their digits: exact and prefix matches through
+        the phone_digits index first, then numbers containing the digits.
+        Any other term is matched against names containing every word of it,
+        those starting with it ranked highest; if there are none, against
+        names sharing enough trigrams with it to be a likely typo.
+        """
+        term = " ".join(search_term.split())
+        if not term:
+            return []
+        if self._fts_enabled is None:
+            self._fts_enabled = self._has_fts_index()
+
+        with self._read() as conn:
+            if _PHONE_TERM.match(term) and phone_digits(term):
+                return self._search_phones(conn, phone_digits(term), limit)
+            return self._search_names(conn, term, limit)
+
+    def _search_phones(self, conn: sqlite3.Connection, digits: str, limit: int) -> List[Person]:
+        # ':' sorts right after '9', so this range holds every number starting with the digits;
+        # read in index order, an exact match comes before the longer numbers
+        people = self._query(conn, f"""
+            SELECT {self._select_list()} FROM people
+            WHERE phone_digits >= ? AND phone_digits < ?
+            ORDER BY phone_digits, id
+            LIMIT ?
+        """, (digits, digits + ':', limit)).fetchall()
+        if len(people) < limit and len(digits) >= TRIGRAM_LENGTH and self._fts_enabled:
+            people += self._query(conn, f"""
+                SELECT {self._select_list('people')} FROM people_fts
+                JOIN people ON people.id = people_fts.rowid
+                WHERE people_fts MATCH ? AND people.phone_digits NOT LIKE ?
+                ORDER BY bm25(people_fts)
+                LIMIT ?
+            """, (f'phone_digits : "{digits}"', digits + '%', limit - len(people))).fetchall()
+        return people
+
+    def _search_names(self, conn: sqlite3.Connection, term: str, limit: int) -> List[Person]:
+        words = [word for word in term.split() if len(word) >= TRIGRAM_LENGTH]
+        if not self._fts_enabled or not words:
+            return self._search_names_like(conn, term, limit)
+        # Words shorter than a trigram cannot be matched by the index, so LIKE checks them
+        short_words = [f'%{_like_escape(word)}%' for word in term.split() if len(word) < TRIGRAM_LENGTH]
+        short_word_filter = "AND people.name LIKE ? ESCAPE '\\' " * len(short_words)
+
+        # Every word must occur in the name; bm25 favours rarer, closer matches
+        match = "name : (" + " AND ".join(_fts_phrase(word) for word in words) + ")"
+        candidates = self._query(conn, f"""
+            SELECT {self._select_list('people')} FROM people_fts
+            JOIN people ON people.id = people_fts.rowid
+            WHERE people_fts MATCH ? {short_word_filter}
+            ORDER BY bm25(people_fts)
+            LIMIT ?
+        """, (match, *short_words, max(limit, FUZZY_CANDIDATES))).fetchall()
+        folded = term.casefold()
+        # Stable sort: names starting with the term, then a word starting with it, then bm25 order
+        candidates.sort(key=lambda person: (
+            not person.name.casefold().startswith(folded),
+            not any(word.startswith(folded) for word in person.name.casefold().split()),
+        ))
+        if candidates:
+            return candidates[:limit]
+        # Trigram ORs match many names, so typos are only looked for when nothing matched as typed
+        return self._search_names_fuzzy(conn, folded, limit)
+
+    def _search_names_fuzzy(self, conn: sqlite3.Connection, folded: str, limit: int) -> List[Person]:
+        """
+        Finds names that share trigrams with the term, such as typos of it,
+        and keeps those similar enough to it, most similar first.
+        """
+        trigrams = {
+            word[i:i + TRIGRAM_LENGTH]
+            for word in folded.split()
+            for i in range(len(word) - TRIGRAM_LENGTH + 1)
+        }
+        if not trigrams:
+            return []
+        match = "name : (" + " OR ".join(_fts_phrase(trigram) for trigram in sorted(trigrams)) + ")"
+        candidates = self._query(conn, f"""
+            SELECT {self._select_list('people')} FROM people_fts
+            JOIN people ON people.id = people_fts.rowid
+            WHERE people_fts MATCH ?
+            ORDER BY bm25(people_fts)
+            LIMIT ?
+        """, (match, FUZZY_CANDIDATES)).fetchall()
+
+        scored = []
+        for person in candidates:
+            name = person.name.casefold()
+            # Compared with the whole name and with each word, so a typo in a surname still scores high
+            similarity = max(
+                SequenceMatcher(None, folded, part).ratio() for part in [name, *name.split()]
+            )
+            if similarity >= FUZZY_MIN_SIMILARITY:
+                scored.append((-similarity, person.id, person))
+        scored.sort(key=lambda entry: entry[:2])
+        return [person for _, _, person in scored[:limit]]
+
+    def _search_names_like(self, conn: sqlite3.Connection, term: str, limit: int) -> List[Person]:
+        # Without a trigram index, or for terms too short for it, every name is scanned
+        escaped = _like_escape(term)
+        return self._query(conn, f"""
+            SELECT {self._select_list()} FROM people
+            WHERE name LIKE ? ESCAPE '\\'
+            ORDER BY name NOT LIKE ? ESCAPE '\\', name
+            LIMIT ?
+        """, (f'%{escaped}%', f'{escaped}%', limit)).fetchall()
+
+def _like_escape(text: str) -> str:
+    """
+    Escapes the LIKE wildcards in text, for patterns used with ESCAPE '\\'.
+    """
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def _fts_phrase(text: str) -> str:
+    """
+    Quotes text as an FTS5 string, so its characters are matched literally.
+    """
+    return '"' + text.replace('"', '""') + '"'
@@ -0,0 +1,68 @@
+from typing import List, Optional
+
+from library.models.models import AuthorCount, BorrowerCount, LibrarySummary
+from library.data.base_repository import BaseRepository
+
+class StatsRepository(BaseRepository):
+    """
+    Reads the library's statistics. The hot counters come from the
+    library_counters and borrower_loan_counts tables, which triggers keep up
+    to date (see migrations.py), so reading them costs the same however
+    large the catalog is; the rest are aggregate queries.
+    """
+
+    def get_summary(self) -> LibrarySummary:
+        """
+        Returns the total number of books and how many are on loan.
+        """
+        with self._read() as conn:
+            counters = dict(conn.execute("SELECT name, value FROM library_counters"))
+        return LibrarySummary(counters.get('books', 0), counters.get('books_on_loan', 0))
+
+    def get_active_loans(self, person_id: int) -> int:
+        """
+        Returns the number of books a person currently has on loan.
+        """
+        with self._read() as conn:
+            row = conn.execute(
+                "SELECT active_loans FROM borrower_loan_counts WHERE person_id = ?", (person_id,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def get_busiest_borrowers(self, limit: Optional[int] = None) -> List[BorrowerCount]:
+        """
+        Returns the people with books on loan, most loans first. Read from
+        the top of the counters' index, so only `limit` rows are visited.
+        """
+        query = """
+            SELECT c.person_id, p.name, c.active_loans
+            FROM borrower_loan_counts AS c
+            LEFT JOIN people AS p ON p.id = c.person_id
+            ORDER BY c.active_loans DESC, c.person_id
+        """
+        params = []
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._read() as conn:
+            cursor = self._query(conn, query, params, lambda cursor, row: BorrowerCount(row[0], row[1], row[2]))
+            return cursor.fetchall()
+
+    def get_books_per_author(self, limit: Optional[int] = None) -> List[AuthorCount]:
+        """
+        Returns the number of books of each author, largest first. Grouping
+        walks the author index instead of sorting the books; only the one
+        row per author is sorted by count.
+        """
+        query = """
+            SELECT author, COUNT(*) AS books FROM books
+            GROUP BY author
+            ORDER BY books DESC, author
+        """
+        params = []
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._read() as conn:
+            cursor = self._query(conn, query, params, lambda cursor, row: AuthorCount(row[0], row[1]))
+            return cursor.fetchall()
@@ -0,0 +1,207 @@
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+@dataclass
+class StatementStats:
+    statement: str
+    count: int = 0
+    rows: int = 0
+    total_s: float = 0.0
+    # The slowest single execution, fetching its rows included
+    max_s: float = 0.0
+
+    @property
+    def mean_s(self) -> float:
+        return self.total_s / self.count if self.count else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            'statement': self.statement,
+            'count': self.count,
+            'rows': self.rows,
+            'total_ms': round(self.total_s * 1000, 3),
+            'mean_ms': round(self.mean_s * 1000, 3),
+            'max_ms': round(self.max_s * 1000, 3),
+        }
+
+
+class QueryTracer:
+    """
+    Records how often each SQL statement runs, the rows it returns and the
+    time spent executing it and fetching its rows, for the connections made
+    by `connection_factory`.
+
+    Statements are grouped by their text with bound parameters left as
+    placeholders, so a lookup repeated for every row of a listing (an N+1
+    pattern) shows up as one statement with a large count.
+
+    `echo`, if given, is also called with every statement SQLite runs,
+    values and trigger bodies included, through `set_trace_callback`.
+    """
+
+    def __init__(self, echo: Optional[Callable[[str], None]] = None):
+        self._echo = echo
+        self._lock = threading.Lock()
+        self._stats: Dict[str, StatementStats] = {}
+        # Statement texts seen so far, mapped to their normalized form
+        self._normalized: Dict[str, str] = {}
+        self.started = time.perf_counter()
+
+    def connection_factory(self, *args, **kwargs) -> sqlite3.Connection:
+        """
+        Opens a traced connection; pass as `factory` to `sqlite3.connect`.
+        """
+        return TracedConnection(*args, tracer=self, **kwargs)
+
+    def attach(self, conn: sqlite3.Connection):
+        if self._echo is not None:
+            conn.set_trace_callback(self._echo)
+
+    def normalize(self, sql: str) -> str:
+        normalized = self._normalized.get(sql)
+        if normalized is None:
+            normalized = self._normalized[sql] = " ".join(sql.split())
+        return normalized
+
+    def record(self, statement: str, elapsed: float, executions: int = 0, rows: int = 0, execution_s: float = 0.0):
+        """
+        Adds `elapsed` seconds and `rows` rows to a normalized statement.
+        `execution_s` is the running time of the current execution, for the
+        maximum.
+        """
+        with self._lock:
+            stats = self._stats.get(statement)
+            if stats is None:
+                stats = self._stats[statement] = StatementStats(statement)
+            stats.count += executions
+            stats.rows += rows
+            stats.total_s += elapsed
+            if execution_s > stats.max_s:
+                stats.max_s = execution_s
+
+    def statements(self) -> List[StatementStats]:
+        """
+        Returns a snapshot of every statement's figures, by total time spent.
+        """
+        with self._lock:
+            stats = [StatementStats(**vars(entry)) for entry in self._stats.values()]
+        return sorted(stats, key=lambda entry: entry.total_s, reverse=True)
+
+    def reset(self):
+        """
+        Drops the figures collected so far and restarts the wall clock.
+        """
+        with self._lock:
+            self._stats.clear()
+        self.started = time.perf_counter()
+
+
+class TracedCursor(sqlite3.Cursor):
+    """
+    A cursor that reports its executions and fetches to the tracer of its
+    connection. Rows are produced lazily by SQLite, so the time spent in
+    fetches counts towards the statement that produced them.
+    """
+
+    _statement: Optional[str] = None
+    _execution_s = 0.0
+
+    def _timed(self, method, *args, executions: int = 0, statement: Optional[str] = None):
+        tracer = self.connection.tracer
+        if statement is not None:
+            self._statement = tracer.normalize(statement)
+            self._execution_s = 0.0
+        rows = 0
+        started = time.perf_counter()
+        try:
+            result = method(*args)
+            if executions == 0 and isinstance(result, list):
+                rows = len(result)
+            return result
+        finally:
+            elapsed = time.perf_counter() - started
+            self._execution_s += elapsed
+            if self._statement is not None:
+                tracer.record(self._statement, elapsed, executions, rows, self._execution_s)
+
+    def execute(self, sql, parameters=()):
+        return self._timed(super().execute, sql, parameters, executions=1, statement=sql)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._timed(super().executemany, sql, seq_of_parameters, executions=1, statement=sql)
+
+    def executescript(self, sql_script):
+        return self._timed(super().executescript, sql_script, executions=1, statement=sql_script)
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        if row is not None and self._statement is not None:
+            self.connection.tracer.record(self._statement, 0.0, rows=1)
+        return row
+
+    def fetchmany(self, size=None):
+        return self._timed(super().fetchmany, self.arraysize if size is None else size)
+
+    def fetchall(self):
+        return self._timed(super().fetchall)
+
+    def __next__(self):
+        row = self._timed(super().__next__)
+        if self._statement is not None:
+            self.connection.tracer.record(self._statement, 0.0, rows=1)
+        return row
+
+
+class TracedConnection(sqlite3.Connection):
+    """
+    A connection whose cursors are TracedCursors and whose commits and
+    rollbacks are timed as statements of their own.
+    """
+
+    def __init__(self, *args, tracer: QueryTracer, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.tracer = tracer
+        tracer.attach(self)
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+    def _timed_end(self, name: str, method):
+        if not self.in_transaction:
+            return method()
+        started = time.perf_counter()
+        try:
+            return method()
+        finally:
+            elapsed = time.perf_counter() - started
+            self.tracer.record(name, elapsed, 1, 0, elapsed)
+
+    def commit(self):
+        return self._timed_end("COMMIT", super().commit)
+
+    def rollback(self):
+        return self._timed_end("ROLLBACK", super().rollback)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # The built-in __exit__ commits without going through commit()
+        if exc_type is not None:
+            self.rollback()
+            return False
+        try:
+            self.commit()
+        except BaseException:
+            self.rollback()
+            raise
+        return False
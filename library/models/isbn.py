@@ -0,0 +1,55 @@
+import re
+from typing import Optional
+
+# Hyphens and spaces between the groups of an ISBN, as printed on books
+_SEPARATORS = re.compile(r'[\s\-]+')
+# An optional 'ISBN', 'ISBN-10:' or 'ISBN-13:' label in front of the number
+_LABEL = re.compile(r'^ISBN(?:-?1[03])?:?', re.IGNORECASE)
+
+def _is_ascii_digits(text: str) -> bool:
+    # str.isdigit() also accepts other scripts' digits, such as fullwidth '０'
+    return text.isascii() and text.isdigit()
+
+def _isbn13_check_digit(first_twelve: str) -> str:
+    # Sums the ASCII codes and takes off the six '0's of each half, instead of an int() per digit
+    codes = first_twelve.encode('ascii')
+    return str(-(sum(codes[0::2]) + 3 * sum(codes[1::2]) - 4 * 6 * ord('0')) % 10)
+
+def _isbn10_is_valid(isbn: str) -> bool:
+    if not re.fullmatch(r'[0-9]{9}[0-9X]', isbn):
+        return False
+    total = sum((10 - i) * (10 if char == 'X' else int(char)) for i, char in enumerate(isbn))
+    return total % 11 == 0
+
+def to_isbn13(isbn: Optional[str]) -> Optional[str]:
+    """
+    Returns the ISBN-13 of an ISBN-10 or ISBN-13 written with or without
+    hyphens, spaces and an 'ISBN' label, or None if it is not a valid one.
+
+    '978-0-13-468599-1', 'ISBN 9780134685991' and '0-13-468599-7' all
+    give '9780134685991', the form books are stored and looked up by.
+    """
+    if not isbn:
+        return None
+    # Most ISBNs are stored compact already, so the regular expressions are skipped for them
+    compact = isbn if _is_ascii_digits(isbn) else _SEPARATORS.sub('', _LABEL.sub('', isbn.strip()).strip()).upper()
+    if len(compact) == 13:
+        if _is_ascii_digits(compact) and compact[:3] in ('978', '979') and _isbn13_check_digit(compact[:12]) == compact[12]:
+            return compact
+        return None
+    if len(compact) == 10 and _isbn10_is_valid(compact):
+        return '978' + compact[:9] + _isbn13_check_digit('978' + compact[:9])
+    return None
+
+def validate_isbn(isbn: Optional[str]) -> str:
+    """
+    Checks that `isbn` is a valid ISBN-10 or ISBN-13 and returns its
+    ISBN-13, like to_isbn13.
+
+    Raises:
+        ValueError: If it is not a valid ISBN-10 or ISBN-13.
+    """
+    isbn13 = to_isbn13(isbn)
+    if isbn13 is None:
+        raise ValueError(f"'{isbn}' is not a valid ISBN-10 or ISBN-13.")
+    return isbn13
@@ -0,0 +1,399 @@
+import json
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, is_dataclass
+from datetime import date
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from library.data.cache import EntityCache
+from library.services.book_service import BookService
+from library.services.loan_service import LoanService
+from library.services.person_service import PersonService
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+MAX_BODY_BYTES = 1024 * 1024
+# Latencies kept per route for the percentiles; older samples are dropped.
+LATENCY_SAMPLES = 10000
+
+class ApiError(Exception):
+    """
+    An error answered to the client with an HTTP status and a message.
+    """
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class LatencyStats:
+    """
+    Collects request latencies per route and reports their percentiles.
+    """
+
+    def __init__(self, samples: int = LATENCY_SAMPLES):
+        self._samples = samples
+        self._lock = threading.Lock()
+        self._latencies: Dict[str, deque] = {}
+        self._counts: Dict[str, int] = {}
+
+    def record(self, route: str, seconds: float):
+        with self._lock:
+            if route not in self._latencies:
+                self._latencies[route] = deque(maxlen=self._samples)
+                self._counts[route] = 0
+            self._latencies[route].append(seconds)
+            self._counts[route] += 1
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returns the request count and the p50, p90, p99 and maximum latency,
+        in milliseconds, of every route over its recent requests.
+        """
+        with self._lock:
+            snapshot = {route: (self._counts[route], sorted(values)) for route, values in self._latencies.items()}
+        summary = {}
+        for route, (count, values) in sorted(snapshot.items()):
+            summary[route] = {
+                'count': count,
+                'p50_ms': self._percentile(values, 0.50) * 1000,
+                'p90_ms': self._percentile(values, 0.90) * 1000,
+                'p99_ms': self._percentile(values, 0.99) * 1000,
+                'max_ms': values[-1] * 1000,
+            }
+        return summary
+
+    @staticmethod
+    def _percentile(values: List[float], fraction: float) -> float:
+        return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def _route(method: str, pattern: str):
+    """
+    Marks a LibraryAPI method as the handler of `method` requests whose path
+    matches `pattern`. Named groups are passed to it as arguments.
+    """
+    def decorator(func):
+        name = re.sub(r'\(\?P<(\w+)>[^)]*\)', r'{\1}', pattern)
+        func.route = (method, re.compile(f"^{pattern}$"), f"{method} {name}")
+        return func
+    return decorator
+
+
+class LibraryAPI:
+    """
+    Maps JSON requests onto the book, person and loan services.
+
+    Handlers return a JSON-serializable result. Missing entities are
+    answered with 404 and the services' ValueErrors with 400.
+    """
+
+    def __init__(self, book_service: BookService, person_service: PersonService, loan_service: LoanService):
+        self.book_service = book_service
+        self.person_service = person_service
+        self.loan_service = loan_service
+        self.routes = [
+            getattr(self, name).route + (getattr(self, name),)
+            for name in dir(type(self)) if hasattr(getattr(type(self), name), 'route')
+        ]
+
+    def dispatch(self, method: str, path: str, query: Dict[str, List[str]], body: Any) -> Tuple[str, Any]:
+        """
+        Runs the handler of a request and returns the route name, for
+        metrics, with the handler's result.
+
+        Raises:
+            ApiError: If no route matches or the request is invalid.
+        """
+        allowed = False
+        for route_method, pattern, name, handler in self.routes:
+            match = pattern.match(path)
+            if not match:
+                continue
+            if route_method != method:
+                allowed = True
+                continue
+            arguments = {key: unquote(value) for key, value in match.groupdict().items()}
+            try:
+                return name, handler(query, body, **arguments)
+            except ValueError as e:
+                raise ApiError(404 if "not found" in str(e) else 400, str(e))
+        if allowed:
+            raise ApiError(405, f"Method {method} not allowed for {path}.")
+        raise ApiError(404, f"No route for {path}.")
+
+    # Books
+
+    @_route('GET', r'/books')
+    def list_books(self, query, body):
+        after_id, limit = _page(query)
+        return _page_result(list(self.book_service.iter_books(after_id=after_id, limit=limit)))
+
+    @_route('POST', r'/books')
+    def add_book(self, query, body):
+        fields = _fields(body, 'title', 'author', 'isbn')
+        return self.book_service.add_new_book(*fields)
+
+    @_route('GET', r'/books/search')
+    def search_books(self, query, body):
+        term = _param(query, 'q')
+        if not term:
+            raise ApiError(400, "Missing search term 'q'.")
+        return self.book_service.search_books(term, limit=_limit(query))
+
+    @_route('GET', r'/books/isbn/(?P<isbn>[^/]+)')
+    def get_book_by_isbn(self, query, body, isbn):
+        return _found(self.book_service.get_book_by_isbn(isbn), f"Book with ISBN '{isbn}' not found.")
+
+    @_route('GET', r'/books/(?P<book_id>\d+)')
+    def get_book(self, query, body, book_id):
+        return _found(self.book_service.get_book_by_id(int(book_id)), f"Book with ID '{book_id}' not found.")
+
+    # People
+
+    @_route('GET', r'/people')
+    def list_people(self, query, body):
+        after_id, limit = _page(query)
+        return _page_result(list(self.person_service.iter_people(after_id=after_id, limit=limit)))
+
+    @_route('POST', r'/people')
+    def add_person(self, query, body):
+        name, = _fields(body, 'name')
+        return self.person_service.add_new_person(name, _optional_field(body, 'phone_number'))
+
+    @_route('GET', r'/people/search')
+    def search_people(self, query, body):
+        term = _param(query, 'q')
+        if not term:
+            raise ApiError(400, "Missing search term 'q'.")
+        return self.person_service.search_people(term, limit=_limit(query))
+
+    @_route('GET', r'/people/(?P<person_id>\d+)')
+    def get_person(self, query, body, person_id):
+        return _found(self.person_service.get_person_by_id(int(person_id)), f"Person with ID '{person_id}' not found.")
+
+    @_route('PATCH', r'/people/(?P<person_id>\d+)')
+    def update_person(self, query, body, person_id):
+        self.person_service.update_person(
+            int(person_id), _optional_field(body, 'name'), _optional_field(body, 'phone_number')
+        )
+        return self.person_service.get_person_by_id(int(person_id))
+
+    # Loans
+
+    @_route('GET', r'/loans')
+    def list_loans(self, query, body):
+        after_id, limit = _page(query)
+        person_id = _int_param(query, 'person_id', None)
+        return _page_result(list(self.loan_service.iter_loan_views(after_id=after_id, limit=limit, person_id=person_id)))
+
+    @_route('POST', r'/loans/borrow')
+    def borrow(self, query, body):
+        book_id, person_id = _fields(body, 'book_id', 'person_id', kind=int)
+        return self.loan_service.lend_book(book_id, person_id, _optional_field(body, 'days', int, 14))
+
+    @_route('POST', r'/loans/return')
+    def return_book(self, query, body):
+        book_id, = _fields(body, 'book_id', kind=int)
+        self.loan_service.return_book(book_id)
+        return {'book_id': book_id, 'returned': True}
+
+    @_route('POST', r'/loans/borrow-many')
+    def borrow_many(self, query, body):
+        items = _optional_field(body, 'items', list, [])
+        requests = [tuple(_fields(item, 'book_id', 'person_id', kind=int)) for item in items]
+        return self.loan_service.lend_books(requests, _optional_field(body, 'days', int, 14))
+
+    @_route('POST', r'/loans/return-many')
+    def return_many(self, query, body):
+        book_ids = _optional_field(body, 'book_ids', list, [])
+        if not all(isinstance(book_id, int) for book_id in book_ids):
+            raise ApiError(400, "'book_ids' must be a list of integers.")
+        return self.loan_service.return_books(book_ids)
+
+
+def _param(query: Dict[str, List[str]], name: str) -> Optional[str]:
+    values = query.get(name)
+    return values[-1] if values else None
+
+def _int_param(query: Dict[str, List[str]], name: str, default: Optional[int]) -> Optional[int]:
+    value = _param(query, name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ApiError(400, f"Query parameter '{name}' must be an integer.")
+
+def _limit(query: Dict[str, List[str]]) -> int:
+    limit = _int_param(query, 'limit', DEFAULT_PAGE_SIZE)
+    if not 0 < limit <= MAX_PAGE_SIZE:
+        raise ApiError(400, f"'limit' must be between 1 and {MAX_PAGE_SIZE}.")
+    return limit
+
+def _page(query: Dict[str, List[str]]) -> Tuple[Optional[int], int]:
+    return _int_param(query, 'after', None), _limit(query)
+
+def _page_result(items: list) -> Dict[str, Any]:
+    """
+    Wraps a page of a listing with the ID to pass as `after` for the next one.
+    """
+    return {'items': items, 'next_after': items[-1].id if items else None}
+
+def _found(entity, message: str):
+    if entity is None:
+        raise ApiError(404, message)
+    return entity
+
+def _fields(body: Any, *names: str, kind: type = str) -> list:
+    if not isinstance(body, dict):
+        raise ApiError(400, "Expected a JSON object.")
+    missing = [name for name in names if body.get(name) in (None, '')]
+    if missing:
+        raise ApiError(400, f"Missing field(s): {', '.join(missing)}.")
+    return [_checked(body[name], name, kind) for name in names]
+
+def _optional_field(body: Any, name: str, kind: type = str, default=None):
+    value = body.get(name) if isinstance(body, dict) else None
+    return default if value is None else _checked(value, name, kind)
+
+def _checked(value, name: str, kind: type):
+    # bool is an int subclass, but never a valid ID or count
+    if not isinstance(value, kind) or (kind is int and isinstance(value, bool)):
+        raise ApiError(400, f"Field '{name}' must be of type {kind.__name__}.")
+    return value
+
+def _to_json(value):
+    if is_dataclass(value):
+        data = asdict(value)
+        if hasattr(value, 'ok'):
+            data['ok'] = value.ok
+        return data
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+class LibraryRequestHandler(BaseHTTPRequestHandler):
+    """
+    Answers one client connection. Connections are kept alive between
+    requests, so a client pays the TCP handshake only once.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'library'
+    # Small JSON responses must not wait for Nagle's algorithm
+    disable_nagle_algorithm = True
+    # Idle keep-alive connections are closed after this many seconds, so they
+    # do not hold a worker forever.
+    timeout = 5
+
+    def do_GET(self):
+        self._handle()
+
+    def do_POST(self):
+        self._handle()
+
+    def do_PATCH(self):
+        self._handle()
+
+    def _handle(self):
+        started = time.perf_counter()
+        route = f"{self.command} (unmatched)"
+        try:
+            url = urlsplit(self.path)
+            body = self._read_body()
+            path = url.path.rstrip('/') or '/'
+            if self.command == 'GET' and path == '/metrics':
+                route, result = 'GET /metrics', self.server.metrics()
+            else:
+                route, result = self.server.api.dispatch(self.command, path, parse_qs(url.query), body)
+            self._send(200, result)
+        except ApiError as e:
+            self._send(e.status, {'error': str(e)})
+        except Exception as e:
+            self._send(500, {'error': f"Internal error: {e}"})
+        finally:
+            self.server.stats.record(route, time.perf_counter() - started)
+
+    def _read_body(self):
+        header = self.headers.get('Content-Length') or '0'
+        if not (header.isascii() and header.isdigit()):
+            # The body cannot be told apart from the next request
+            self.close_connection = True
+            raise ApiError(400, "Content-Length must be a non-negative integer.")
+        length = int(header)
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            raise ApiError(413, "Request body too large.")
+        if not length:
+            return None
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            raise ApiError(400, "Request body is not valid JSON.")
+
+    def _send(self, status: int, payload):
+        data = json.dumps(payload, default=_to_json).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class LibraryServer(HTTPServer):
+    """
+    An HTTP server that hands each accepted connection to a fixed pool of
+    worker threads. The services, and the pooled database connections behind
+    them, live as long as the server, so requests never pay for startup.
+    """
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        api: LibraryAPI,
+        workers: int = 8,
+        verbose: bool = False,
+        caches: Optional[Dict[str, EntityCache]] = None,
+    ):
+        super().__init__(address, LibraryRequestHandler)
+        self.api = api
+        self.stats = LatencyStats()
+        self.caches = dict(caches or {})
+        self.verbose = verbose
+        self._workers = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='library-http')
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Returns the latency percentiles of every route and the counters of
+        the lookup caches.
+        """
+        return {
+            'routes': self.stats.summary(),
+            'caches': {name: cache.stats.as_dict() for name, cache in self.caches.items()},
+        }
+
+    def process_request(self, request, client_address):
+        self._workers.submit(self._process_request, request, client_address)
+
+    def _process_request(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self._workers.shutdown(wait=True)
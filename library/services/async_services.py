@@ -0,0 +1,119 @@
+from datetime import date
+from typing import AsyncIterator, Iterable, List, Optional, Tuple
+
+from library.models.models import Book, CirculationResult, DedupeResult, ImportResult, Loan, LoanView, Person
+from library.data.async_executor import AsyncExecutor
+from library.services.book_service import BookService
+from library.services.loan_service import LoanService
+from library.services.person_service import DEFAULT_SEARCH_LIMIT, PersonService
+
+class AsyncBookService:
+    """
+    Awaitable counterpart of BookService for use inside an event loop.
+
+    Each call runs the synchronous service on the executor, so validation,
+    results and raised errors are exactly those of BookService.
+    """
+
+    def __init__(self, book_service: BookService, executor: AsyncExecutor):
+        self.book_service = book_service
+        self.executor = executor
+
+    async def add_new_book(self, title: str, author: str, isbn: str) -> Book:
+        return await self.executor.run(self.book_service.add_new_book, title, author, isbn)
+
+    async def add_books(self, rows: Iterable[Tuple[str, str, str]], batch_size: int = 1000) -> ImportResult:
+        return await self.executor.run(self.book_service.add_books, list(rows), batch_size)
+
+    async def get_book_by_id(self, book_id: int) -> Book:
+        return await self.executor.run(self.book_service.get_book_by_id, book_id)
+
+    async def get_book_by_isbn(self, isbn: str) -> Book:
+        return await self.executor.run(self.book_service.get_book_by_isbn, isbn)
+
+    async def get_all_books(self) -> List[Book]:
+        return await self.executor.run(self.book_service.get_all_books)
+
+    def iter_books(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> AsyncIterator[Book]:
+        """
+        Streams books in ID order, one page per executor call.
+        """
+        return self.executor.iter_pages(self.book_service.iter_books, after_id, limit)
+
+    async def search_books(self, search_term: str, limit: Optional[int] = None) -> List[Book]:
+        return await self.executor.run(self.book_service.search_books, search_term, limit)
+
+    async def dedupe_books(self, dry_run: bool = False) -> DedupeResult:
+        return await self.executor.run(self.book_service.dedupe_books, dry_run)
+
+
+class AsyncPersonService:
+    """
+    Awaitable counterpart of PersonService.
+    """
+
+    def __init__(self, person_service: PersonService, executor: AsyncExecutor):
+        self.person_service = person_service
+        self.executor = executor
+
+    async def add_new_person(self, name: str, phone_number: str) -> Person:
+        return await self.executor.run(self.person_service.add_new_person, name, phone_number)
+
+    async def update_person(self, person_id: int, new_name: str = None, new_phone_number: str = None):
+        await self.executor.run(self.person_service.update_person, person_id, new_name, new_phone_number)
+
+    async def get_person_by_name(self, name: str) -> Person:
+        return await self.executor.run(self.person_service.get_person_by_name, name)
+
+    async def get_person_by_id(self, person_id: int) -> Person:
+        return await self.executor.run(self.person_service.get_person_by_id, person_id)
+
+    async def get_all_people(self) -> List[Person]:
+        return await self.executor.run(self.person_service.get_all_people)
+
+    def iter_people(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> AsyncIterator[Person]:
+        return self.executor.iter_pages(self.person_service.iter_people, after_id, limit)
+
+    async def search_people(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT) -> List[Person]:
+        return await self.executor.run(self.person_service.search_people, query, limit)
+
+
+class AsyncLoanService:
+    """
+    Awaitable counterpart of LoanService. Lending and returning stay atomic:
+    each call runs whole in one transaction on a worker thread.
+    """
+
+    def __init__(self, loan_service: LoanService, executor: AsyncExecutor):
+        self.loan_service = loan_service
+        self.executor = executor
+
+    async def lend_book(self, book_id: int, person_id: int, loan_period_days: int = 14) -> Loan:
+        return await self.executor.run(self.loan_service.lend_book, book_id, person_id, loan_period_days)
+
+    async def return_book(self, book_id: int):
+        await self.executor.run(self.loan_service.return_book, book_id)
+
+    async def lend_books(self, requests: Iterable[Tuple[int, int]], loan_period_days: int = 14) -> List[CirculationResult]:
+        return await self.executor.run(self.loan_service.lend_books, list(requests), loan_period_days)
+
+    async def return_books(self, book_ids: Iterable[int]) -> List[CirculationResult]:
+        return await self.executor.run(self.loan_service.return_books, list(book_ids))
+
+    async def get_loan_views(self, person_id: Optional[int] = None) -> List[LoanView]:
+        return await self.executor.run(self.loan_service.get_loan_views, person_id)
+
+    def iter_loan_views(
+        self, after_id: Optional[int] = None, limit: Optional[int] = None, person_id: Optional[int] = None
+    ) -> AsyncIterator[LoanView]:
+        return self.executor.iter_pages(
+            lambda after, size: self.loan_service.iter_loan_views(after, size, person_id), after_id, limit
+        )
+
+    async def iter_overdue_loan_views(self, as_of: Optional[date] = None) -> AsyncIterator[LoanView]:
+        for view in await self.executor.run(lambda: list(self.loan_service.iter_overdue_loan_views(as_of))):
+            yield view
+
+    async def iter_loan_views_due_soon(self, days: int, as_of: Optional[date] = None) -> AsyncIterator[LoanView]:
+        for view in await self.executor.run(lambda: list(self.loan_service.iter_loan_views_due_soon(days, as_of))):
+            yield view
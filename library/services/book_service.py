@@ -1,7 +1,8 @@
 # library/services/book_service.py
 
-from typing import List
-from library.models.models import Book
+from typing import Iterable, Iterator, List, Optional, Tuple
+from library.models.isbn import validate_isbn
+from library.models.models import Book, DedupeResult, ImportResult, RejectedRow
 from library.data.book_repository import BookRepository
 
 class BookService:
@@ -11,21 +12,88 @@ class BookService:
     def add_new_book(self, title: str, author: str, isbn: str) -> Book:
         if not all([title, author, isbn]):
             raise ValueError("Title, author, and ISBN cannot be empty.")
-            
+        validate_isbn(isbn)
+
         new_book = Book(title, author, isbn)
         return self.book_repository.add_book(new_book)
 
+    def add_books(self, rows: Iterable[Tuple[str, str, str]], batch_size: int = 1000) -> ImportResult:
+        """
+        Validates and adds many books in a single transaction. Rows with an
+        empty field or an ISBN that is not a valid ISBN-10 or ISBN-13 are
+        rejected.
+
+        Args:
+            rows: An iterable of (title, author, isbn) tuples.
+            batch_size: The number of rows inserted per database batch.
+
+        Returns:
+            An ImportResult with the number of imported books and one
+            RejectedRow (numbered from 1) for every row that was skipped.
+        """
+        result = ImportResult()
+        # Line numbers of the rows handed to the repository, so rejects
+        # reported by position can be traced back to their source row.
+        accepted_lines = []
+
+        def valid_books():
+            for line, (title, author, isbn) in enumerate(rows, start=1):
+                if not all([title, author, isbn]):
+                    result.rejected.append(RejectedRow(line, title, isbn, "Title, author, and ISBN cannot be empty."))
+                    continue
+                try:
+                    validate_isbn(isbn)
+                except ValueError as e:
+                    result.rejected.append(RejectedRow(line, title, isbn, str(e)))
+                    continue
+                accepted_lines.append(line)
+                yield Book(title, author, isbn)
+
+        duplicates = self.book_repository.add_books(valid_books(), batch_size=batch_size)
+        for index, book in duplicates:
+            reason = f"Book with ISBN '{book.isbn}' already exists."
+            result.rejected.append(RejectedRow(accepted_lines[index], book.title, book.isbn, reason))
+        result.rejected.sort(key=lambda reject: reject.line)
+        result.imported = len(accepted_lines) - len(duplicates)
+        return result
+
     def get_book_by_id(self, book_id: int) -> Book:
         return self.book_repository.get_book_by_id(book_id)
 
     def get_book_by_isbn(self, isbn: str) -> Book:
         """
-        Retrieves a book by its ISBN from the repository.
+        Retrieves a book by its ISBN from the repository, in ISBN-10 or
+        ISBN-13 form, with or without hyphens.
         """
         return self.book_repository.get_book_by_isbn(isbn)
 
     def get_all_books(self) -> List[Book]:
         return self.book_repository.get_all_books()
 
-    def search_books(self, search_term: str) -> List[Book]:
-        return self.book_repository.search_books(search_term)
\ No newline at end of file
+    def iter_books(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> Iterator[Book]:
+        """
+        Streams books in ID order, one page at a time.
+
+        Args:
+            after_id: Only return books with an ID greater than this.
+            limit: The maximum number of books to return.
+        """
+        return self.book_repository.iter_books(after_id=after_id, limit=limit)
+
+    def search_books(self, search_term: str, limit: Optional[int] = None) -> List[Book]:
+        return self.book_repository.search_books(search_term, limit=limit)
+
+    def dedupe_books(self, dry_run: bool = False) -> DedupeResult:
+        """
+        Merges the books stored under the same ISBN, in the same or in
+        different notations, keeping one book per ISBN.
+
+        Args:
+            dry_run: Only report what would be merged.
+
+        Returns:
+            A DedupeResult with the number of duplicated ISBNs, the books
+            removed and the ISBNs that could not be merged because more than
+            one of their books is on loan.
+        """
+        return self.book_repository.merge_duplicate_books(dry_run=dry_run)
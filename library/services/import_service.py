@@ -0,0 +1,139 @@
+import csv
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from library.models.models import ImportCheckpoint, RejectedRow
+from library.data.import_checkpoint_repository import ImportCheckpointRepository
+from library.services.book_service import BookService
+
+REQUIRED_HEADERS = ('title', 'author', 'isbn')
+
+class ImportService:
+    """
+    Streams large CSV catalogs into the library in fixed-size batches.
+
+    Only one batch is held in memory at a time. Every batch is committed in
+    one transaction with a checkpoint of the byte offset and row count it
+    reaches, so an interrupted import can be resumed from where it stopped
+    instead of starting over, without replaying any row.
+    """
+
+    def __init__(self, book_service: BookService, checkpoint_repository: ImportCheckpointRepository):
+        self.book_service = book_service
+        self.checkpoint_repository = checkpoint_repository
+
+    def get_checkpoint(self, csv_file: str) -> Optional[ImportCheckpoint]:
+        """
+        Returns the saved checkpoint of an interrupted import of `csv_file`, if any.
+        """
+        return self.checkpoint_repository.get_checkpoint(str(Path(csv_file).resolve()))
+
+    def import_books_csv(
+        self,
+        csv_file: str,
+        batch_size: int = 1000,
+        resume: bool = False,
+        on_progress: Optional[Callable[[ImportCheckpoint], None]] = None,
+        on_reject: Optional[Callable[[RejectedRow], None]] = None,
+    ) -> ImportCheckpoint:
+        """
+        Imports books from a CSV file with the headers title, author and isbn.
+
+        Args:
+            csv_file: The path to the CSV file.
+            batch_size: The number of rows committed per batch.
+            resume: Continue from the saved checkpoint for this file, if any.
+            on_progress: Called with the running totals after every batch.
+            on_reject: Called for every row that could not be imported.
+
+        Returns:
+            The final totals. When resuming, they include the rows imported
+            before the interruption.
+
+        Raises:
+            ValueError: If the CSV headers are missing or the saved checkpoint
+                        does not fit the file.
+        """
+        path = Path(csv_file)
+        source = str(path.resolve())
+
+        checkpoint = ImportCheckpoint(source)
+        if resume:
+            checkpoint = self.get_checkpoint(csv_file) or checkpoint
+            if checkpoint.byte_offset > path.stat().st_size:
+                raise ValueError(f"Checkpoint for '{csv_file}' is past the end of the file. Was the file replaced?")
+
+        with open(path, mode='rb') as file:
+            header, header_end = self._read_header(file)
+            missing = [name for name in REQUIRED_HEADERS if name not in header]
+            if missing:
+                raise ValueError(f"Invalid CSV format. Missing required header(s): {', '.join(missing)}.")
+            columns = [header.index(name) for name in REQUIRED_HEADERS]
+
+            checkpoint.byte_offset = max(checkpoint.byte_offset, header_end)
+            file.seek(checkpoint.byte_offset)
+            records = self._read_records(file, checkpoint.byte_offset)
+
+            while True:
+                batch = list(islice(records, batch_size))
+                if not batch:
+                    break
+                rows = [tuple(self._field(record, column) for column in columns) for record, _ in batch]
+                # The books and the checkpoint covering them commit together or not at all
+                with self.checkpoint_repository.transaction():
+                    result = self.book_service.add_books(rows, batch_size=batch_size)
+                    batch_checkpoint = ImportCheckpoint(
+                        source,
+                        byte_offset=batch[-1][1],
+                        row_count=checkpoint.row_count + len(batch),
+                        imported=checkpoint.imported + result.imported,
+                        rejected=checkpoint.rejected + len(result.rejected),
+                    )
+                    self.checkpoint_repository.save_checkpoint(batch_checkpoint)
+
+                for reject in result.rejected:
+                    reject.line += checkpoint.row_count
+                    if on_reject:
+                        on_reject(reject)
+                checkpoint = batch_checkpoint
+                if on_progress:
+                    on_progress(checkpoint)
+
+        self.checkpoint_repository.remove_checkpoint(source)
+        return checkpoint
+
+    @staticmethod
+    def _read_header(file) -> Tuple[List[str], int]:
+        """
+        Reads the header row and returns it with the byte offset where it ends.
+        """
+        file.seek(0)
+        first_line = file.readline()
+        header = next(csv.reader([first_line.decode('utf-8-sig')]), [])
+        return [name.strip() for name in header], len(first_line)
+
+    @staticmethod
+    def _read_records(file, offset: int) -> Iterator[Tuple[List[str], int]]:
+        """
+        Yields each CSV record with the byte offset just past its last line.
+
+        The file is read in binary so offsets are exact; `csv.reader` pulls
+        only as many lines as a record needs, so quoted fields spanning
+        several lines are handled correctly.
+        """
+        position = offset
+
+        def lines():
+            nonlocal position
+            for raw_line in file:
+                position += len(raw_line)
+                yield raw_line.decode('utf-8')
+
+        for record in csv.reader(lines()):
+            if record:
+                yield record, position
+
+    @staticmethod
+    def _field(record: List[str], column: int) -> str:
+        return record[column] if column < len(record) else ''
@@ -1,8 +1,9 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from typing import Iterable, Iterator, List, Optional, Tuple
 from library.data.loan_repository import LoanRepository
 from library.data.book_repository import BookRepository
 from library.data.person_repository import PersonRepository
-from library.models.models import Loan, Book, Person
+from library.models.models import CirculationResult, Loan, LoanView
 
 class LoanService:
     def __init__(self, loan_repository: LoanRepository, book_repository: BookRepository, person_repository: PersonRepository):
@@ -13,6 +14,9 @@ class LoanService:
     def lend_book(self, book_id: int, person_id: int, loan_period_days: int = 14) -> Loan:
         """
         Handles the process of lending a book to a person.
+
+        The availability check, the status change and the new loan record are
+        applied atomically by the repository.
         
         Args:
             book_id: The ID of the book to be lent.
@@ -25,22 +29,9 @@ class LoanService:
         Raises:
             ValueError: If the book is not found, not available, or the person is not found.
         """
-        book: Book = self.book_repository.get_book_by_id(book_id)
-        if book is None:
-            raise ValueError(f"Book with ID '{book_id}' not found.")
-        if not book.is_available:
-            raise ValueError(f"Book with ID '{book_id}' is currently not available.")
-            
-        person: Person = self.person_repository.get_person_by_id(person_id)
-        if person is None:
-            raise ValueError(f"Person with ID '{person_id}' not found.")
-            
-        self.book_repository.update_book_availability(book_id, is_available=False)
-        
         loan_date = datetime.now()
         due_date = loan_date + timedelta(days=loan_period_days)
-        new_loan = Loan(book_id, person_id, loan_date, due_date)
-        return self.loan_repository.add_loan(new_loan)
+        return self.loan_repository.lend_book(book_id, person_id, loan_date, due_date)
 
     def return_book(self, book_id: int):
         """
@@ -50,13 +41,77 @@ class LoanService:
             book_id: The ID of the book to be returned.
         
         Raises:
-            ValueError: If the book is already available or no loan record is found.
-        """
-        book: Book = self.book_repository.get_book_by_id(book_id)
-        if book is None:
-            raise ValueError(f"Book with ID '{book_id}' not found.")
-        if book.is_available:
-            raise ValueError(f"Book with ID '{book_id}' is already available.")
-            
-        self.book_repository.update_book_availability(book_id, is_available=True)
-        self.loan_repository.remove_loan_by_book_id(book_id)
\ No newline at end of file
+            ValueError: If the book is not found or is already available.
+        """
+        self.loan_repository.return_book(book_id)
+
+    def lend_books(self, requests: Iterable[Tuple[int, int]], loan_period_days: int = 14) -> List[CirculationResult]:
+        """
+        Lends many books at once, in a single transaction.
+
+        Args:
+            requests: (book_id, person_id) pairs.
+            loan_period_days: The number of days the loans are for.
+
+        Returns:
+            One CirculationResult per request, holding either the new Loan
+            or the reason it was refused.
+        """
+        loan_date = datetime.now()
+        due_date = loan_date + timedelta(days=loan_period_days)
+        return self.loan_repository.lend_books(requests, loan_date, due_date)
+
+    def return_books(self, book_ids: Iterable[int]) -> List[CirculationResult]:
+        """
+        Returns many books at once, in a single transaction.
+
+        Returns:
+            One CirculationResult per book ID, holding the reason if the
+            book could not be returned.
+        """
+        return self.loan_repository.return_books(book_ids)
+
+    def get_loan_views(self, person_id: Optional[int] = None) -> List[LoanView]:
+        """
+        Retrieves current loans with their book titles and borrower names.
+
+        Args:
+            person_id: Only return the loans of this person (optional).
+        """
+        return self.loan_repository.get_loan_views(person_id)
+
+    def iter_loan_views(
+        self, after_id: Optional[int] = None, limit: Optional[int] = None, person_id: Optional[int] = None
+    ) -> Iterator[LoanView]:
+        """
+        Streams current loans with their book titles and borrower names in
+        loan ID order, one page at a time.
+
+        Args:
+            after_id: Only return loans with an ID greater than this.
+            limit: The maximum number of loans to return.
+            person_id: Only return the loans of this person (optional).
+        """
+        return self.loan_repository.iter_loan_views(person_id, after_id=after_id, limit=limit)
+
+    def iter_overdue_loan_views(self, as_of: Optional[date] = None) -> Iterator[LoanView]:
+        """
+        Streams the loans due before `as_of` (today by default), grouped by
+        borrower and earliest due first within each borrower.
+        """
+        as_of = as_of or date.today()
+        return self.loan_repository.iter_loan_views_due(None, as_of - timedelta(days=1))
+
+    def iter_loan_views_due_soon(self, days: int, as_of: Optional[date] = None) -> Iterator[LoanView]:
+        """
+        Streams the loans due within the next `days` days, from `as_of`
+        (today by default) included, grouped by borrower like
+        `iter_overdue_loan_views`.
+
+        Raises:
+            ValueError: If `days` is negative.
+        """
+        if days < 0:
+            raise ValueError("The number of days cannot be negative.")
+        as_of = as_of or date.today()
+        return self.loan_repository.iter_loan_views_due(as_of, as_of + timedelta(days=days))
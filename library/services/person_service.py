@@ -1,7 +1,10 @@
-from typing import List
+from typing import Iterator, List, Optional
 from ..models.models import Person
 from ..data.person_repository import PersonRepository
 
+# Results returned by a people search unless a limit is given
+DEFAULT_SEARCH_LIMIT = 20
+
 class PersonService:
     def __init__(self, person_repository: PersonRepository):
         self.person_repository = person_repository
@@ -74,4 +77,33 @@ class PersonService:
         Returns:
             A list of all Person objects.
         """
-        return self.person_repository.get_all_people()
\ No newline at end of file
+        return self.person_repository.get_all_people()
+
+    def iter_people(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> Iterator[Person]:
+        """
+        Streams people in ID order, one page at a time.
+
+        Args:
+            after_id: Only return people with an ID greater than this.
+            limit: The maximum number of people to return.
+        """
+        return self.person_repository.iter_people(after_id=after_id, limit=limit)
+
+    def search_people(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT) -> List[Person]:
+        """
+        Searches for people by name or phone number.
+
+        Args:
+            query: Part of a name, possibly misspelt, or of a phone number
+                   in any format.
+            limit: The maximum number of people to return.
+
+        Returns:
+            The matching people, best matches first.
+
+        Raises:
+            ValueError: If `limit` is less than 1.
+        """
+        if limit < 1:
+            raise ValueError("Limit must be at least 1.")
+        return self.person_repository.search_people(query, limit)
@@ -0,0 +1,51 @@
+from typing import List, Optional
+from library.data.stats_repository import StatsRepository
+from library.models.models import AuthorCount, BorrowerCount, LibrarySummary
+
+class StatsService:
+    def __init__(self, stats_repository: StatsRepository):
+        self.stats_repository = stats_repository
+
+    def get_summary(self) -> LibrarySummary:
+        """
+        Returns the total number of books, how many are on loan and the
+        availability ratio, read from counters in constant time.
+        """
+        return self.stats_repository.get_summary()
+
+    def get_active_loans(self, person_id: int) -> int:
+        """
+        Returns the number of books a person currently has on loan.
+        """
+        return self.stats_repository.get_active_loans(person_id)
+
+    def get_busiest_borrowers(self, limit: Optional[int] = None) -> List[BorrowerCount]:
+        """
+        Returns the loans per borrower, most loans first.
+
+        Args:
+            limit: The maximum number of borrowers to return; all by default.
+
+        Raises:
+            ValueError: If `limit` is less than 1.
+        """
+        self._check_limit(limit)
+        return self.stats_repository.get_busiest_borrowers(limit)
+
+    def get_books_per_author(self, limit: Optional[int] = None) -> List[AuthorCount]:
+        """
+        Returns the number of books of each author, most books first.
+
+        Args:
+            limit: The maximum number of authors to return; all by default.
+
+        Raises:
+            ValueError: If `limit` is less than 1.
+        """
+        self._check_limit(limit)
+        return self.stats_repository.get_books_per_author(limit)
+
+    @staticmethod
+    def _check_limit(limit: Optional[int]):
+        if limit is not None and limit < 1:
+            raise ValueError("Limit must be at least 1.")
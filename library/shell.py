@@ -0,0 +1,182 @@
+import bisect
+import cmd
+import shlex
+import time
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional
+
+import click
+
+try:
+    import readline
+except ImportError:  # Windows without pyreadline
+    readline = None
+
+# Subcommands that can add, rename or remove a book or a person; the
+# completion index is rebuilt after they run.
+INDEX_CHANGING_COMMANDS = {
+    ('books', 'add'), ('books', 'import-csv'), ('books', 'dedupe'), ('people', 'add'), ('people', 'edit'),
+}
+HISTORY_LENGTH = 1000
+
+class CompletionIndex:
+    """
+    A sorted in-memory list of book titles and person names for prefix
+    completion. It is loaded on first use and after `invalidate()`.
+    """
+
+    def __init__(self, load: Callable[[], Iterable[str]]):
+        self._load = load
+        self._words: Optional[List[str]] = None
+        self._folded: List[str] = []
+
+    def invalidate(self):
+        self._words = None
+
+    def complete(self, prefix: str) -> List[str]:
+        """
+        Returns the entries starting with `prefix`, ignoring case.
+        """
+        if self._words is None:
+            self._words = sorted(set(self._load()), key=str.casefold)
+            self._folded = [word.casefold() for word in self._words]
+        prefix = prefix.casefold()
+        start = bisect.bisect_left(self._folded, prefix)
+        matches = []
+        for folded, word in zip(self._folded[start:], self._words[start:]):
+            if not folded.startswith(prefix):
+                break
+            matches.append(word)
+        return matches
+
+
+class LibraryShell(cmd.Cmd):
+    """
+    An interactive prompt that runs the `library` command groups in-process.
+
+    The database connections and services are built once, by the `library`
+    command that starts the shell, and shared by every command typed, so
+    each command only costs its own queries.
+    """
+
+    intro = "Library shell. Type 'help' for the commands, Tab to complete, 'exit' to quit."
+    prompt = 'library> '
+
+    def __init__(self, root: click.Group, obj: dict, history_file: Optional[Path] = None, timing: bool = False):
+        super().__init__()
+        self.root = root
+        self.obj = obj
+        self.history_file = history_file
+        self.timing = timing
+        self.index = CompletionIndex(self._index_entries)
+
+    def _index_entries(self) -> Iterable[str]:
+        for book in self.obj['book_service'].iter_books():
+            yield book.title
+        for person in self.obj['person_service'].iter_people():
+            yield person.name
+
+    def _groups(self) -> List[str]:
+        return [name for name in self.root.list_commands(None) if name != 'shell']
+
+    def preloop(self):
+        if readline and self.history_file and self.history_file.exists():
+            readline.read_history_file(self.history_file)
+        if readline:
+            # Only whitespace separates words, so titles with punctuation complete
+            readline.set_completer_delims(' \t\n')
+
+    def postloop(self):
+        if readline and self.history_file:
+            readline.set_history_length(HISTORY_LENGTH)
+            readline.write_history_file(self.history_file)
+
+    def emptyline(self):
+        pass
+
+    def default(self, line: str):
+        try:
+            args = shlex.split(line)
+        except ValueError as e:
+            click.echo(f"Error: {e}", err=True)
+            return
+        group = self.root.get_command(None, args[0])
+        if group is None or args[0] == 'shell':
+            click.echo(f"Unknown command '{args[0]}'. Type 'help' for the commands.", err=True)
+            return
+
+        started = time.perf_counter()
+        try:
+            group.main(args=args[1:], prog_name=args[0], obj=self.obj, standalone_mode=False)
+        except click.ClickException as e:
+            e.show()
+        except click.Abort:
+            click.echo("Aborted.", err=True)
+        except Exception as e:
+            click.echo(f"Error: {e}", err=True)
+        if self.timing:
+            click.echo(f"({(time.perf_counter() - started) * 1000:.1f} ms)")
+        profiler = self.obj.get('profiler')
+        if profiler is not None:
+            profiler.report(line.strip())
+
+        if tuple(args[:2]) in INDEX_CHANGING_COMMANDS:
+            self.index.invalidate()
+
+    def do_help(self, arg: str):
+        """Shows the command groups, or the help of one group: help books"""
+        if arg:
+            self.default(f"{arg} --help")
+            return
+        click.echo("Commands:")
+        for name in self._groups():
+            click.echo(f"  {name:<10}{self.root.get_command(None, name).get_short_help_str()}")
+        click.echo("  exit      Leave the shell.")
+
+    def do_exit(self, arg: str):
+        """Leaves the shell."""
+        return True
+
+    do_quit = do_exit
+
+    def do_EOF(self, arg: str):
+        click.echo()
+        return True
+
+    def completenames(self, text: str, *ignored) -> List[str]:
+        return [name + ' ' for name in self._groups() + ['help', 'exit'] if name.startswith(text)]
+
+    def completedefault(self, text: str, line: str, begidx: int, endidx: int) -> List[str]:
+        try:
+            args = shlex.split(line[:begidx])
+        except ValueError:
+            args = line[:begidx].split()
+        group = self.root.get_command(None, args[0]) if args else None
+        if len(args) == 1 and isinstance(group, click.Group):
+            return [name + ' ' for name in group.list_commands(None) if name.startswith(text)]
+        return self._complete_entry(line[:endidx], text)
+
+    def _complete_entry(self, line: str, text: str) -> List[str]:
+        """
+        Completes a title or name, which may be quoted and contain spaces.
+        Readline only replaces the last word, `text`, so candidates are cut
+        to the part that follows the words already typed.
+        """
+        quote = None
+        for i, char in enumerate(line):
+            if quote is None and char in '"\'' and (i == 0 or line[i - 1] == ' '):
+                quote, start = char, i + 1
+            elif char == quote:
+                quote = None
+        if quote is None:
+            # An unquoted word is replaced whole, quoted if the entry needs it
+            return [shlex.quote(entry) for entry in self.index.complete(text)]
+        prefix = line[start:]
+        cut = len(prefix) - len(text)
+        if cut < 0:
+            # The quote opens the word being completed, so it is replaced too
+            return [quote + entry + quote for entry in self.index.complete(prefix)]
+        return [entry[cut:] + quote for entry in self.index.complete(prefix)]
+
+    def complete_help(self, text: str, *ignored) -> List[str]:
+        return [name for name in self._groups() if name.startswith(text)]
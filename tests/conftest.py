@@ -0,0 +1,33 @@
+import sqlite3
+import pytest
+
+from library.data.database_manager import DatabaseManager
+
+
+@pytest.fixture
+def database(tmp_path):
+    """Provides a DatabaseManager on a fresh temporary database for repository tests."""
+    db = DatabaseManager(db_path=str(tmp_path / "library.db"))
+    yield db
+    db.close_connection()
+
+
+@pytest.fixture
+def legacy_database(tmp_path):
+    """
+    Opens a database file created by an SQL script, the way a release from
+    before schema versions would have left it, so upgrades run on open.
+    """
+    managers = []
+
+    def open_database(script):
+        conn = sqlite3.connect(tmp_path / "legacy.db")
+        conn.executescript(script)
+        conn.close()
+        db = DatabaseManager(db_path=str(tmp_path / "legacy.db"))
+        managers.append(db)
+        return db
+
+    yield open_database
+    for db in managers:
+        db.close_connection()
@@ -0,0 +1,125 @@
+import asyncio
+import threading
+import pytest
+from library.data.async_executor import AsyncExecutor
+from library.data.async_repositories import AsyncBookRepository
+from library.data.book_repository import BookRepository
+from library.data.loan_repository import LoanRepository
+from library.data.person_repository import PersonRepository
+from library.models.isbn import to_isbn13
+from library.models.models import Book
+from library.services.async_services import AsyncBookService, AsyncLoanService, AsyncPersonService
+from library.services.book_service import BookService
+from library.services.loan_service import LoanService
+from library.services.person_service import PersonService
+
+@pytest.fixture
+def executor():
+    executor = AsyncExecutor(max_workers=4, max_pending=8)
+    yield executor
+    executor.shutdown()
+
+@pytest.fixture
+def services(database, executor):
+    """Provides async services over real repositories on a temporary database."""
+    books, people, loans = BookRepository(database), PersonRepository(database), LoanRepository(database)
+    return (
+        AsyncBookService(BookService(books), executor),
+        AsyncPersonService(PersonService(people), executor),
+        AsyncLoanService(LoanService(loans, books, people), executor),
+    )
+
+def test_concurrent_lookups(services):
+    """Tests that many concurrent lookups all resolve to the right books."""
+    book_service, _, _ = services
+
+    async def scenario():
+        # The one valid check digit for each of 20 ISBN-13 prefixes
+        isbns = [next(isbn for isbn in (f"97800000{i:04d}{d}" for d in range(10)) if to_isbn13(isbn)) for i in range(20)]
+        added = [await book_service.add_new_book(f"Title {i}", "Author", isbn) for i, isbn in enumerate(isbns)]
+        found = await asyncio.gather(*(book_service.get_book_by_id(book.id) for book in added * 10))
+        return added, found
+
+    added, found = asyncio.run(scenario())
+    assert [book.isbn for book in found] == [book.isbn for book in added * 10]
+
+def test_errors_match_the_sync_services(services):
+    """Tests that validation and domain errors surface unchanged in the coroutine."""
+    book_service, person_service, loan_service = services
+
+    async def scenario():
+        with pytest.raises(ValueError, match="cannot be empty"):
+            await book_service.add_new_book("", "Author", "isbn")
+        with pytest.raises(ValueError, match="not a valid ISBN"):
+            await book_service.add_new_book("Title", "Author", "isbn")
+        book = await book_service.add_new_book("Title", "Author", "9780441013593")
+        person = await person_service.add_new_person("Jane", "555")
+        loan = await loan_service.lend_book(book.id, person.id)
+        with pytest.raises(ValueError, match="not available"):
+            await loan_service.lend_book(book.id, person.id)
+        return book, loan
+
+    book, loan = asyncio.run(scenario())
+    assert loan.book_id == book.id
+
+def test_iter_books_pages_through_the_executor(database, executor):
+    """Tests that async iteration honours after_id and limit across pages."""
+    repository = AsyncBookRepository(BookRepository(database), executor)
+    BookRepository(database).add_books(Book(f"Title {i}", "Author", f"isbn-{i}") for i in range(1200))
+
+    async def collect(**kwargs):
+        return [book.id async for book in repository.iter_books(**kwargs)]
+
+    assert asyncio.run(collect()) == list(range(1, 1201))
+    assert asyncio.run(collect(after_id=100, limit=700)) == list(range(101, 801))
+
+def test_iter_loan_views_filters_by_person(services):
+    """Tests that the async loan listing honours person_id like the sync one."""
+    book_service, person_service, loan_service = services
+
+    async def scenario():
+        jane = await person_service.add_new_person("Jane", "555")
+        john = await person_service.add_new_person("John", "556")
+        for person, isbn in ((jane, "9780441013593"), (john, "9780141439587"), (jane, "9780199535675")):
+            book = await book_service.add_new_book(f"Book {isbn}", "Author", isbn)
+            await loan_service.lend_book(book.id, person.id)
+        return [view.borrower_name async for view in loan_service.iter_loan_views(person_id=jane.id)]
+
+    assert asyncio.run(scenario()) == ["Jane", "Jane"]
+
+def test_dedupe_books_runs_on_the_executor(services):
+    """Tests that the async dedupe reports the same result as the sync one."""
+    book_service, _, _ = services
+
+    async def scenario():
+        await book_service.add_new_book("Dune", "Frank Herbert", "9780441013593")
+        return await book_service.dedupe_books(dry_run=True)
+
+    result = asyncio.run(scenario())
+    assert (result.duplicate_isbns, result.removed_books, result.conflicts) == (0, [], [])
+
+def test_pending_calls_are_bounded(executor):
+    """Tests that no more than max_pending calls are queued at once."""
+    lock = threading.Lock()
+    pending = peak = 0
+
+    def work():
+        nonlocal pending, peak
+        with lock:
+            pending += 1
+            peak = max(peak, pending)
+        threading.Event().wait(0.001)
+        with lock:
+            pending -= 1
+
+    async def scenario():
+        await asyncio.gather(*(executor.run(work) for _ in range(100)))
+
+    asyncio.run(scenario())
+    assert 0 < peak <= executor.max_pending
+
+def test_semaphores_of_closed_loops_are_dropped(executor):
+    """Tests that running the executor from one asyncio.run() after another keeps one semaphore."""
+    for _ in range(3):
+        asyncio.run(executor.run(int, "1"))
+    assert len(executor._slots) == 1
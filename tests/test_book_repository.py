@@ -0,0 +1,89 @@
+import pytest
+from library.models.models import Book
+from library.data.book_repository import BookRepository
+
+def test_search_books_matches_word_prefixes_across_fields(database):
+    """Tests that every search word must prefix-match title, author or ISBN."""
+    repo = BookRepository(database)
+    repo.add_book(Book("The Pragmatic Programmer", "Andrew Hunt", "9780135957059"))
+    repo.add_book(Book("Programming Pearls", "Jon Bentley", "9780201657883"))
+
+    assert {book.title for book in repo.search_books("prog")} == {"The Pragmatic Programmer", "Programming Pearls"}
+    assert [book.title for book in repo.search_books("prag hunt")] == ["The Pragmatic Programmer"]
+    assert repo.search_books("prag bentley") == []
+    assert len(repo.search_books("prog", limit=1)) == 1
+
+def test_search_books_sees_books_added_before_the_index(legacy_database):
+    """Tests that an existing catalog is backfilled into the full-text index."""
+    database = legacy_database("""
+        CREATE TABLE books (id INTEGER PRIMARY KEY, isbn TEXT NOT NULL, title TEXT NOT NULL, author TEXT NOT NULL, is_available INTEGER NOT NULL);
+        INSERT INTO books (isbn, title, author, is_available) VALUES ('1', 'Dune', 'Frank Herbert', 1);
+    """)
+
+    repo = BookRepository(database)
+
+    assert [book.title for book in repo.search_books("herb")] == ["Dune"]
+
+def test_search_books_falls_back_to_like_without_fts(database):
+    """Tests the substring search used when SQLite lacks FTS5."""
+    repo = BookRepository(database)
+    repo._fts_enabled = False
+    repo.add_book(Book("Dune", "Frank Herbert", "1"))
+
+    assert [book.title for book in repo.search_books("erber")] == ["Dune"]
+
+def test_iter_books_pages_by_id(database):
+    """Tests keyset pagination: each page starts after the last ID of the previous one."""
+    repo = BookRepository(database)
+    for number in range(5):
+        repo.add_book(Book(f"Book {number}", "Author", f"isbn-{number}"))
+
+    first_page = list(repo.iter_books(limit=2))
+    second_page = list(repo.iter_books(after_id=first_page[-1].id, limit=2))
+    rest = list(repo.iter_books(after_id=second_page[-1].id))
+
+    assert [book.id for book in first_page] == [1, 2]
+    assert [book.id for book in second_page] == [3, 4]
+    assert [book.id for book in rest] == [5]
+    assert len(repo.get_all_books()) == 5
+
+def test_isbns_are_looked_up_and_deduplicated_in_any_notation(database):
+    """Tests that ISBN-10, ISBN-13 and hyphenated forms of one ISBN are the same book."""
+    repo = BookRepository(database)
+    repo.add_book(Book("Dune", "Frank Herbert", "978-0-441-01359-3"))
+
+    assert repo.get_book_by_isbn("0441013597").title == "Dune"
+    assert repo.get_book_by_isbn("ISBN 9780441013593").title == "Dune"
+    with pytest.raises(ValueError, match="already exists"):
+        repo.add_book(Book("Dune", "Frank Herbert", "0-441-01359-7"))
+    rejected = repo.add_books([Book("Dune", "Frank Herbert", "9780441013593"), Book("Emma", "Jane Austen", "0141439580")])
+    assert [index for index, _ in rejected] == [0]
+    assert repo.get_book_by_isbn("978-0-14-143958-7").title == "Emma"
+    repo.add_book(Book("Zine", "Anonymous", "not an isbn"))
+    with pytest.raises(ValueError, match="already exists"):
+        repo.add_book(Book("Zine", "Anonymous", "not an isbn"))
+
+def test_merge_duplicate_books_keeps_one_book_per_isbn(legacy_database):
+    """Tests the upgrade keying one book per ISBN and dedupe merging the rest in one pass."""
+    database = legacy_database("""
+        CREATE TABLE books (id INTEGER PRIMARY KEY, isbn TEXT NOT NULL, title TEXT NOT NULL, author TEXT NOT NULL, is_available INTEGER NOT NULL);
+        CREATE TABLE loans (id INTEGER PRIMARY KEY, book_id INTEGER UNIQUE NOT NULL, borrower_id INTEGER NOT NULL, loan_date INTEGER NOT NULL, due_date INTEGER NOT NULL);
+        INSERT INTO books VALUES
+            (1, '9780441013593', 'Dune', 'Frank Herbert', 1), (2, '0-441-01359-7', 'Dune', 'Frank Herbert', 0),
+            (3, '0441013597', 'Dune', 'Frank Herbert', 1),
+            (4, '0141439580', 'Emma', 'Jane Austen', 0), (5, '978-0-14-143958-7', 'Emma', 'Jane Austen', 0),
+            (6, 'not an isbn', 'Zine', 'Anonymous', 1);
+        INSERT INTO loans VALUES (1, 2, 1, 20000, 20014), (2, 4, 1, 20000, 20014), (3, 5, 1, 20000, 20014);
+    """)
+    repo = BookRepository(database)
+
+    # The copy on loan holds the key until the duplicates are merged
+    assert repo.get_book_by_isbn("9780441013593").id == 2
+    assert [book.id for book in repo.merge_duplicate_books(dry_run=True).removed_books] == [1, 3]
+
+    result = repo.merge_duplicate_books()
+
+    assert (result.duplicate_isbns, len(result.removed_books), result.conflicts) == (2, 2, ["9780141439587"])
+    assert [book.id for book in repo.iter_books()] == [2, 4, 5, 6]
+    assert repo.get_book_by_isbn("not an isbn").title == "Zine"
+    assert repo.merge_duplicate_books().removed_books == []
@@ -12,8 +12,8 @@ def book_service():
 def test_add_new_book_success(book_service):
     """Tests a successful book addition."""
     # The repository's add_book method should return the book with an ID from the database
-    book_service.book_repository.add_book.return_value = Book(id=1, title="Mock Title", author="Mock Author", isbn="mock-isbn")
-    new_book = book_service.add_new_book("Mock Title", "Mock Author", "mock-isbn")
+    book_service.book_repository.add_book.return_value = Book(id=1, title="Mock Title", author="Mock Author", isbn="9780441013593")
+    new_book = book_service.add_new_book("Mock Title", "Mock Author", "9780441013593")
     assert new_book.title == "Mock Title"
     assert new_book.id == 1
     book_service.book_repository.add_book.assert_called_once()
@@ -22,4 +22,31 @@ def test_add_new_book_with_empty_fields_raises_error(book_service):
     """Tests that adding a book with empty fields raises a ValueError."""
     with pytest.raises(ValueError, match="cannot be empty"):
         book_service.add_new_book("", "Author", "isbn")
-    book_service.book_repository.add_book.assert_not_called()
\ No newline at end of file
+    book_service.book_repository.add_book.assert_not_called()
+
+def test_add_new_book_with_invalid_isbn_raises_error(book_service):
+    """Tests that an ISBN with a wrong check digit is rejected before reaching the repository."""
+    with pytest.raises(ValueError, match="not a valid ISBN"):
+        book_service.add_new_book("Dune", "Frank Herbert", "978-0-441-01359-4")
+    book_service.book_repository.add_book.assert_not_called()
+
+def test_add_books_reports_empty_and_duplicate_rows(book_service):
+    """Tests that bulk additions report rejected rows without stopping the batch."""
+    def add_books(books, batch_size):
+        books = list(books)
+        # Pretend the second valid book already exists in the database
+        return [(1, books[1])]
+    book_service.book_repository.add_books.side_effect = add_books
+
+    rows = [
+        ("Title 1", "Author", "9780441013593"), ("", "Author", "9780134685991"), ("Title 3", "Author", "0-441-01359-7"),
+        ("Title 4", "Author", "9780134685991"), ("Title 5", "Author", "9780134685990"),
+    ]
+    result = book_service.add_books(rows, batch_size=2)
+
+    assert result.imported == 2
+    assert [reject.line for reject in result.rejected] == [2, 3, 5]
+    assert "cannot be empty" in result.rejected[0].reason
+    assert "already exists" in result.rejected[1].reason
+    assert result.rejected[1].title == "Title 3"
+    assert "not a valid ISBN" in result.rejected[2].reason
@@ -0,0 +1,76 @@
+import sqlite3
+from datetime import date
+from unittest.mock import Mock
+from library.data.book_repository import BookRepository
+from library.data.cache import EntityCache
+from library.data.loan_repository import LoanRepository
+from library.data.person_repository import PersonRepository
+from library.models.models import Book, Person
+
+def test_lru_evicts_the_least_recently_used_entry():
+    """Tests hits, misses and evictions of a full cache."""
+    db_manager = Mock()
+    db_manager.data_version.return_value = 1
+    cache = EntityCache(db_manager, max_size=2)
+
+    cache.get('a', lambda: 'A')
+    cache.get('b', lambda: 'B')
+    cache.get('a', lambda: 'not read')
+    cache.get('c', lambda: 'C')
+
+    assert cache.get('a', lambda: 'not read') == 'A'
+    assert cache.get('b', lambda: 'B again') == 'B again'
+    stats = cache.stats
+    assert (stats.hits, stats.misses, stats.evictions) == (2, 4, 2)
+
+def test_missing_entities_are_not_cached():
+    """Tests that None results are read again on the next lookup."""
+    db_manager = Mock()
+    db_manager.data_version.return_value = 1
+    cache = EntityCache(db_manager)
+    load = Mock(return_value=None)
+
+    cache.get('a', load)
+    cache.get('a', load)
+
+    assert load.call_count == 2
+
+def test_repository_lookups_are_served_from_the_cache(database):
+    """Tests that repeated lookups by ID, ISBN or name hit the cache."""
+    books = BookRepository(database, EntityCache(database))
+    people = PersonRepository(database, EntityCache(database))
+    book = books.add_book(Book("Dune", "Frank Herbert", "123"))
+    person = people.add_person(Person("Ada", "555"))
+
+    for _ in range(3):
+        assert books.get_book_by_id(book.id).title == "Dune"
+        assert books.get_book_by_isbn("123").id == book.id
+        assert people.get_person_by_name("Ada").id == person.id
+
+    assert (books.cache.stats.hits, books.cache.stats.misses) == (4, 2)
+    assert (people.cache.stats.hits, people.cache.stats.misses) == (2, 1)
+
+def test_writes_through_other_repositories_invalidate(database):
+    """Tests that a loan, written by another repository, is seen by cached book lookups."""
+    books = BookRepository(database, EntityCache(database))
+    book = books.add_book(Book("Dune", "Frank Herbert", "123"))
+    person = PersonRepository(database).add_person(Person("Ada", "555"))
+    assert books.get_book_by_id(book.id).is_available
+
+    LoanRepository(database).lend_book(book.id, person.id, date(2025, 1, 1), date(2025, 1, 15))
+
+    assert not books.get_book_by_id(book.id).is_available
+    assert books.cache.stats.invalidations == 1
+
+def test_writes_from_other_processes_invalidate(database):
+    """Tests that a commit made outside the pool is seen by cached lookups."""
+    people = PersonRepository(database, EntityCache(database))
+    person = people.add_person(Person("Ada", "555"))
+    assert people.get_person_by_id(person.id).phone_number == "555"
+
+    other = sqlite3.connect(database.db_path)
+    with other:
+        other.execute("UPDATE people SET phone_number = '777' WHERE id = ?", (person.id,))
+    other.close()
+
+    assert people.get_person_by_id(person.id).phone_number == "777"
@@ -0,0 +1,86 @@
+import subprocess
+import sys
+from click.testing import CliRunner
+from library.cli import LazyObjects, cli
+
+def test_importing_the_cli_loads_no_commands_or_rich():
+    """Tests that command modules and rich are only imported when used."""
+    script = (
+        "import sys, library.cli; "
+        "print(sorted(name for name in sys.modules if name.startswith(('rich', 'library.commands', 'library.services'))))"
+    )
+    output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "[]"
+
+def test_lazy_objects_are_built_once_on_first_use():
+    """Tests that shared objects are built on demand, along with what they depend on."""
+    built = []
+    objects = LazyObjects({
+        'a': lambda obj: built.append('a') or 'A',
+        'b': lambda obj: built.append('b') or obj['a'] + 'B',
+        'c': lambda obj: built.append('c') or 'C',
+    })
+    assert objects['b'] == 'AB'
+    assert objects['b'] == 'AB'
+    assert built == ['b', 'a']
+    assert 'c' not in objects
+
+def test_commands_run_against_the_given_database(tmp_path):
+    """Tests a full command through the lazily loaded groups."""
+    runner = CliRunner()
+    db_path = str(tmp_path / "library.db")
+    result = runner.invoke(cli, ["--db-path", db_path, "books", "add", "Dune", "Frank Herbert", "978-0-441-01359-3"])
+    assert result.exit_code == 0, result.output
+    result = runner.invoke(cli, ["--db-path", db_path, "books", "get", "0441013597"])
+    assert "Dune" in result.output
+    result = runner.invoke(cli, ["--db-path", db_path, "books", "dedupe"])
+    assert "No duplicate books found" in result.output
+
+def test_stats_command_reports_the_counters(tmp_path):
+    """Tests that library stats shows the catalog counters and rankings."""
+    runner = CliRunner()
+    db_path = str(tmp_path / "library.db")
+    runner.invoke(cli, ["--db-path", db_path, "books", "add", "Dune", "Frank Herbert", "9780441013593"])
+    result = runner.invoke(cli, ["--db-path", db_path, "stats", "--top", "5"])
+    assert result.exit_code == 0, result.output
+    assert "Books: 1" in result.output
+    assert "Frank Herbert: 1" in result.output
+
+def test_machine_formats_bypass_styling(tmp_path):
+    """Tests the tsv, csv and jsonl outputs of the listing commands."""
+    runner = CliRunner()
+    db_path = str(tmp_path / "library.db")
+    runner.invoke(cli, ["--db-path", db_path, "books", "add", "Tabs\tand [brackets]", "Frank Herbert", "9780441013593"])
+
+    result = runner.invoke(cli, ["--db-path", db_path, "books", "list", "--format", "tsv"])
+    assert result.output == "id\ttitle\tauthor\tisbn\tis_available\n1\tTabs\\tand [brackets]\tFrank Herbert\t9780441013593\ttrue\n"
+    result = runner.invoke(cli, ["--db-path", db_path, "books", "search", "Herbert", "--format", "csv"])
+    assert result.output.splitlines()[1] == "1,Tabs\tand [brackets],Frank Herbert,9780441013593,true"
+    result = runner.invoke(cli, ["--db-path", db_path, "loans", "list", "--format", "jsonl"])
+    assert result.exit_code == 0 and result.output == ""
+    result = runner.invoke(cli, ["--db-path", db_path, "people", "list", "--format", "table"])
+    assert "No people registered" in result.output
+
+def test_batch_commands_reject_non_ascii_digits(tmp_path):
+    """Tests that a digit int() cannot parse, such as '²', is reported as a bad item."""
+    runner = CliRunner()
+    db_path = str(tmp_path / "library.db")
+    result = runner.invoke(cli, ["--db-path", db_path, "loans", "return-many", "²"])
+    assert result.exit_code == 2
+    assert "Expected BOOK_ID, got '²'" in result.output
+
+def test_loan_reports_take_the_format_option(tmp_path):
+    """Tests the machine formats of the per-person, overdue and due-soon loan listings."""
+    runner = CliRunner()
+    db_path = str(tmp_path / "library.db")
+    runner.invoke(cli, ["--db-path", db_path, "books", "add", "Dune", "Frank Herbert", "9780441013593"])
+    runner.invoke(cli, ["--db-path", db_path, "people", "add", "Ada", "555-0100"])
+    runner.invoke(cli, ["--db-path", db_path, "loans", "borrow", "1", "1"])
+
+    result = runner.invoke(cli, ["--db-path", db_path, "loans", "list-by-person", "1", "--format", "tsv"])
+    assert result.output.splitlines()[1].startswith("1\t1\tDune\t1\tAda\t")
+    result = runner.invoke(cli, ["--db-path", db_path, "loans", "due-soon", "--days", "30", "--format", "csv"])
+    assert result.output.splitlines()[0] == "id,book_id,book_title,person_id,borrower_name,loan_date,due_date"
+    assert len(result.output.splitlines()) == 2
+    result = runner.invoke(cli, ["--db-path", db_path, "loans", "overdue", "--format", "jsonl"])
+    assert result.exit_code == 0 and result.output == ""
@@ -0,0 +1,72 @@
+import sqlite3
+import threading
+import pytest
+from library.data.connection_pool import ConnectionPool
+
+@pytest.fixture
+def pool(tmp_path):
+    """Provides a two-reader pool over a database with one table."""
+    pool = ConnectionPool(tmp_path / "pool.db", size=2)
+    with pool.writer() as conn, conn:
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY)")
+    yield pool
+    pool.close()
+
+def test_nested_checkouts_reuse_the_thread_connection(pool):
+    """Tests that checkouts are reentrant and reads inside a write use the writer."""
+    with pool.reader() as outer, pool.reader() as inner:
+        assert inner is outer
+    with pool.writer() as writer:
+        with pool.reader() as reader:
+            assert reader is writer
+
+def test_overlapping_checkouts_release_on_the_last_exit(pool):
+    """Tests that a connection stays checked out until every overlapping checkout of the thread ends."""
+    with pool.writer() as conn, conn:
+        conn.executemany("INSERT INTO items (id) VALUES (?)", [(1,), (2,), (3,)])
+
+    def stream():
+        with pool.reader() as conn:
+            yield from conn.execute("SELECT id FROM items ORDER BY id")
+
+    first, second = stream(), stream()
+    next(first)
+    next(second)
+    # The first checkout ends while the second still reads
+    assert [row["id"] for row in first] == [2, 3]
+    assert pool._local.reader_depth == 1
+    assert pool._idle_readers.qsize() == 0
+    assert [row["id"] for row in second] == [2, 3]
+    assert pool._local.reader_depth == 0
+    assert pool._idle_readers.qsize() == 1
+
+def test_readers_refuse_writes(pool):
+    """Tests that reader connections are read-only."""
+    with pool.reader() as conn:
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("INSERT INTO items DEFAULT VALUES")
+
+def test_threads_share_the_pool(pool):
+    """Tests concurrent readers and writers from many threads."""
+    errors = []
+
+    def work():
+        try:
+            for _ in range(20):
+                with pool.writer() as conn, conn:
+                    conn.execute("INSERT INTO items DEFAULT VALUES")
+                with pool.reader() as conn:
+                    conn.execute("SELECT COUNT(*) FROM items").fetchone()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    with pool.reader() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 160
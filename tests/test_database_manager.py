@@ -0,0 +1,47 @@
+import pytest
+from library.data.database_manager import DatabaseManager
+
+@pytest.fixture
+def db_manager(tmp_path):
+    """Provides a DatabaseManager on a temporary file, reset afterwards."""
+    manager = DatabaseManager(db_path=str(tmp_path / "library.db"))
+    yield manager
+    manager.close_connection()
+
+def test_default_profile_enables_wal(db_manager):
+    """Tests that new connections get the balanced profile."""
+    assert db_manager.profile == "balanced"
+    assert db_manager.get_pragma("journal_mode") == "wal"
+    assert db_manager.get_pragma("synchronous") == 1
+
+def test_overrides_win_over_profile_switches(db_manager):
+    """Tests that PRAGMA overrides survive switching to another profile."""
+    db_manager.apply_profile("durable", {"cache_size": "-1234"})
+    db_manager.apply_profile("bulk")
+
+    assert db_manager.profile == "bulk"
+    assert db_manager.get_pragma("synchronous") == 0
+    assert db_manager.get_pragma("cache_size") == -1234
+
+def test_using_profile_restores_the_previous_settings(db_manager):
+    """Tests that a temporary profile is undone after the block, even when it fails."""
+    db_manager.apply_profile("durable", {"cache_size": "-1234"})
+
+    with pytest.raises(RuntimeError):
+        with db_manager.using_profile("bulk"):
+            assert db_manager.get_pragma("synchronous") == 0
+            raise RuntimeError("import failed")
+
+    assert db_manager.profile == "durable"
+    assert db_manager.pragma_overrides == {"cache_size": "-1234"}
+    assert db_manager.get_pragma("synchronous") == 2
+
+@pytest.mark.parametrize("profile, pragmas, message", [
+    ("fast", None, "Unknown database profile"),
+    ("bulk", {"user_version": "3"}, "cannot be overridden"),
+    ("bulk", {"cache_size": "1; DROP TABLE books"}, "Invalid value"),
+])
+def test_invalid_settings_raise_error(db_manager, profile, pragmas, message):
+    """Tests that unknown profiles and unsafe overrides are rejected."""
+    with pytest.raises(ValueError, match=message):
+        db_manager.apply_profile(profile, pragmas)
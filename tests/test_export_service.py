@@ -0,0 +1,63 @@
+import csv
+import gzip
+import json
+from datetime import date
+import pytest
+from library.data.book_repository import BookRepository
+from library.data.loan_repository import LoanRepository
+from library.data.person_repository import PersonRepository
+from library.models.models import Book, Person
+from library.services.export_service import ExportService
+
+@pytest.fixture
+def repositories(database):
+    """Provides the book, person and loan repositories with two books, one of them lent."""
+    books, people, loans = BookRepository(database), PersonRepository(database), LoanRepository(database)
+    dune = books.add_book(Book("Dune", "Frank Herbert", "123"))
+    books.add_book(Book("Emma", "Jane Austen", "456"))
+    ada = people.add_person(Person("Ada", "555"))
+    loans.lend_book(dune.id, ada.id, date(2025, 1, 1), date(2025, 1, 15))
+    return books, people, loans
+
+def test_csv_export_writes_every_table(tmp_path, repositories):
+    """Tests the files, headers and values of a CSV export."""
+    results = ExportService(*repositories).export(str(tmp_path))
+
+    assert [(result.table, result.rows) for result in results] == [("books", 2), ("people", 1), ("loans", 1)]
+    with open(tmp_path / "books.csv", newline="", encoding="utf-8") as file:
+        assert list(csv.DictReader(file))[1] == {
+            "id": "2", "isbn": "456", "title": "Emma", "author": "Jane Austen", "is_available": "1"
+        }
+    with open(tmp_path / "loans.csv", newline="", encoding="utf-8") as file:
+        assert list(csv.reader(file)) == [
+            ["id", "book_id", "person_id", "loan_date", "due_date"],
+            ["1", "1", "1", "2025-01-01", "2025-01-15"],
+        ]
+    assert not list(tmp_path.glob("*.partial"))
+
+def test_gzipped_jsonl_export(tmp_path, repositories):
+    """Tests that JSON Lines exports can be compressed and read back."""
+    ExportService(*repositories).export(str(tmp_path), ["people"], fmt="jsonl", compress=True)
+
+    with gzip.open(tmp_path / "people.jsonl.gz", "rt", encoding="utf-8") as file:
+        assert [json.loads(line) for line in file] == [{"id": 1, "name": "Ada", "phone_number": "555"}]
+    assert not (tmp_path / "books.jsonl.gz").exists()
+
+def test_export_reads_one_snapshot(tmp_path, repositories):
+    """Tests that writes committed during an export do not show up in the tables exported after them."""
+    books, people, loans = repositories
+
+    def lend_while_exporting(result):
+        if result.table == "books":
+            emma = books.get_book_by_isbn("456")
+            loans.lend_book(emma.id, 1, date(2025, 2, 1), date(2025, 2, 15))
+
+    results = ExportService(books, people, loans).export(str(tmp_path), on_table=lend_while_exporting)
+
+    assert results[2].rows == 1
+    assert len(loans.get_all_loans()) == 2
+
+def test_unknown_table_is_rejected(tmp_path, repositories):
+    """Tests that only the known tables can be exported."""
+    with pytest.raises(ValueError, match="Unknown table"):
+        ExportService(*repositories).export(str(tmp_path), ["secrets"])
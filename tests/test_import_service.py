@@ -0,0 +1,83 @@
+import pytest
+from unittest.mock import MagicMock, Mock
+from library.data.book_repository import BookRepository
+from library.data.import_checkpoint_repository import ImportCheckpointRepository
+from library.models.models import ImportCheckpoint, ImportResult
+from library.services.book_service import BookService
+from library.services.import_service import ImportService
+
+@pytest.fixture
+def import_service():
+    """Provides an ImportService with mocked dependencies."""
+    mock_book_service = Mock()
+    mock_book_service.add_books.side_effect = lambda rows, batch_size: ImportResult(imported=len(rows))
+    # A MagicMock, so it can stand in for the transaction context manager
+    mock_checkpoint_repo = MagicMock()
+    mock_checkpoint_repo.get_checkpoint.return_value = None
+    return ImportService(mock_book_service, mock_checkpoint_repo)
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = tmp_path / "books.csv"
+    path.write_text('title,author,isbn\nA,Author,1\n"B\nB",Author,2\nC,Author,3\n', encoding="utf-8")
+    return path
+
+def test_import_books_csv_checkpoints_every_batch(import_service, csv_file):
+    """Tests that each batch is imported and checkpointed, and the checkpoint cleared at the end."""
+    result = import_service.import_books_csv(str(csv_file), batch_size=2)
+
+    assert result.row_count == 3
+    assert result.imported == 3
+    assert result.byte_offset == csv_file.stat().st_size
+    assert import_service.book_service.add_books.call_count == 2
+    assert import_service.checkpoint_repository.save_checkpoint.call_count == 2
+    import_service.checkpoint_repository.remove_checkpoint.assert_called_once()
+
+def test_import_books_csv_resumes_from_checkpoint(import_service, csv_file):
+    """Tests that a resumed import skips the rows already covered by the checkpoint."""
+    offset = len('title,author,isbn\nA,Author,1\n"B\nB",Author,2\n'.encode("utf-8"))
+    import_service.checkpoint_repository.get_checkpoint.return_value = ImportCheckpoint(
+        str(csv_file.resolve()), byte_offset=offset, row_count=2, imported=2
+    )
+
+    result = import_service.import_books_csv(str(csv_file), resume=True)
+
+    import_service.book_service.add_books.assert_called_once_with([("C", "Author", "3")], batch_size=1000)
+    assert result.row_count == 3
+    assert result.imported == 3
+
+def test_import_books_csv_missing_headers_raises_error(import_service, tmp_path):
+    """Tests that a CSV without the required headers is rejected."""
+    path = tmp_path / "bad.csv"
+    path.write_text("title,author\nA,Author\n", encoding="utf-8")
+
+    with pytest.raises(ValueError, match="isbn"):
+        import_service.import_books_csv(str(path))
+
+def test_interrupted_batch_is_rolled_back_with_its_checkpoint(database, tmp_path, monkeypatch):
+    """Tests that a crash before a batch's checkpoint is saved leaves none of its books, so resuming imports them once."""
+    path = tmp_path / "books.csv"
+    path.write_text(
+        "title,author,isbn\nDune,Frank Herbert,9780441013593\nEmma,Jane Austen,9780141439587\n"
+        "Ulysses,James Joyce,9780199535675\n",
+        encoding="utf-8",
+    )
+    checkpoints = ImportCheckpointRepository(database)
+    service = ImportService(BookService(BookRepository(database)), checkpoints)
+    save_checkpoint = checkpoints.save_checkpoint
+
+    def crash_on_second_batch(checkpoint):
+        if checkpoint.row_count > 2:
+            raise KeyboardInterrupt
+        save_checkpoint(checkpoint)
+    monkeypatch.setattr(checkpoints, "save_checkpoint", crash_on_second_batch)
+    with pytest.raises(KeyboardInterrupt):
+        service.import_books_csv(str(path), batch_size=2)
+    monkeypatch.setattr(checkpoints, "save_checkpoint", save_checkpoint)
+
+    assert [book.title for book in BookRepository(database).iter_books()] == ["Dune", "Emma"]
+    result = service.import_books_csv(str(path), batch_size=2, resume=True)
+
+    assert (result.row_count, result.imported, result.rejected) == (3, 3, 0)
+    assert [book.title for book in BookRepository(database).iter_books()] == ["Dune", "Emma", "Ulysses"]
+    assert service.get_checkpoint(str(path)) is None
@@ -0,0 +1,15 @@
+import pytest
+from library.models.isbn import to_isbn13, validate_isbn
+
+def test_to_isbn13_accepts_common_notations():
+    """Tests that ISBN-10s and ISBN-13s with separators and labels give the same ISBN-13."""
+    for isbn in ("9780441013593", "978-0-441-01359-3", "ISBN 978 0 441 01359 3", "0441013597", "ISBN-10: 0-441-01359-7"):
+        assert to_isbn13(isbn) == "9780441013593"
+    assert to_isbn13("0-8044-2957-x") == "9780804429573"
+
+def test_to_isbn13_rejects_invalid_isbns():
+    """Tests wrong check digits, wrong lengths and digits outside ASCII."""
+    for isbn in (None, "", "123", "9780441013594", "0441013598", "1234567890123", "０４４１０１３５９７", "９７８０４４１０１３５９３"):
+        assert to_isbn13(isbn) is None
+    with pytest.raises(ValueError, match="not a valid ISBN"):
+        validate_isbn("０４４１０１３５９７")
@@ -0,0 +1,137 @@
+import pytest
+from datetime import date, datetime
+from library.models.models import Book, Loan, Person
+from library.data.book_repository import BookRepository
+from library.data.loan_repository import LoanRepository
+from library.data.person_repository import PersonRepository
+
+def test_loan_dates_round_trip_as_day_numbers(database):
+    """Tests that loan dates are stored as integer days and read back as dates."""
+    repo = LoanRepository(database)
+    repo.add_loan(Loan(1, 1, datetime(2025, 1, 1, 15, 30), datetime(2025, 1, 15, 15, 30)))
+
+    with database.reader() as conn:
+        stored = conn.execute("SELECT loan_date, due_date FROM loans").fetchone()
+    loan = repo.get_loan_by_book_id(1)
+
+    assert (stored["loan_date"], stored["due_date"]) == (20089, 20103)
+    assert (loan.loan_date, loan.due_date) == (date(2025, 1, 1), date(2025, 1, 15))
+
+def test_text_dates_are_converted_on_upgrade(legacy_database):
+    """Tests the one-time conversion of databases that stored dates as text."""
+    database = legacy_database("""
+        CREATE TABLE loans (id INTEGER PRIMARY KEY, book_id INTEGER UNIQUE NOT NULL, borrower_id INTEGER NOT NULL, loan_date TEXT NOT NULL, due_date TEXT NOT NULL);
+        INSERT INTO loans VALUES (1, 1, 1, '2025-01-01', '2025-01-15');
+    """)
+
+    repo = LoanRepository(database)
+
+    loan = repo.get_loan_by_id(1)
+    assert (loan.loan_date, loan.due_date) == (date(2025, 1, 1), date(2025, 1, 15))
+    with database.reader() as conn:
+        assert conn.execute("SELECT typeof(due_date) FROM loans").fetchone()[0] == "integer"
+        assert "loans_due_date" in {row["name"] for row in conn.execute("PRAGMA index_list(loans)")}
+
+@pytest.fixture
+def circulation(database):
+    """Provides a LoanRepository over a database with one book and one person."""
+    book_repo = BookRepository(database)
+    repo = LoanRepository(database)
+    person_repo = PersonRepository(database)
+    book_repo.add_book(Book("Dune", "Frank Herbert", "9780441013593"))
+    person_repo.add_person(Person("Ada", "555-0100"))
+    return repo, book_repo
+
+def test_lend_and_return_book_update_status_and_loan_together(circulation):
+    """Tests that lending and returning change the book status and the loan record together."""
+    repo, book_repo = circulation
+
+    loan = repo.lend_book(1, 1, date(2025, 1, 1), date(2025, 1, 15))
+    assert loan.id is not None
+    assert not book_repo.get_book_by_id(1).is_available
+    assert repo.get_loan_by_book_id(1) == loan
+
+    repo.return_book(1)
+    assert book_repo.get_book_by_id(1).is_available
+    assert repo.get_loan_by_book_id(1) is None
+
+@pytest.mark.parametrize("book_id, person_id, message", [
+    (999, 1, "Book with ID '999' not found."),
+    (1, 999, "Person with ID '999' not found."),
+])
+def test_failed_lend_book_changes_nothing(circulation, book_id, person_id, message):
+    """Tests that a rejected loan is rolled back, leaving the book available."""
+    repo, book_repo = circulation
+
+    with pytest.raises(ValueError, match=message):
+        repo.lend_book(book_id, person_id, date(2025, 1, 1), date(2025, 1, 15))
+
+    assert book_repo.get_book_by_id(1).is_available
+    assert repo.get_all_loans() == []
+
+def test_lend_unavailable_book_raises_error(circulation):
+    """Tests that a book already on loan cannot be lent again."""
+    repo, _ = circulation
+    repo.lend_book(1, 1, date(2025, 1, 1), date(2025, 1, 15))
+
+    with pytest.raises(ValueError, match="is currently not available"):
+        repo.lend_book(1, 1, date(2025, 1, 2), date(2025, 1, 16))
+
+@pytest.mark.parametrize("book_id, message", [
+    (999, "Book with ID '999' not found."),
+    (1, "is already available"),
+])
+def test_return_book_errors(circulation, book_id, message):
+    """Tests that returning a missing or available book raises a ValueError."""
+    repo, _ = circulation
+
+    with pytest.raises(ValueError, match=message):
+        repo.return_book(book_id)
+
+def test_lend_books_applies_valid_requests_and_reports_the_rest(circulation):
+    """Tests that a batch lend validates every item and applies the valid ones together."""
+    repo, book_repo = circulation
+    book_repo.add_book(Book("Emma", "Jane Austen", "9780141439587"))
+
+    results = repo.lend_books([(1, 1), (1, 1), (2, 999), (999, 1)], date(2025, 1, 1), date(2025, 1, 15))
+
+    assert [result.ok for result in results] == [True, False, False, False]
+    assert "not available" in results[1].error
+    assert "Person with ID '999'" in results[2].error
+    assert "Book with ID '999'" in results[3].error
+    assert results[0].loan == repo.get_loan_by_book_id(1)
+    assert book_repo.get_book_by_id(2).is_available
+
+def test_return_books_reports_each_item(circulation):
+    """Tests that a batch return frees lent books and reports the others."""
+    repo, book_repo = circulation
+    repo.lend_book(1, 1, date(2025, 1, 1), date(2025, 1, 15))
+
+    results = repo.return_books([1, 1, 999])
+
+    assert [result.ok for result in results] == [True, False, False]
+    assert book_repo.get_book_by_id(1).is_available
+    assert repo.get_all_loans() == []
+
+@pytest.fixture
+def due_loans(database):
+    """Provides a LoanRepository with loans of two borrowers due on different days."""
+    book_repo, person_repo, repo = BookRepository(database), PersonRepository(database), LoanRepository(database)
+    for number in range(1, 5):
+        book_repo.add_book(Book(f"Book {number}", "Author", f"isbn-{number}"))
+    person_repo.add_person(Person("Ada", "1"))
+    person_repo.add_person(Person("Bob", "2"))
+    for book_id, person_id, due_day in [(1, 2, 10), (2, 1, 12), (3, 2, 5), (4, 1, 20)]:
+        repo.lend_book(book_id, person_id, date(2025, 1, 1), date(2025, 1, due_day))
+    return repo
+
+def test_due_range_queries(due_loans):
+    """Tests overdue and due-between lookups, with inclusive bounds."""
+    assert [loan.book_id for loan in due_loans.get_overdue_loans(date(2025, 1, 12))] == [3, 1]
+    assert [loan.book_id for loan in due_loans.get_due_between(date(2025, 1, 10), date(2025, 1, 20))] == [1, 2, 4]
+    assert due_loans.get_due_between(date(2025, 1, 21), None) == []
+
+def test_due_loan_views_are_grouped_by_borrower(due_loans):
+    """Tests that due loan views come grouped by borrower, earliest due first."""
+    views = list(due_loans.iter_loan_views_due(None, date(2025, 1, 12)))
+    assert [(view.borrower_name, view.book_id) for view in views] == [("Ada", 2), ("Bob", 3), ("Bob", 1)]
@@ -0,0 +1,57 @@
+import sqlite3
+import pytest
+from library.data import migrations
+from library.data.database_manager import DatabaseManager
+
+def test_new_database_is_created_at_the_latest_version(database):
+    """Tests that opening a new database creates the schema and records its version."""
+    assert database.schema_version == migrations.SCHEMA_VERSION
+    with database.reader() as conn:
+        tables = {row["name"] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert {"books", "people", "loans", "import_checkpoints"} <= tables
+
+def test_up_to_date_database_only_reads_the_version(database):
+    """Tests that reopening a migrated database runs no schema statements."""
+    statements = []
+    with database.writer() as conn:
+        conn.set_trace_callback(statements.append)
+        try:
+            migrations.migrate(conn)
+        finally:
+            conn.set_trace_callback(None)
+    assert statements == ["PRAGMA user_version"]
+
+def test_newer_database_is_refused(tmp_path):
+    """Tests that a database from a newer release is not opened."""
+    conn = sqlite3.connect(tmp_path / "newer.db")
+    conn.execute(f"PRAGMA user_version = {migrations.SCHEMA_VERSION + 1}")
+    conn.close()
+    with pytest.raises(RuntimeError, match="Please upgrade"):
+        DatabaseManager(db_path=str(tmp_path / "newer.db"))
+
+def test_failed_migration_is_rolled_back(tmp_path, monkeypatch):
+    """Tests that pending migrations are applied all together or not at all."""
+    def broken(conn):
+        conn.execute("CREATE TABLE half_done (id INTEGER)")
+        raise RuntimeError("boom")
+    monkeypatch.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS + [broken])
+    monkeypatch.setattr(migrations, "SCHEMA_VERSION", len(migrations.MIGRATIONS))
+
+    with pytest.raises(RuntimeError, match="boom"):
+        DatabaseManager(db_path=str(tmp_path / "library.db"))
+
+    conn = sqlite3.connect(tmp_path / "library.db")
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == 0
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name IN ('books', 'half_done')").fetchone()[0] == 0
+    conn.close()
+
+def test_isbn13_upgrade_leaves_invalid_isbns_unkeyed(legacy_database):
+    """Tests that ISBNs that are not valid, non-ASCII digits included, get no key instead of failing the upgrade."""
+    database = legacy_database("""
+        CREATE TABLE books (id INTEGER PRIMARY KEY, isbn TEXT NOT NULL, title TEXT NOT NULL, author TEXT NOT NULL, is_available INTEGER NOT NULL);
+        INSERT INTO books VALUES (1, '０４４１０１３５９７', 'Dune', 'Frank Herbert', 1), (2, '0-441-01359-7', 'Dune', 'Frank Herbert', 1);
+    """)
+
+    assert database.schema_version == migrations.SCHEMA_VERSION
+    with database.reader() as conn:
+        assert [tuple(row) for row in conn.execute("SELECT id, isbn13 FROM books ORDER BY id")] == [(1, None), (2, "9780441013593")]
@@ -0,0 +1,57 @@
+from library.models.models import Person
+from library.data.person_repository import PersonRepository, phone_digits
+
+def add_people(repo, *people):
+    for name, phone in people:
+        repo.add_person(Person(name, phone))
+
+def test_search_people_ranks_names_starting_with_the_term_first(database):
+    """Tests that substring matches are found and prefix matches come first."""
+    repo = PersonRepository(database)
+    add_people(repo, ("Rosa Adams", "1"), ("Adaline Moreau", "2"), ("Grace Hopper", "3"))
+
+    assert [person.name for person in repo.search_people("ada", 10)] == ["Adaline Moreau", "Rosa Adams"]
+    assert [person.name for person in repo.search_people("hop gra", 10)] == ["Grace Hopper"]
+    assert len(repo.search_people("ada", 1)) == 1
+
+def test_search_people_tolerates_typos(database):
+    """Tests that a misspelled name still finds the person through shared trigrams."""
+    repo = PersonRepository(database)
+    add_people(repo, ("Ada Lovelace", "1"), ("Alan Turing", "2"))
+
+    assert [person.name for person in repo.search_people("Lovelcae", 10)] == ["Ada Lovelace"]
+    assert repo.search_people("Qwerty", 10) == []
+
+def test_search_people_matches_phone_numbers_in_any_format(database):
+    """Tests that phone numbers are compared by their digits, prefix matches first."""
+    repo = PersonRepository(database)
+    add_people(repo, ("Ada", "+1 (555) 010-0199"), ("Alan", "555.0100"), ("Grace", "44 20 5550 1000"))
+
+    assert phone_digits("+1 (555) 010-0199") == "15550100199"
+    assert [person.name for person in repo.search_people("555-01", 10)] == ["Alan", "Ada", "Grace"]
+    assert [person.name for person in repo.search_people("(1) 555", 10)] == ["Ada"]
+    repo.update_person(2, new_phone_number="(020) 7946")
+    assert [person.name for person in repo.search_people("0207946", 10)] == ["Alan"]
+
+def test_search_people_falls_back_to_like(database):
+    """Tests the substring scan used for words shorter than a trigram or without FTS5."""
+    repo = PersonRepository(database)
+    add_people(repo, ("Xu Wen", "1"), ("Ana Xu", "2"), ("Ana Li", "3"))
+
+    assert [person.name for person in repo.search_people("xu", 10)] == ["Xu Wen", "Ana Xu"]
+    assert [person.name for person in repo.search_people("ana xu", 10)] == ["Ana Xu"]
+    assert [person.name for person in repo.search_people("li ana", 10)] == ["Ana Li"]
+    repo._fts_enabled = False
+    assert [person.name for person in repo.search_people("wen", 10)] == ["Xu Wen"]
+
+def test_search_people_sees_people_added_before_the_index(legacy_database):
+    """Tests that existing people get their phone digits and trigram index on upgrade."""
+    database = legacy_database("""
+        CREATE TABLE people (id INTEGER PRIMARY KEY, name TEXT NOT NULL, phone_number TEXT);
+        INSERT INTO people (name, phone_number) VALUES ('Grace Hopper', '555-0100');
+    """)
+
+    repo = PersonRepository(database)
+
+    assert [person.name for person in repo.search_people("opper", 10)] == ["Grace Hopper"]
+    assert [person.name for person in repo.search_people("5550100", 10)] == ["Grace Hopper"]
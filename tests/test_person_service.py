@@ -42,4 +42,15 @@ def test_update_nonexistent_person_raises_error(person_service):
     with pytest.raises(ValueError, match="Person with ID '999' not found."):
         person_service.update_person(999, new_name="New Name")
         
-    person_service.person_repository.update_person.assert_not_called()
\ No newline at end of file
+    person_service.person_repository.update_person.assert_not_called()
+
+def test_search_people_passes_the_limit(person_service):
+    """Tests that searches are bounded by the default or given limit."""
+    person_service.search_people("ada")
+    person_service.person_repository.search_people.assert_called_once_with("ada", 20)
+
+def test_search_people_with_invalid_limit_raises_error(person_service):
+    """Tests that a limit below one is rejected before querying."""
+    with pytest.raises(ValueError, match="at least 1"):
+        person_service.search_people("ada", limit=0)
+    person_service.person_repository.search_people.assert_not_called()
@@ -0,0 +1,140 @@
+import pytest
+from datetime import date, datetime
+from library.models.models import Book, Person, Loan
+from library.data.book_repository import BookRepository
+from library.data.person_repository import PersonRepository
+from library.data.loan_repository import LoanRepository
+from library.data.stats_repository import StatsRepository
+
+@pytest.fixture
+def repositories(database):
+    """Provides the three repositories sharing one temporary database file with a little data."""
+    book_repo = BookRepository(database)
+    loan_repo = LoanRepository(database)
+    person_repo = PersonRepository(database)
+    book = book_repo.add_book(Book("Dune", "Frank Herbert", "9780441013593"))
+    person = person_repo.add_person(Person("Ada", "555-0100"))
+    loan_repo.add_loan(Loan(book.id, person.id, datetime(2025, 1, 1), datetime(2025, 1, 15)))
+    return book_repo, person_repo, loan_repo
+
+def query_plans(database, lookup):
+    """Runs `lookup` and returns the EXPLAIN QUERY PLAN details of every SELECT it issued."""
+    statements = []
+    # Checkouts are reentrant, so the lookup reuses this thread's reader
+    with database.reader() as conn:
+        conn.set_trace_callback(statements.append)
+        try:
+            lookup()
+        finally:
+            conn.set_trace_callback(None)
+
+        plans = {}
+        for statement in statements:
+            if statement.lstrip().upper().startswith("SELECT"):
+                rows = conn.execute(f"EXPLAIN QUERY PLAN {statement}").fetchall()
+                plans[statement] = [row["detail"] for row in rows]
+    assert plans, "the lookup did not run any SELECT"
+    return plans
+
+@pytest.mark.parametrize("lookup", [
+    lambda books, people, loans: books.get_book_by_id(1),
+    lambda books, people, loans: books.get_book_by_isbn("9780441013593"),
+    lambda books, people, loans: people.get_person_by_id(1),
+    lambda books, people, loans: people.get_person_by_name("Ada"),
+    lambda books, people, loans: loans.get_loan_by_id(1),
+    lambda books, people, loans: loans.get_loan_by_book_id(1),
+    lambda books, people, loans: loans.get_loans_by_person_id(1),
+])
+def test_repository_lookups_use_an_index(database, repositories, lookup):
+    """Tests that single-entity lookups search an index instead of scanning a table."""
+    for statement, details in query_plans(database, lambda: lookup(*repositories)).items():
+        assert all(detail.startswith("SEARCH") for detail in details), (statement, details)
+
+@pytest.mark.parametrize("lookup", [
+    lambda loans: loans.get_overdue_loans(date(2025, 1, 10)),
+    lambda loans: loans.get_due_between(date(2025, 1, 10), date(2025, 1, 20)),
+    lambda loans: list(loans.iter_loan_views_due(date(2025, 1, 10), date(2025, 1, 20))),
+])
+def test_due_date_ranges_seek_the_due_date_index(database, repositories, lookup):
+    """Tests that due date ranges read only the matching loans, not the whole table."""
+    for statement, details in query_plans(database, lambda: lookup(repositories[2])).items():
+        assert any("loans USING INDEX loans_due_date (due_date" in detail for detail in details), (statement, details)
+        assert not any(detail.startswith("SCAN") for detail in details), (statement, details)
+
+def test_ranked_stats_read_their_indexes(database, repositories):
+    """Tests that ranking borrowers reads the counters' index and grouping by author needs no sort."""
+    stats = StatsRepository(database)
+    for statement, details in query_plans(database, lambda: stats.get_busiest_borrowers(10)).items():
+        assert any("INDEX borrower_loan_counts_active" in detail for detail in details), (statement, details)
+        assert not any("TEMP B-TREE" in detail for detail in details), (statement, details)
+    for statement, details in query_plans(database, lambda: stats.get_books_per_author(10)).items():
+        assert any("INDEX books_author" in detail for detail in details), (statement, details)
+        assert not any("FOR GROUP BY" in detail for detail in details), (statement, details)
+
+def test_phone_search_seeks_the_phone_digits_index(database, repositories):
+    """Tests that phone number prefixes are a range of the digits index, not a scan of people."""
+    people = repositories[1]
+    plans = query_plans(database, lambda: people.search_people("555", 10))
+    details = next(details for statement, details in plans.items() if "phone_digits >=" in statement)
+    assert any("INDEX people_phone_digits" in detail for detail in details), details
+    assert all(detail.startswith("SEARCH") for detail in details), details
+
+def test_duplicate_isbn_is_rejected(repositories):
+    """Tests that the unique ISBN index makes duplicate additions fail."""
+    book_repo, _, _ = repositories
+    with pytest.raises(ValueError, match="already exists"):
+        book_repo.add_book(Book("Dune (again)", "Frank Herbert", "9780441013593"))
+
+def test_existing_duplicates_are_merged_on_upgrade(legacy_database):
+    """Tests the one-time merge of people, and that duplicate books are kept until dedupe merges them."""
+    database = legacy_database("""
+        CREATE TABLE books (id INTEGER PRIMARY KEY, isbn TEXT NOT NULL, title TEXT NOT NULL, author TEXT NOT NULL, is_available INTEGER NOT NULL);
+        CREATE TABLE people (id INTEGER PRIMARY KEY, name TEXT NOT NULL, phone_number TEXT);
+        CREATE TABLE loans (id INTEGER PRIMARY KEY, book_id INTEGER UNIQUE NOT NULL, borrower_id INTEGER NOT NULL, loan_date TEXT NOT NULL, due_date TEXT NOT NULL);
+        INSERT INTO books VALUES (1, 'x', 'Dune', 'Frank Herbert', 1), (2, 'x', 'Dune', 'Frank Herbert', 0), (3, 'x', 'Dune', 'Frank Herbert', 1);
+        INSERT INTO people VALUES (1, 'Ada', '1'), (2, 'Ada', '2');
+        INSERT INTO loans VALUES (1, 2, 2, '2025-01-01', '2025-01-15');
+    """)
+
+    with database.reader() as conn:
+        assert [row["id"] for row in conn.execute("SELECT id FROM books")] == [1, 2, 3]
+        assert [row["id"] for row in conn.execute("SELECT id FROM people")] == [1]
+        assert conn.execute("SELECT borrower_id FROM loans").fetchone()["borrower_id"] == 1
+
+    result = BookRepository(database).merge_duplicate_books()
+
+    assert [book.id for book in result.removed_books] == [1, 3]
+    with database.reader() as conn:
+        assert [row["id"] for row in conn.execute("SELECT id FROM books")] == [2]
+
+def test_duplicates_on_loan_do_not_block_the_upgrade(legacy_database):
+    """Tests that a database with several copies of one ISBN on loan opens, and dedupe waits for their return."""
+    database = legacy_database("""
+        CREATE TABLE books (id INTEGER PRIMARY KEY, isbn TEXT NOT NULL, title TEXT NOT NULL, author TEXT NOT NULL, is_available INTEGER NOT NULL);
+        CREATE TABLE people (id INTEGER PRIMARY KEY, name TEXT NOT NULL, phone_number TEXT);
+        CREATE TABLE loans (id INTEGER PRIMARY KEY, book_id INTEGER UNIQUE NOT NULL, borrower_id INTEGER NOT NULL, loan_date INTEGER NOT NULL, due_date INTEGER NOT NULL);
+        INSERT INTO books VALUES (1, '9780441013593', 'Dune', 'Frank Herbert', 0), (2, '9780441013593', 'Dune', 'Frank Herbert', 0);
+        INSERT INTO people VALUES (1, 'Ada', '1');
+        INSERT INTO loans VALUES (1, 1, 1, 20000, 20014), (2, 2, 1, 20000, 20014);
+    """)
+    book_repo = BookRepository(database)
+    loan_repo = LoanRepository(database)
+
+    assert book_repo.merge_duplicate_books().conflicts == ["9780441013593"]
+
+    loan_repo.return_book(2)
+    result = book_repo.merge_duplicate_books()
+
+    assert (result.conflicts, [book.id for book in result.removed_books]) == ([], [2])
+    assert [book.id for book in book_repo.iter_books()] == [1]
+    assert book_repo.get_book_by_isbn("0441013597").id == 1
+
+def test_get_loan_views_joins_titles_and_names(repositories):
+    """Tests that loan views carry the book title and borrower name."""
+    _, _, loan_repo = repositories
+
+    views = loan_repo.get_loan_views()
+
+    assert [(view.book_title, view.borrower_name) for view in views] == [("Dune", "Ada")]
+    assert loan_repo.get_loan_views(person_id=1) == views
+    assert loan_repo.get_loan_views(person_id=2) == []
@@ -0,0 +1,85 @@
+import http.client
+import json
+import threading
+import pytest
+from library.data.book_repository import BookRepository
+from library.data.loan_repository import LoanRepository
+from library.data.person_repository import PersonRepository
+from library.server import LibraryAPI, LibraryServer
+from library.services.book_service import BookService
+from library.services.loan_service import LoanService
+from library.services.person_service import PersonService
+
+@pytest.fixture
+def client(database):
+    """Provides a keep-alive HTTP connection to a server on a temporary database."""
+    books, people, loans = BookRepository(database), PersonRepository(database), LoanRepository(database)
+    api = LibraryAPI(BookService(books), PersonService(people), LoanService(loans, books, people))
+    server = LibraryServer(('127.0.0.1', 0), api, workers=2)
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05})
+    thread.start()
+    connection = http.client.HTTPConnection('127.0.0.1', server.server_port, timeout=5)
+    yield connection
+    connection.close()
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+def request(client, method, path, body=None):
+    client.request(method, path, body=json.dumps(body) if body is not None else None)
+    response = client.getresponse()
+    return response.status, json.loads(response.read())
+
+def test_books_and_loans_round_trip(client):
+    """Tests adding, lending, listing and returning over one connection."""
+    status, book = request(client, 'POST', '/books', {'title': 'Dune', 'author': 'Frank Herbert', 'isbn': '978-0-441-01359-3'})
+    assert status == 200 and book['id'] == 1
+    _, person = request(client, 'POST', '/people', {'name': 'Jane', 'phone_number': '555'})
+
+    status, loan = request(client, 'POST', '/loans/borrow', {'book_id': book['id'], 'person_id': person['id']})
+    assert status == 200 and loan['book_id'] == book['id']
+
+    status, page = request(client, 'GET', f"/loans?person_id={person['id']}")
+    assert [view['book_title'] for view in page['items']] == ['Dune']
+    assert page['next_after'] == loan['id']
+
+    assert request(client, 'POST', '/loans/return', {'book_id': book['id']})[0] == 200
+    assert request(client, 'GET', '/books/isbn/9780441013593')[1]['is_available'] is True
+
+def test_people_search_returns_best_matches(client):
+    """Tests the people search route, which must not be taken for a person ID."""
+    request(client, 'POST', '/people', {'name': 'Ada Lovelace', 'phone_number': '555-0100'})
+    status, people = request(client, 'GET', '/people/search?q=lovelcae&limit=5')
+    assert status == 200 and [person['name'] for person in people] == ['Ada Lovelace']
+    assert request(client, 'GET', '/people/search?q=ada&limit=0')[0] == 400
+
+def test_errors_map_to_statuses(client):
+    """Tests that missing entities, bad input and unknown routes get proper statuses."""
+    assert request(client, 'GET', '/books/42')[0] == 404
+    assert request(client, 'POST', '/books', {'title': 'Dune'})[0] == 400
+    assert request(client, 'POST', '/loans/borrow', {'book_id': 1, 'person_id': 1})[0] == 404
+    assert request(client, 'GET', '/books?limit=0')[0] == 400
+    assert request(client, 'GET', '/books/search?q=dune&limit=-1')[0] == 400
+    assert request(client, 'GET', '/people/search?q=ada&limit=100000')[0] == 400
+    assert request(client, 'PATCH', '/books')[0] == 405
+    assert request(client, 'GET', '/nowhere')[0] == 404
+
+def test_bad_content_length_is_a_client_error(client):
+    """Tests that a Content-Length that is not a count of bytes gets a 400, not a 500."""
+    for length in ('abc', '-1'):
+        client.putrequest('POST', '/books')
+        client.putheader('Content-Length', length)
+        client.endheaders()
+        response = client.getresponse()
+        assert response.status == 400 and 'Content-Length' in json.loads(response.read())['error']
+        client.close()
+
+def test_metrics_report_latency_percentiles(client):
+    """Tests that every handled request is counted in the metrics."""
+    for _ in range(3):
+        request(client, 'GET', '/books')
+    status, metrics = request(client, 'GET', '/metrics')
+    assert status == 200
+    routes = metrics['routes']
+    assert routes['GET /books']['count'] == 3
+    assert routes['GET /books']['p50_ms'] <= routes['GET /books']['p99_ms']
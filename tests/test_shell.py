@@ -0,0 +1,47 @@
+import pytest
+from unittest.mock import Mock
+from library.cli import cli
+from library.models.models import Book, Person
+from library.shell import INDEX_CHANGING_COMMANDS, CompletionIndex, LibraryShell
+
+@pytest.fixture
+def shell():
+    """Provides a shell over mocked services holding two books and a person."""
+    book_service, person_service = Mock(), Mock()
+    book_service.iter_books.return_value = [Book("Dune", "Frank Herbert", "1", id=1), Book("Dune Messiah", "Frank Herbert", "2", id=2)]
+    person_service.iter_people.return_value = [Person("Jane Doe", "555", id=1)]
+    return LibraryShell(cli, {'book_service': book_service, 'person_service': person_service})
+
+def test_completion_index_matches_prefixes_ignoring_case():
+    """Tests prefix lookups in the completion index."""
+    index = CompletionIndex(lambda: ["dune", "Dune Messiah", "Emma", "Dracula"])
+    assert index.complete("DU") == ["dune", "Dune Messiah"]
+    assert index.complete("x") == []
+
+def test_commands_run_in_process_with_shared_services(shell):
+    """Tests that commands reuse the shell's services instead of building new ones."""
+    shell.onecmd("books search dune")
+    shell.obj['book_service'].search_books.assert_called_once_with("dune", limit=None)
+
+def test_index_is_loaded_once_and_rebuilt_after_changes(shell):
+    """Tests that the completion index is cached until a command adds a book."""
+    shell.completedefault("Du", "books get Du", 10, 12)
+    shell.completedefault("Ja", "people get Ja", 11, 13)
+    assert shell.obj['book_service'].iter_books.call_count == 1
+
+    shell.obj['book_service'].add_new_book.return_value = Book("Emma", "Jane Austen", "3", id=3)
+    shell.onecmd("books add Emma 'Jane Austen' 3")
+    shell.completedefault("Du", "books get Du", 10, 12)
+    assert shell.obj['book_service'].iter_books.call_count == 2
+
+def test_index_changing_commands_exist():
+    """Tests that every command that rebuilds the completion index is a real command."""
+    for group, command in INDEX_CHANGING_COMMANDS:
+        assert command in cli.get_command(None, group).commands, (group, command)
+
+def test_completes_subcommands_and_quoted_titles(shell):
+    """Tests completion of subcommands, bare words and titles with spaces."""
+    assert shell.completedefault("se", "books se", 6, 8) == ["search "]
+    assert shell.completedefault("Du", "books search Du", 13, 15) == ["Dune", "'Dune Messiah'"]
+    assert shell.completedefault("Mes", 'books search "Dune Mes', 19, 22) == ['Messiah"']
+    assert shell.completedefault('"Jane', 'people get "Jane', 11, 16) == ['"Jane Doe"']
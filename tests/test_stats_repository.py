@@ -0,0 +1,92 @@
+from datetime import date
+from library.data.book_repository import BookRepository
+from library.data.loan_repository import LoanRepository
+from library.data.person_repository import PersonRepository
+from library.data.stats_repository import StatsRepository
+from library.models.models import AuthorCount, Book, BorrowerCount, LibrarySummary, Person
+
+LOAN_DATE = date(2025, 1, 1)
+DUE_DATE = date(2025, 1, 15)
+
+def _counts_from_tables(database):
+    """Computes the counters from scratch, to compare with the maintained ones."""
+    with database.reader() as conn:
+        total, on_loan = conn.execute("SELECT COUNT(*), COUNT(*) FILTER (WHERE is_available = 0) FROM books").fetchone()
+        per_person = dict(conn.execute("SELECT borrower_id, COUNT(*) FROM loans GROUP BY borrower_id"))
+    return total, on_loan, per_person
+
+def _maintained_counts(database, stats):
+    summary = stats.get_summary()
+    with database.reader() as conn:
+        per_person = dict(conn.execute("SELECT person_id, active_loans FROM borrower_loan_counts"))
+    return summary.total_books, summary.books_on_loan, per_person
+
+def test_counters_follow_every_write(database):
+    """Tests that the triggers keep the counters equal to fresh aggregates."""
+    books = BookRepository(database)
+    people = PersonRepository(database)
+    loans = LoanRepository(database)
+    stats = StatsRepository(database)
+    assert stats.get_summary().total_books == 0
+
+    added = [books.add_book(Book(f"Title {i}", "Author", f"isbn-{i}")) for i in range(5)]
+    ada = people.add_person(Person("Ada", "555"))
+    bob = people.add_person(Person("Bob", "777"))
+    loans.lend_book(added[0].id, ada.id, LOAN_DATE, DUE_DATE)
+    loans.lend_books([(added[1].id, ada.id), (added[2].id, bob.id)], LOAN_DATE, DUE_DATE)
+    assert _maintained_counts(database, stats) == (5, 3, {ada.id: 2, bob.id: 1})
+
+    loans.return_book(added[2].id)
+    loans.return_books([added[0].id])
+    with database.writer() as conn, conn:
+        conn.execute("DELETE FROM books WHERE id = ?", (added[4].id,))
+    assert _maintained_counts(database, stats) == (4, 1, {ada.id: 1})
+    assert _maintained_counts(database, stats) == _counts_from_tables(database)
+    assert stats.get_active_loans(ada.id) == 1
+    assert stats.get_active_loans(bob.id) == 0
+
+def test_summary_ratio():
+    """Tests the availability figures derived from the counters."""
+    summary = LibrarySummary(total_books=8, books_on_loan=2)
+    assert summary.available_books == 6
+    assert summary.availability_ratio == 0.75
+    assert LibrarySummary().availability_ratio == 0.0
+
+def test_counters_are_backfilled_on_upgrade(legacy_database):
+    """Tests that upgrading a database counts the books and loans it already holds."""
+    database = legacy_database("""
+        CREATE TABLE books (id INTEGER PRIMARY KEY, isbn TEXT NOT NULL, title TEXT NOT NULL,
+                            author TEXT NOT NULL, is_available INTEGER NOT NULL);
+        CREATE TABLE people (id INTEGER PRIMARY KEY, name TEXT NOT NULL, phone_number TEXT);
+        CREATE TABLE loans (id INTEGER PRIMARY KEY, book_id INTEGER UNIQUE NOT NULL, borrower_id INTEGER NOT NULL,
+                            loan_date TEXT NOT NULL, due_date TEXT NOT NULL);
+        INSERT INTO books VALUES (1, '1', 'Dune', 'Herbert', 0), (2, '2', 'Emma', 'Austen', 0),
+                                 (3, '3', 'Persuasion', 'Austen', 1);
+        INSERT INTO people VALUES (1, 'Ada', '555');
+        INSERT INTO loans VALUES (1, 1, 1, '2025-01-01', '2025-01-15'), (2, 2, 1, '2025-01-01', '2025-01-15');
+    """)
+    stats = StatsRepository(database)
+
+    assert _maintained_counts(database, stats) == (3, 2, {1: 2})
+    assert stats.get_busiest_borrowers() == [BorrowerCount(1, "Ada", 2)]
+    assert stats.get_books_per_author() == [AuthorCount("Austen", 2), AuthorCount("Herbert", 1)]
+
+def test_busiest_borrowers_and_authors_are_ranked(database):
+    """Tests the ordering and limits of the ranked statistics."""
+    books = BookRepository(database)
+    people = PersonRepository(database)
+    stats = StatsRepository(database)
+    books.add_books([
+        Book("Emma", "Austen", "1"), Book("Persuasion", "Austen", "2"),
+        Book("Dune", "Herbert", "3"), Book("Ulysses", "Joyce", "4"),
+    ])
+    ids = [book.id for book in books.iter_books()]
+    ada = people.add_person(Person("Ada", "555"))
+    bob = people.add_person(Person("Bob", "777"))
+    LoanRepository(database).lend_books(
+        [(ids[0], bob.id), (ids[1], ada.id), (ids[2], bob.id)], LOAN_DATE, DUE_DATE
+    )
+
+    assert stats.get_busiest_borrowers(1) == [BorrowerCount(bob.id, "Bob", 2)]
+    assert stats.get_busiest_borrowers() == [BorrowerCount(bob.id, "Bob", 2), BorrowerCount(ada.id, "Ada", 1)]
+    assert stats.get_books_per_author(2) == [AuthorCount("Austen", 2), AuthorCount("Herbert", 1)]
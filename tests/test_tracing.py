@@ -0,0 +1,66 @@
+import json
+from click.testing import CliRunner
+from library.cli import cli
+from library.data.book_repository import BookRepository
+from library.data.database_manager import DatabaseManager
+from library.data.tracing import QueryTracer
+from library.models.models import Book
+
+def test_repeated_lookups_are_grouped_by_statement(tmp_path):
+    """Tests that every execution, row and commit is counted against its statement text."""
+    tracer = QueryTracer()
+    db = DatabaseManager(db_path=str(tmp_path / "library.db"), tracer=tracer)
+    try:
+        books = BookRepository(db)
+        book = books.add_book(Book("Dune", "Frank Herbert", "123"))
+        tracer.reset()
+        for _ in range(3):
+            books.get_book_by_id(book.id)
+        assert len(list(books.iter_books())) == 1
+    finally:
+        db.close_connection()
+
+    stats = {entry.statement: entry for entry in tracer.statements()}
+    lookup = stats["SELECT title, author, isbn, is_available, id FROM books WHERE id = ?"]
+    assert (lookup.count, lookup.rows) == (3, 3)
+    assert lookup.max_s <= lookup.total_s
+    listing = stats["SELECT title, author, isbn, is_available, id FROM books ORDER BY id"]
+    assert (listing.count, listing.rows) == (1, 1)
+
+def test_commits_are_timed(tmp_path):
+    """Tests that the commit of a write shows up as a statement of its own."""
+    tracer = QueryTracer()
+    db = DatabaseManager(db_path=str(tmp_path / "library.db"), tracer=tracer)
+    try:
+        tracer.reset()
+        BookRepository(db).add_book(Book("Dune", "Frank Herbert", "123"))
+    finally:
+        db.close_connection()
+    stats = {entry.statement: entry for entry in tracer.statements()}
+    assert stats["COMMIT"].count == 1
+    assert stats["INSERT INTO books (isbn, isbn13, title, author, is_available) VALUES (?, ?, ?, ?, ?)"].count == 1
+
+def test_echo_sees_statements_with_their_values(tmp_path):
+    """Tests that --trace-sql style echoing receives expanded statements."""
+    echoed = []
+    db = DatabaseManager(db_path=str(tmp_path / "library.db"), tracer=QueryTracer(echo=echoed.append))
+    try:
+        BookRepository(db).get_book_by_isbn("9780441013593")
+    finally:
+        db.close_connection()
+    assert any("'9780441013593'" in statement for statement in echoed)
+
+def test_profile_output_appends_a_record_per_command(tmp_path):
+    """Tests the --profile summary and the JSON records of --profile-output."""
+    runner = CliRunner()
+    db_path = str(tmp_path / "library.db")
+    output = tmp_path / "profile.jsonl"
+    for args in (["books", "add", "Dune", "Frank Herbert", "9780441013593"], ["books", "list", "--limit", "5"]):
+        result = runner.invoke(cli, ["--db-path", db_path, "--profile", "--profile-output", str(output), *args])
+        assert result.exit_code == 0, result.output
+    assert "Profile of 'books list --limit 5'" in result.stderr
+
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [record["command"] for record in records] == ["books add Dune Frank Herbert 9780441013593", "books list --limit 5"]
+    statements = {entry["statement"]: entry for entry in records[1]["statements"]}
+    assert statements["SELECT title, author, isbn, is_available, id FROM books ORDER BY id LIMIT ?"]["rows"] == 1